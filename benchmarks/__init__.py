@@ -0,0 +1 @@
+"""Benchmarks package - run each script with `python -m benchmarks.<name>`"""
@@ -0,0 +1,91 @@
+"""
+Cascade Delete Benchmark
+Deletes a patient with many test results through the ORM cascade (old path)
+and through a single DELETE relying on ON DELETE CASCADE (new path)
+
+Usage:
+    python -m benchmarks.bench_cascade_delete [results]
+"""
+import sys
+from datetime import date
+
+from benchmarks.common import use_temp_database, count_statements, timed
+
+use_temp_database("cascade_delete")
+
+from sqlalchemy import insert, func  # noqa: E402
+from database.db_manager import get_db_manager, initialize_database  # noqa: E402
+from database.models import Patient, Visit, TestType, TestResult, Appointment  # noqa: E402
+from services import PatientService  # noqa: E402
+
+RESULTS_PER_VISIT = 100
+
+
+def seed_patient(code: str, results: int, test_type_id: int) -> int:
+    """Create one patient with `results` test results spread over visits"""
+    with get_db_manager().session_scope() as session:
+        patient_id = session.scalar(
+            insert(Patient).values(patient_code=code, full_name=code).returning(Patient.id)
+        )
+        visits = max(1, results // RESULTS_PER_VISIT)
+        visit_ids = session.scalars(
+            insert(Visit).returning(Visit.id),
+            [{'patient_id': patient_id, 'visit_date': date.today()} for _ in range(visits)]
+        ).all()
+        session.execute(insert(TestResult), [
+            {'visit_id': visit_ids[i % visits], 'test_type_id': test_type_id,
+             'test_date': date.today(), 'result_value': float(i)}
+            for i in range(results)
+        ])
+        session.execute(insert(Appointment), [
+            {'patient_id': patient_id, 'appointment_date': date.today()}
+        ])
+    return patient_id
+
+
+def legacy_delete_patient(patient_id: int):
+    """Old path: load every dependent row and delete it through the session"""
+    with get_db_manager().session_scope() as session:
+        patient = session.get(Patient, patient_id)
+        for visit in patient.visits:
+            for result in visit.test_results:
+                session.delete(result)
+            for prescription in visit.prescriptions:
+                session.delete(prescription)
+            if visit.appointment:
+                session.delete(visit.appointment)
+            session.delete(visit)
+        for appointment in patient.appointments:
+            session.delete(appointment)
+        session.delete(patient)
+
+
+def run(results: int):
+    initialize_database()
+    db_manager = get_db_manager()
+    statements = count_statements(db_manager._engine)
+
+    with db_manager.session_scope() as session:
+        test_type_id = session.scalar(
+            insert(TestType).values(name="Glucose").returning(TestType.id)
+        )
+
+    print(f"Deleting a patient with {results} test results\n")
+
+    for label, delete in [
+        ("ORM cascade (legacy)", legacy_delete_patient),
+        ("ON DELETE CASCADE", PatientService().delete_patient),
+    ]:
+        patient_id = seed_patient(label, results, test_type_id)
+        statements.clear()
+        with timed(label):
+            delete(patient_id)
+        print(f"{'':<40} {len(statements):8d} statements")
+
+    with db_manager.session_scope() as session:
+        remaining = session.scalar(func.count(TestResult.id).select())
+    print(f"\nTest results left behind: {remaining}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
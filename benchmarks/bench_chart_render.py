@@ -0,0 +1,56 @@
+"""
+Chart Render Benchmark
+Agg render time of the test timeline chart, full series vs downsampled
+
+Usage:
+    python -m benchmarks.bench_chart_render
+"""
+from datetime import date, timedelta
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+from benchmarks.common import timed  # noqa: E402
+from utils.chart_helper import ChartHelper  # noqa: E402
+
+
+def make_timeline(points: int) -> list:
+    """Glucose readings inside 3.9-6.4 with a few spikes above it"""
+    rng = np.random.default_rng(points)
+    start = date(2000, 1, 1)
+    values = 5.2 + 0.4 * np.sin(np.arange(points) / 90) + rng.normal(0, 0.2, points)
+    spikes = rng.choice(points, size=max(1, points // 500), replace=False)
+    values[spikes] += 4
+    return [
+        {'date': start + timedelta(hours=6 * i), 'value': float(v)}
+        for i, v in enumerate(values)
+    ]
+
+
+def render(timeline, max_points):
+    fig = ChartHelper.create_timeline_chart(
+        timeline, "Glucose", 3.9, 6.4, figsize=(10, 5), max_points=max_points
+    )
+    FigureCanvasAgg(fig).draw()
+
+
+def run():
+    for points in (100, 1_000, 10_000, 100_000):
+        timeline = make_timeline(points)
+        with timed(f"{points:>7} points, full"):
+            render(timeline, None)
+        for method in ("lttb", "minmax"):
+            x = np.arange(points, dtype=float)
+            y = np.array([item['value'] for item in timeline])
+            with timed(f"{points:>7} points, {method} indices"):
+                ChartHelper.downsample_indices(x, y, 1000, method=method)
+        with timed(f"{points:>7} points, downsampled render"):
+            render(timeline, 1000)
+        print()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,94 @@
+"""
+CSV Reader Benchmark
+Reading a test results CSV chunk by chunk into import records, the SQL
+engine's raw cells and the converted fields of the other imports:
+pd.read_csv chunks + import_frames vs csv_reader (csv module, no pandas).
+Reports time and peak traced memory, which should stay around one chunk
+for both whatever the file size.
+
+Usage:
+    python -m benchmarks.bench_csv_reader [rows]
+"""
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.bench_import_engines import RESULT_MAPPING, make_files
+
+CHUNK_SIZE = 5000
+
+
+def pandas_rows(file_path: Path):
+    import pandas as pd
+    from services.import_frames import raw_columns, records
+    from services.import_service import TEST_RESULT_BATCH_FIELDS
+
+    for chunk in pd.read_csv(file_path, dtype=str, chunksize=CHUNK_SIZE):
+        yield [record for _, record in records(raw_columns(chunk, RESULT_MAPPING, TEST_RESULT_BATCH_FIELDS))]
+
+
+def csv_rows(file_path: Path):
+    from services.csv_reader import CsvFile, raw_rows
+    from services.import_service import TEST_RESULT_BATCH_FIELDS
+
+    for chunk in CsvFile(file_path).chunks(CHUNK_SIZE):
+        yield raw_rows(chunk, RESULT_MAPPING, TEST_RESULT_BATCH_FIELDS)
+
+
+def pandas_typed(file_path: Path):
+    import pandas as pd
+    from services.import_frames import records, typed_columns
+    from services.import_service import TEST_RESULT_BATCH_FIELDS
+
+    for chunk in pd.read_csv(file_path, dtype=str, chunksize=CHUNK_SIZE):
+        yield [record for _, record in records(typed_columns(chunk, RESULT_MAPPING, TEST_RESULT_BATCH_FIELDS))]
+
+
+def csv_typed(file_path: Path):
+    from services.csv_reader import CsvFile, typed_rows
+    from services.import_service import TEST_RESULT_BATCH_FIELDS
+
+    for chunk in CsvFile(file_path).chunks(CHUNK_SIZE):
+        yield typed_rows(chunk, RESULT_MAPPING, TEST_RESULT_BATCH_FIELDS)
+
+
+def measure(label: str, reader, file_path: Path) -> list:
+    """
+    Time reader over the file, then read it again with tracemalloc on for
+    the peak (tracing slows allocations down); returns the first chunk
+    """
+    start = time.perf_counter()
+    first, rows = None, 0
+    for records in reader(file_path):
+        first = first or records
+        rows += len(records)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in reader(file_path):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<30} {elapsed:8.3f}s  {rows / elapsed:10.0f} rows/s  peak {peak / 2**20:7.1f} MiB")
+    return first
+
+
+def run(rows: int):
+    folder = Path(tempfile.mkdtemp(prefix="hospital-bench-"))
+    file_path = make_files(rows, folder)["results"]
+    print(f"{rows} rows, {file_path.stat().st_size / 2**20:.1f} MiB, chunks of {CHUNK_SIZE}\n")
+
+    import services.import_frames  # noqa: F401  (import time is not part of the read)
+    first_pandas = measure("raw: pandas read_csv", pandas_rows, file_path)
+    first_csv = measure("raw: csv_reader", csv_rows, file_path)
+    assert first_pandas == first_csv, "raw readers disagree"
+    first_pandas = measure("typed: read_csv + typed_columns", pandas_typed, file_path)
+    first_csv = measure("typed: csv_reader typed_rows", csv_typed, file_path)
+    assert first_pandas == first_csv, "typed readers disagree"
+    print("\n✓ Both readers produced the same rows")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,60 @@
+"""
+Excel Parse Benchmark
+pd.read_excel (read_file before the parser) vs streaming the sheet with
+ExcelSheet, and how long an import waits for its first chunk
+
+Usage:
+    python -m benchmarks.bench_excel_parse [rows]
+"""
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+from openpyxl import Workbook
+
+import config
+from benchmarks.common import timed
+from services.excel_parser import ExcelSheet
+
+
+def make_workbook(rows: int) -> Path:
+    """Workbook whose only sheet holds `rows` test results"""
+    path = Path(tempfile.mkdtemp(prefix="hospital-bench-")) / "results.xlsx"
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(["patient_code", "test_type_name", "test_date", "result_value", "notes"])
+    start = datetime(2020, 1, 1)
+    for i in range(rows):
+        sheet.append([
+            f"BN{i % 5000:05d}",
+            ("Glucose", "Hemoglobin", "Cholesterol")[i % 3],
+            start + timedelta(days=i % 1500),
+            "Âm tính" if i % 10 == 0 else 80 + (i % 400) / 10,
+            "Ghi chú" if i % 3 == 0 else None
+        ])
+    workbook.save(path)
+    return path
+
+
+def run(rows: int):
+    print(f"Writing a {rows}-row workbook...")
+    path = make_workbook(rows)
+    print()
+
+    with timed("pd.read_excel", rows):
+        pd.read_excel(path)
+    with timed("ExcelSheet, all chunks", rows):
+        for _ in ExcelSheet(str(path)).chunks(config.IMPORT_CHUNK_SIZE):
+            pass
+
+    # What an import waits for before it can write anything
+    with timed(f"first {config.IMPORT_CHUNK_SIZE}-row chunk"):
+        chunks = ExcelSheet(str(path)).chunks(config.IMPORT_CHUNK_SIZE)
+        next(chunks)
+    chunks.close()
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
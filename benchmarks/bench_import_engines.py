@@ -0,0 +1,143 @@
+"""
+Import Engine Benchmark
+The pandas engine (whole-column transforms, ORM bulk inserts) vs the SQL
+engine (staging table, set-based INSERT ... SELECT) on the same test
+results and visits files, each into its own fresh database. Both must
+store the same rows and report the same errors.
+
+Usage:
+    python -m benchmarks.bench_import_engines [rows]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PATIENTS = 5000
+TEST_TYPES = ["Glucose", "Hemoglobin", "Cholesterol"]
+RESULT_MAPPING = {field: field for field in (
+    'patient_code', 'test_type_name', 'test_date', 'result_value', 'result_text', 'notes'
+)}
+VISIT_MAPPING = {field: field for field in (
+    'patient_code', 'visit_date', 'symptoms', 'diagnosis', 'conclusion', 'notes'
+)}
+
+
+def make_files(rows: int, folder: Path) -> dict:
+    """Patients, test results (with some bad rows) and visits as CSV files"""
+    rng = np.random.default_rng(rows)
+    start = date(2020, 1, 1)
+    dates = [(start + timedelta(days=i % 1500)).strftime("%d/%m/%Y") for i in range(rows)]
+
+    pd.DataFrame({
+        'patient_code': [f"BN{i:05d}" for i in range(PATIENTS)],
+        'full_name': [f"Bệnh nhân {i}" for i in range(PATIENTS)]
+    }).to_csv(folder / "patients.csv", index=False)
+    pd.DataFrame({'name': TEST_TYPES, 'unit': ["mg/dL", "g/dL", "mg/dL"]}).to_csv(
+        folder / "test_types.csv", index=False
+    )
+
+    values = np.round(rng.normal(100, 15, rows), 1).astype(str).astype(object)
+    values[::10] = "Âm tính"
+    codes = np.array([f"BN{i % (PATIENTS + 50):05d}" for i in range(rows)], dtype=object)  # some unknown
+    codes[::997] = None
+    pd.DataFrame({
+        'patient_code': codes,
+        'test_type_name': rng.choice(TEST_TYPES + ["Unknown"], rows, p=[0.33, 0.33, 0.33, 0.01]),
+        'test_date': dates,
+        'result_value': values,
+        'result_text': None,
+        'notes': np.where(np.arange(rows) % 3 == 0, "Ghi chú", None)
+    }).to_csv(folder / "results.csv", index=False)
+
+    visits = rows // 5
+    pd.DataFrame({
+        'patient_code': codes[:visits],
+        'visit_date': dates[:visits],
+        'symptoms': "Sốt",
+        'diagnosis': np.where(np.arange(visits) % 2 == 0, "Cảm cúm", None),
+        'conclusion': None,
+        'notes': None
+    }).to_csv(folder / "visits.csv", index=False)
+    return {name: folder / f"{name}.csv" for name in ("patients", "test_types", "results", "visits")}
+
+
+def run_engine(engine: str, folder: str):
+    """One engine in this process (started by run() with a fresh database)"""
+    from database.db_manager import initialize_database, get_db_manager
+    initialize_database()
+    from benchmarks.common import count_statements, timed
+    from services.import_service import ImportService
+
+    folder = Path(folder)
+    service = ImportService(engine)
+    service.import_patients(str(folder / "patients.csv"), {'patient_code': 'patient_code', 'full_name': 'full_name'})
+    service.import_test_types(str(folder / "test_types.csv"), {'name': 'name', 'unit': 'unit'})
+
+    statements = count_statements(get_db_manager()._engine)
+    for label, method, file_name, mapping in (
+        ("test results", service.import_test_results_batch, "results.csv", RESULT_MAPPING),
+        ("visits", service.import_visits, "visits.csv", VISIT_MAPPING),
+    ):
+        rows = sum(1 for _ in open(folder / file_name, encoding="utf-8")) - 1
+        statements.clear()
+        with timed(f"{engine:<6} {label}", rows):
+            result = method(str(folder / file_name), mapping)
+        print(f"{'':<7}{result['imported']} imported, {result['error_count']} errors, "
+              f"{len(statements)} statements")
+        # Keep the full error report; the other engine's run writes to the same path
+        report = Path(result['error_report'])
+        lines = report.read_text(encoding="utf-8-sig").splitlines()
+        (folder / f"{engine}-{file_name}.errors").write_text("\n".join(sorted(lines)), encoding="utf-8")
+        report.unlink()
+
+
+def _dump(db_path: Path) -> dict:
+    """Table contents without creation timestamps"""
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    try:
+        dump = {}
+        for table in ("visits", "test_results"):
+            columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})") if row[1] != "created_at"]
+            dump[table] = conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+        return dump
+    finally:
+        conn.close()
+
+
+def run(rows: int):
+    folder = Path(tempfile.mkdtemp(prefix="hospital-bench-"))
+    print(f"Writing {rows} test results and {rows // 5} visits...\n")
+    make_files(rows, folder)
+
+    databases = {}
+    for engine in ("pandas", "sql"):
+        databases[engine] = folder / f"{engine}.db"
+        env = {**os.environ, "HOSPITAL_DB_URL": f"sqlite:///{databases[engine]}"}
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_import_engines", "--engine", engine, str(folder)],
+            env=env, check=True
+        )
+
+    same_rows = _dump(databases["pandas"]) == _dump(databases["sql"])
+    same_errors = all(
+        (folder / f"pandas-{name}.errors").read_text(encoding="utf-8")
+        == (folder / f"sql-{name}.errors").read_text(encoding="utf-8")
+        for name in ("results.csv", "visits.csv")
+    )
+    assert same_rows and same_errors, "engines disagree"
+    print("\n✓ Both engines stored the same rows and reported the same errors")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--engine":
+        run_engine(sys.argv[2], sys.argv[3])
+    else:
+        run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
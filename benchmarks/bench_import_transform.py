@@ -0,0 +1,111 @@
+"""
+Import Transform Benchmark
+Row-wise (iterrows + per-cell conversion) vs whole-column conversion of a
+test results file, without the database lookups and writes
+
+Usage:
+    python -m benchmarks.bench_import_transform
+"""
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import use_temp_database, timed
+
+use_temp_database("import_transform")
+
+from services.import_frames import records, split_result, typed_columns  # noqa: E402
+from services.import_service import TEST_RESULT_BATCH_FIELDS  # noqa: E402
+
+MAPPING = {field: field for field in TEST_RESULT_BATCH_FIELDS}
+
+
+def make_chunk(rows: int) -> pd.DataFrame:
+    """CSV-like text cells: dd/mm/yyyy dates, numeric and text results, some blanks"""
+    rng = np.random.default_rng(rows)
+    start = date(2020, 1, 1)
+    values = np.round(rng.normal(100, 15, rows), 1).astype(str).astype(object)
+    values[::10] = "Âm tính"
+    notes = np.array([None] * rows, dtype=object)
+    notes[::3] = "Ghi chú"
+    return pd.DataFrame({
+        'patient_code': [f"BN{i % 5000:05d}" for i in range(rows)],
+        'test_type_name': rng.choice(["Glucose", "Hemoglobin", "Cholesterol"], rows),
+        'test_date': [(start + timedelta(days=i % 1500)).strftime("%d/%m/%Y") for i in range(rows)],
+        'result_value': values,
+        'result_text': None,
+        'notes': notes
+    })
+
+
+def _to_text(value):
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value).strip() or None
+
+
+def _to_date(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    parsed = pd.to_datetime(str(value), dayfirst=True, errors='coerce')
+    return None if pd.isna(parsed) else parsed.date()
+
+
+def transform_rowwise(chunk: pd.DataFrame) -> list:
+    """The per-row conversion imports used before"""
+    rows = []
+    for idx, row in chunk.iterrows():
+        data = {field: row[column] for field, column in MAPPING.items() if pd.notna(row[column])}
+        if 'patient_code' not in data or 'test_type_name' not in data:
+            continue
+        value = data.get('result_value')
+        try:
+            result_value, result_text = float(value), None
+        except (TypeError, ValueError):
+            result_value, result_text = None, _to_text(value)
+        rows.append((idx + 2, {
+            'patient_code': _to_text(data['patient_code']),
+            'test_type_name': _to_text(data['test_type_name']),
+            'test_date': _to_date(data.get('test_date')),
+            'result_value': result_value,
+            'result_text': result_text or _to_text(data.get('result_text')),
+            'notes': _to_text(data.get('notes'))
+        }))
+    return rows
+
+
+def transform_columns(chunk: pd.DataFrame) -> list:
+    frame = typed_columns(chunk, MAPPING, TEST_RESULT_BATCH_FIELDS)
+    frame = frame[frame['patient_code'].notna() & frame['test_type_name'].notna()]
+    result_value, result_text = split_result(frame['result_value'])
+    frame = frame.assign(
+        result_value=result_value,
+        result_text=result_text.where(result_text.notna(), frame['result_text'])
+    )
+    return records(frame)
+
+
+def run():
+    for rows in (10_000, 100_000):
+        chunk = make_chunk(rows)
+
+        started = time.perf_counter()
+        with timed(f"{rows:>7} rows, row-wise", rows):
+            expected = transform_rowwise(chunk)
+        rowwise = time.perf_counter() - started
+
+        started = time.perf_counter()
+        with timed(f"{rows:>7} rows, whole columns", rows):
+            actual = transform_columns(chunk)
+        columns = time.perf_counter() - started
+
+        assert actual == expected, "transforms disagree"
+        print(f"{'':>7} speedup {rowwise / columns:.1f}x\n")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,77 @@
+"""
+Startup Benchmark
+Measures import time of the application entry point with `python -X importtime`
+and checks it against benchmarks/startup_budget.json
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--update]
+
+Exits with status 1 when the budget is exceeded or a module that should load
+lazily is imported at startup. --update rewrites max_import_ms with 25% headroom.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BUDGET_FILE = Path(__file__).with_name("startup_budget.json")
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def measure(entry_module: str) -> dict:
+    """Import the entry module in a fresh interpreter; {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {entry_module}"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+    )
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run(runs: int, update: bool) -> int:
+    budget = json.loads(BUDGET_FILE.read_text(encoding="utf-8"))
+    entry = budget["entry_module"]
+
+    # Best of several runs; the first one also pays for cold .pyc/disk caches
+    samples = [measure(entry) for _ in range(runs)]
+    best = min(samples, key=lambda modules: modules[entry][1])
+    total_ms = best[entry][1] / 1000
+
+    print(f"import {entry}: {total_ms:.0f} ms (best of {runs}, budget {budget['max_import_ms']} ms)\n")
+    print("Slowest modules (self time):")
+    for name, (self_us, _) in sorted(best.items(), key=lambda item: -item[1][0])[:10]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+    failures = []
+    if total_ms > budget["max_import_ms"]:
+        failures.append(f"startup import time {total_ms:.0f} ms exceeds {budget['max_import_ms']} ms")
+    eager = [name for name in budget["forbidden_modules"] if name in best]
+    if eager:
+        failures.append(f"imported at startup but should be lazy: {', '.join(eager)}")
+
+    if update:
+        budget["max_import_ms"] = int(total_ms * 1.25) + 1
+        BUDGET_FILE.write_text(json.dumps(budget, indent=4) + "\n", encoding="utf-8")
+        print(f"\n✓ Budget updated to {budget['max_import_ms']} ms")
+
+    print()
+    for failure in failures:
+        print(f"✗ {failure}")
+    if not failures:
+        print("✓ Startup within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--update", action="store_true", help="rewrite the stored budget")
+    args = parser.parse_args()
+    sys.exit(run(args.runs, args.update))
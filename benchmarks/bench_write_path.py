@@ -0,0 +1,107 @@
+"""
+Write Path Benchmark
+Compares the old flush + refresh write pattern with INSERT/UPDATE ... RETURNING
+
+Usage:
+    python -m benchmarks.bench_write_path [writes]
+"""
+import sys
+from datetime import date
+
+from benchmarks.common import use_temp_database, count_statements, timed
+
+use_temp_database("write_path")
+
+from sqlalchemy.orm import sessionmaker, joinedload  # noqa: E402
+from database.db_manager import get_db_manager, initialize_database  # noqa: E402
+from database.models import Patient, Visit  # noqa: E402
+from services import PatientService, VisitService  # noqa: E402
+
+
+def legacy_create_patient(session_factory, code):
+    """Old path: add, flush, refresh, commit"""
+    session = session_factory()
+    try:
+        patient = Patient(patient_code=code, full_name="Legacy")
+        session.add(patient)
+        session.flush()
+        session.refresh(patient)
+        session.commit()
+        return patient.id
+    finally:
+        session.close()
+
+
+def legacy_update_patient(session_factory, patient_id):
+    """Old path: select, setattr, flush, refresh, commit"""
+    session = session_factory()
+    try:
+        patient = session.query(Patient).filter(Patient.id == patient_id).first()
+        patient.notes = "updated"
+        session.flush()
+        session.refresh(patient)
+        session.commit()
+    finally:
+        session.close()
+
+
+def legacy_create_visit(session_factory, patient_id):
+    """Old path: commit, then re-read with three joinedloads"""
+    session = session_factory()
+    try:
+        visit = Visit(patient_id=patient_id, visit_date=date.today())
+        session.add(visit)
+        session.commit()
+        visit_id = visit.id
+    finally:
+        session.close()
+    session = session_factory()
+    try:
+        return session.query(Visit)\
+            .options(
+                joinedload(Visit.patient),
+                joinedload(Visit.test_results),
+                joinedload(Visit.prescriptions)
+            )\
+            .filter(Visit.id == visit_id)\
+            .first()
+    finally:
+        session.close()
+
+
+def run(writes: int):
+    initialize_database()
+    engine = get_db_manager()._engine
+    statements = count_statements(engine)
+    legacy_factory = sessionmaker(bind=engine, autoflush=False)  # expire_on_commit=True
+
+    patient_service = PatientService()
+    visit_service = VisitService()
+
+    print(f"{writes} writes per scenario\n")
+
+    scenarios = [
+        ("create_patient (legacy)",
+         lambda i: legacy_create_patient(legacy_factory, f"L{i:07d}")),
+        ("create_patient (RETURNING)",
+         lambda i: patient_service.create_patient(f"R{i:07d}", "Returning")),
+        ("update_patient (legacy)",
+         lambda i: legacy_update_patient(legacy_factory, 1)),
+        ("update_patient (RETURNING)",
+         lambda i: patient_service.update_patient(1, notes="updated")),
+        ("create_visit (legacy)",
+         lambda i: legacy_create_visit(legacy_factory, 1)),
+        ("create_visit (RETURNING)",
+         lambda i: visit_service.create_visit(1, date.today())),
+    ]
+
+    for label, write in scenarios:
+        statements.clear()
+        with timed(label, writes):
+            for i in range(writes):
+                write(i)
+        print(f"{'':<40} {len(statements) / writes:8.1f} statements/write")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,44 @@
+"""
+Benchmark Helpers
+Shared setup used by the benchmark scripts
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+def use_temp_database(name: str = "bench") -> Path:
+    """
+    Point the application at a throwaway SQLite database
+    Must be called before anything imports `database` or `services`
+    """
+    path = Path(tempfile.mkdtemp(prefix="hospital-bench-")) / f"{name}.db"
+    os.environ["HOSPITAL_DB_URL"] = f"sqlite:///{path}"
+    return path
+
+
+def count_statements(engine) -> list:
+    """Record every SQL statement sent through the engine into a list"""
+    from sqlalchemy import event
+    
+    statements = []
+    
+    @event.listens_for(engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    return statements
+
+
+@contextmanager
+def timed(label: str, operations: int = None):
+    """Print elapsed time (and throughput when operations is given)"""
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    if operations:
+        print(f"{label:<40} {elapsed:8.3f}s  {operations / elapsed:10.0f} ops/s")
+    else:
+        print(f"{label:<40} {elapsed:8.3f}s")
@@ -11,11 +11,15 @@ BASE_DIR = Path(__file__).parent.absolute()
 # Database Configuration
 DATABASE_DIR = BASE_DIR / "data"
 DATABASE_PATH = DATABASE_DIR / "hospital.db"
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+DATABASE_URL = os.environ.get("HOSPITAL_DB_URL", f"sqlite:///{DATABASE_PATH}")
 
 # Ensure data directory exists
 DATABASE_DIR.mkdir(exist_ok=True)
 
+# Query result cache (see database/query_cache.py)
+QUERY_CACHE_MAX_ENTRIES = 256
+QUERY_CACHE_MAX_ROWS = 50000
+
 # UI Configuration
 APP_TITLE = "Quản Lý Phòng Khám"
 APP_VERSION = "1.0.0"
@@ -23,6 +27,16 @@ WINDOW_WIDTH = 1400
 WINDOW_HEIGHT = 800
 WINDOW_MIN_WIDTH = 1200
 WINDOW_MIN_HEIGHT = 700
+STARTUP_DEFER_MS = 50  # delay before database init so the window paints first
+SCHEMA_VERIFY_DELAY_MS = 2000  # full schema check runs this long after startup
+PANEL_CACHE_MAX_PANELS = 4  # hidden panels kept alive for quick switching
+PANEL_CACHE_MAX_WIDGETS = 4000  # evict old panels once the cached panels hold more widgets
+LIST_PAGE_SIZE = 50  # rows fetched per page by the virtualized lists
+SEARCH_DEBOUNCE_MS = 250  # search-as-you-type waits this long after the last keystroke
+SEARCH_CACHE_SIZE = 16  # recent keyword results kept per search box
+SEARCH_RESULT_LIMIT = 500  # rows fetched per search; smaller results are complete and filtered in memory
+PATIENT_PICKER_LIMIT = 20  # suggestions fetched per keystroke by the patient picker
+DASHBOARD_CACHE_PATH = DATABASE_DIR / "dashboard_cache.json"  # last dashboard figures, shown at startup
 
 # Theme Configuration
 THEME_MODE = "light"  # "light" or "dark"
@@ -71,9 +85,20 @@ TEST_CATEGORIES = [
     "Khác"
 ]
 
+# Charts
+CHART_MAX_POINTS = 1000  # timelines above this are downsampled (out-of-range points always kept)
+CHART_DOWNSAMPLE_METHOD = "lttb"  # "lttb" or "minmax"
+CHART_CACHE_MAX_ENTRIES = 32  # rendered chart images kept in memory
+
 # Import/Export Configuration
-ALLOWED_IMPORT_EXTENSIONS = [".csv", ".xlsx", ".xls"]
-MAX_IMPORT_ROWS = 10000
+ALLOWED_IMPORT_EXTENSIONS = [".csv", ".xlsx", ".xls", ".parquet", ".feather"]  # .parquet/.feather need pyarrow
+MAX_IMPORT_ROWS = None  # None = no limit; imports stream the file in chunks
+IMPORT_CHUNK_SIZE = 5000  # rows read, transformed and committed together during an import
+IMPORT_FILE_CACHE_ENTRIES = 2  # parsed import files kept in memory between steps of an import
+IMPORT_FILE_CACHE_MAX_CELLS = 20_000_000  # drop older parsed files beyond this many cells
+IMPORT_ENGINE = "pandas"  # 'pandas' (convert in Python) or 'sql' (staging table merged in SQLite); visits and test results
+IMPORT_ERROR_SAMPLE_SIZE = 100  # error/skip messages kept in memory per import; all rows go to the error report
+IMPORT_REPORT_DIR = DATABASE_DIR / "import_reports"  # error reports whose source folder is not writable
 
 # Logging Configuration
 LOG_LEVEL = "INFO"
@@ -1,5 +1,5 @@
 """Database package initialization"""
-from .db_manager import DatabaseManager, get_session
+from .db_manager import DatabaseManager, get_session, cached_query, cancellable
 from .models import (
     Patient,
     Visit,
@@ -7,17 +7,23 @@ from .models import (
     TestResult,
     Medicine,
     Prescription,
-    Appointment
+    Appointment,
+    PatientSummary,
+    ImportJournal
 )
 
 __all__ = [
     'DatabaseManager',
     'get_session',
+    'cached_query',
+    'cancellable',
     'Patient',
     'Visit',
     'TestType',
     'TestResult',
     'Medicine',
     'Prescription',
-    'Appointment'
+    'Appointment',
+    'PatientSummary',
+    'ImportJournal'
 ]
@@ -2,13 +2,29 @@
 Database Manager
 Handles database connection, session management, and initialization
 """
+import functools
+import re
+import threading
 from contextlib import contextmanager
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Set
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, Session, ORMExecuteState, merge_frozen_result
 from sqlalchemy.pool import StaticPool
+from .query_cache import QueryCache
 import config
 
 
+# Set while a @cached_query method runs; SELECTs are cached only then
+_query_cache_enabled = ContextVar("query_cache_enabled", default=False)
+
+# Set inside cancellable(); the SQLite progress handler aborts queries once it fires
+_cancel_event = ContextVar("query_cancel_event", default=None)
+
+# SQLite VM instructions between cancellation checks
+_PROGRESS_INTERVAL = 1000
+
+
 class DatabaseManager:
     """Singleton database manager for the application"""
     
@@ -27,26 +43,86 @@ class DatabaseManager:
     
     def _initialize_engine(self):
         """Initialize SQLAlchemy engine and session factory"""
-        # Use StaticPool for SQLite to handle threading better
+        # An in-memory database only exists on one connection, so share it;
+        # file databases use the default pool so background threads never
+        # share a connection (and its transaction) with the UI thread
+        pool_options = {}
+        if config.DATABASE_URL in ("sqlite://", "sqlite:///:memory:"):
+            pool_options["poolclass"] = StaticPool
+        
         self._engine = create_engine(
             config.DATABASE_URL,
             connect_args={"check_same_thread": False},
-            poolclass=StaticPool,
-            echo=False  # Set to True for SQL debugging
+            echo=False,  # Set to True for SQL debugging
+            **pool_options
         )
         
+        # SQLite ships with foreign keys off; ON DELETE CASCADE needs them on
+        @event.listens_for(self._engine, "connect")
+        def _enable_foreign_keys(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA foreign_keys=ON")
+            cursor.close()
+            dbapi_connection.set_progress_handler(_check_cancelled, _PROGRESS_INTERVAL)
+        
+        # Objects returned by the services outlive their session, so keep
+        # their loaded state after commit instead of expiring it
         self._session_factory = sessionmaker(
             bind=self._engine,
             autocommit=False,
-            autoflush=False
+            autoflush=False,
+            expire_on_commit=False
+        )
+        
+        # Result cache, invalidated by table versions bumped on commit
+        self.query_cache = QueryCache(
+            max_entries=config.QUERY_CACHE_MAX_ENTRIES,
+            max_rows=config.QUERY_CACHE_MAX_ROWS
         )
+        self._table_pattern = None
+        self._cascade_targets = None
+        self._derived_targets = None
+        event.listen(self._session_factory, "do_orm_execute", self._on_orm_execute)
+        event.listen(self._session_factory, "after_flush", self._on_after_flush)
+        event.listen(self._session_factory, "after_commit", self._on_after_commit)
+        event.listen(self._session_factory, "after_rollback", self._on_after_rollback)
     
-    def create_tables(self):
-        """Create all database tables"""
+    def create_tables(self, force: bool = False):
+        """
+        Create all database tables and upgrade existing ones
+        Skipped when the stored schema fingerprint matches the models,
+        so a normal start costs a single SELECT
+        """
         from .models import Base
+        from . import migrations
+        
+        fingerprint = migrations.schema_fingerprint(Base.metadata, self._engine.dialect)
+        if not force and migrations.stored_fingerprint(self._engine) == fingerprint:
+            return
+        
         Base.metadata.create_all(self._engine)
+        migrations.run_migrations(self._engine)
+        migrations.store_fingerprint(self._engine, fingerprint)
         print("✓ Database tables created successfully")
     
+    def verify_schema(self) -> bool:
+        """
+        Check that no table, index or trigger was dropped behind the
+        fingerprint's back and repair the schema if one was
+        Not needed for startup; run it once the UI is up
+        """
+        from .models import Base
+        from .migrations import missing_schema_objects
+        
+        missing = missing_schema_objects(self._engine, Base.metadata)
+        if not missing:
+            return True
+        
+        print(f"⚠ Missing schema objects: {', '.join(missing)}")
+        self.create_tables(force=True)
+        self.query_cache.clear()
+        return False
+    
     def get_session(self) -> Session:
         """Get a new database session"""
         return self._session_factory()
@@ -69,6 +145,123 @@ class DatabaseManager:
         finally:
             session.close()
     
+    # ===== Query Result Cache =====
+    
+    def invalidate_tables(self, *tables: str):
+        """Invalidate cached results for tables written outside the ORM session"""
+        self.query_cache.bump(self._affected_tables(tables, deleting=True))
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Hit-rate and size metrics of the query result cache"""
+        return self.query_cache.stats()
+    
+    def get_table_versions(self, tables: Iterable[str]) -> Dict[str, int]:
+        """Current cache versions of the given tables (changes on every committed write)"""
+        return self.query_cache.table_versions(tables)
+    
+    def _on_orm_execute(self, state: ORMExecuteState):
+        """Serve cached SELECTs and record which tables DML statements touch"""
+        if state.is_insert or state.is_update or state.is_delete:
+            result = state.invoke_statement()
+            # RETURNING results carry no rowcount; treat them as writes
+            if getattr(result, 'rowcount', -1) != 0:
+                tables = self._affected_tables(
+                    [state.statement.table.name], deleting=state.is_delete
+                )
+                state.session.info.setdefault('written_tables', set()).update(tables)
+            return result
+        
+        if not (state.is_select and _query_cache_enabled.get()):
+            return None
+        if state.is_column_load or state.is_relationship_load:
+            return None
+        
+        compiled = state.statement.compile(dialect=self._engine.dialect)
+        sql = str(compiled)
+        key = (sql, _freeze(compiled.params), _freeze(state.parameters))
+        
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            # Copies of the cached objects in the caller's session, so no two
+            # sessions (or threads) ever share an instance
+            return merge_frozen_result(state.session, state.statement, cached, load=False)()
+        
+        # Snapshot versions before running so a concurrent commit makes the entry stale
+        versions = self.query_cache.table_versions(self._tables_in(sql))
+        frozen = state.invoke_statement().freeze()
+        self.query_cache.put(key, self._detached(state.statement, frozen), versions, rows=len(frozen.data))
+        return frozen()
+    
+    @staticmethod
+    def _detached(statement, frozen):
+        """
+        frozen with its ORM objects copied out of the querying session, so
+        changes the caller makes to the objects it got never reach the cache
+        """
+        scratch = Session()
+        try:
+            return merge_frozen_result(scratch, statement, frozen, load=False)
+        finally:
+            scratch.close()
+    
+    def _on_after_flush(self, session, flush_context):
+        """Record tables changed by objects flushed from the unit of work"""
+        written = session.info.setdefault('written_tables', set())
+        written.update(self._affected_tables(
+            obj.__table__.name for obj in list(session.new) + list(session.dirty)
+        ))
+        written.update(self._affected_tables(
+            (obj.__table__.name for obj in session.deleted), deleting=True
+        ))
+    
+    def _on_after_commit(self, session):
+        """Bump versions of every table written in the committed transaction"""
+        written = session.info.pop('written_tables', None)
+        if written:
+            self.query_cache.bump(written)
+    
+    def _on_after_rollback(self, session):
+        """Rolled-back writes never became visible"""
+        session.info.pop('written_tables', None)
+    
+    def _tables_in(self, sql: str) -> Set[str]:
+        """Names of mapped tables referenced by a compiled statement"""
+        if self._table_pattern is None:
+            from .models import Base
+            names = sorted(Base.metadata.tables, key=len, reverse=True)
+            self._table_pattern = re.compile(r'\b(' + '|'.join(names) + r')\b')
+        return set(self._table_pattern.findall(sql))
+    
+    def _affected_tables(self, tables: Iterable[str], deleting: bool = False) -> Set[str]:
+        """
+        Expand written tables with the tables they change indirectly:
+        trigger-maintained tables always, ON DELETE CASCADE children on deletes
+        """
+        if self._cascade_targets is None:
+            from .models import Base
+            from . import patient_summary
+            targets = {}
+            for table in Base.metadata.tables.values():
+                for fk in table.foreign_keys:
+                    if (fk.ondelete or "").upper() == "CASCADE":
+                        targets.setdefault(fk.column.table.name, set()).add(table.name)
+            self._cascade_targets = targets
+            self._derived_targets = {
+                source: {patient_summary.SUMMARY_TABLE}
+                for source in patient_summary.SOURCE_TABLES
+            }
+        
+        result = set()
+        pending = list(tables)
+        while pending:
+            table = pending.pop()
+            if table not in result:
+                result.add(table)
+                pending.extend(self._derived_targets.get(table, ()))
+                if deleting:
+                    pending.extend(self._cascade_targets.get(table, ()))
+        return result
+    
     def close(self):
         """Close database engine"""
         if self._engine:
@@ -100,6 +293,61 @@ def initialize_database():
     _db_manager.create_tables()
 
 
+def verify_database() -> bool:
+    """Full schema check, repairing drift; deferred until after startup"""
+    return _db_manager.verify_schema()
+
+
 def get_db_manager() -> DatabaseManager:
     """Get the global database manager instance"""
     return _db_manager
+
+
+def cached_query(func):
+    """
+    Opt a read-only service method into the query result cache
+    Usage:
+        @cached_query
+        def get_all_test_types(self): ...
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _query_cache_enabled.set(True)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _query_cache_enabled.reset(token)
+    return wrapper
+
+
+@contextmanager
+def cancellable(cancel_event: threading.Event):
+    """
+    Abort queries run inside the block once cancel_event is set
+    The running statement fails with sqlalchemy.exc.OperationalError (interrupted)
+    Usage:
+        with cancellable(event):
+            rows = service.search_patients(keyword)
+    """
+    token = _cancel_event.set(cancel_event)
+    try:
+        yield
+    finally:
+        _cancel_event.reset(token)
+
+
+def _check_cancelled() -> int:
+    """SQLite progress handler; a non-zero return interrupts the statement"""
+    cancel_event = _cancel_event.get()
+    return 1 if cancel_event is not None and cancel_event.is_set() else 0
+
+
+def _freeze(params) -> tuple:
+    """Hashable form of a statement parameter dict"""
+    if not params:
+        return ()
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(p) for p in params)
+    return tuple(sorted(
+        (k, tuple(v) if isinstance(v, list) else v) for k, v in params.items()
+    ))
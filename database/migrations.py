@@ -0,0 +1,202 @@
+"""
+Schema Migrations
+In-place upgrades for databases created by older versions of the app
+"""
+import hashlib
+from typing import List, Optional
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.schema import CreateColumn, CreateTable, CreateIndex
+
+# Bump when run_migrations() gains a step that the model DDL does not capture
+MIGRATION_VERSION = 1
+
+SCHEMA_META_TABLE = "schema_meta"
+
+
+def schema_fingerprint(metadata, dialect) -> str:
+    """Hash of the model DDL, the summary triggers and MIGRATION_VERSION"""
+    from . import patient_summary
+
+    digest = hashlib.sha256(f"migration:{MIGRATION_VERSION}".encode())
+    for table in metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    for ddl in patient_summary.trigger_ddl():
+        digest.update(ddl.encode())
+    return digest.hexdigest()
+
+
+def stored_fingerprint(engine) -> Optional[str]:
+    """Fingerprint recorded by the last full schema setup, if any"""
+    try:
+        with engine.connect() as conn:
+            return conn.exec_driver_sql(
+                f"SELECT value FROM {SCHEMA_META_TABLE} WHERE key = 'fingerprint'"
+            ).scalar()
+    except OperationalError:
+        # No schema_meta table yet: new or pre-fingerprint database
+        return None
+
+
+def store_fingerprint(engine, fingerprint: str):
+    """Record the fingerprint after create_all() and migrations succeeded"""
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_META_TABLE} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        conn.exec_driver_sql(
+            f"INSERT OR REPLACE INTO {SCHEMA_META_TABLE} (key, value) VALUES ('fingerprint', ?)",
+            (fingerprint,)
+        )
+
+
+def missing_schema_objects(engine, metadata) -> List[str]:
+    """Tables, indexes and triggers of the current schema absent from the database"""
+    from . import patient_summary
+
+    expected = set(metadata.tables)
+    expected.update(index.name for table in metadata.tables.values() for index in table.indexes)
+    expected.update(patient_summary.TRIGGERS)
+
+    with engine.connect() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master")}
+    return sorted(expected - existing)
+
+
+def run_migrations(engine):
+    """Bring an existing database in line with the current models"""
+    from .models import Base
+    from . import patient_summary
+
+    rebuild_foreign_keys(engine, Base.metadata)
+    # Indexes may cover the added columns, so columns come first
+    add_missing_columns(engine, Base.metadata)
+    create_missing_indexes(engine, Base.metadata)
+    # Rebuilt tables lose their triggers, so this must come after rebuild_foreign_keys
+    patient_summary.install(engine)
+
+
+def _outdated_tables(engine, metadata) -> list:
+    """Tables whose foreign keys differ from the models (e.g. missing ON DELETE CASCADE)"""
+    existing = set(inspect(engine).get_table_names())
+    outdated = []
+
+    with engine.connect() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing:
+                continue
+
+            actual = {
+                (row['from'], row['on_delete'].upper())
+                for row in conn.exec_driver_sql(
+                    f'PRAGMA foreign_key_list("{table.name}")'
+                ).mappings()
+            }
+            expected = {
+                (fk.parent.name, (fk.ondelete or "NO ACTION").upper())
+                for fk in table.foreign_keys
+            }
+            if actual != expected:
+                outdated.append(table)
+
+    return outdated
+
+
+def rebuild_foreign_keys(engine, metadata):
+    """
+    Recreate tables whose foreign key clauses are out of date
+    SQLite cannot ALTER a constraint, so each table is copied into a fresh
+    definition inside a single transaction with foreign keys switched off
+    """
+    tables = _outdated_tables(engine, metadata)
+    if not tables:
+        return
+
+    dialect = engine.dialect
+    raw = engine.raw_connection()
+    dbapi_connection = raw.driver_connection
+    isolation_level = dbapi_connection.isolation_level
+
+    # Manage the transaction by hand so the DDL is part of it as well
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA foreign_keys=OFF")
+        cursor.execute("BEGIN")
+        try:
+            for table in tables:
+                _rebuild_table(cursor, table, dialect)
+
+            violations = cursor.execute("PRAGMA foreign_key_check").fetchall()
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+
+        if violations:
+            print(f"⚠ {len(violations)} rows reference missing parents (PRAGMA foreign_key_check)")
+        print(f"✓ Rebuilt foreign keys: {', '.join(t.name for t in tables)}")
+    finally:
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+        dbapi_connection.isolation_level = isolation_level
+        raw.close()
+
+
+def _rebuild_table(cursor, table, dialect):
+    """Copy one table into its current model definition"""
+    temp_name = f"_new_{table.name}"
+
+    ddl = str(CreateTable(table).compile(dialect=dialect))
+    ddl = ddl.replace(f"CREATE TABLE {table.name} (", f"CREATE TABLE {temp_name} (", 1)
+    cursor.execute(ddl)
+
+    existing_columns = {row[1] for row in cursor.execute(f'PRAGMA table_info("{table.name}")')}
+    columns = ", ".join(c.name for c in table.columns if c.name in existing_columns)
+    cursor.execute(
+        f"INSERT INTO {temp_name} ({columns}) SELECT {columns} FROM {table.name}"
+    )
+
+    cursor.execute(f"DROP TABLE {table.name}")
+    cursor.execute(f"ALTER TABLE {temp_name} RENAME TO {table.name}")
+
+    for index in table.indexes:
+        cursor.execute(str(CreateIndex(index).compile(dialect=dialect)))
+
+
+def add_missing_columns(engine, metadata):
+    """
+    create_all() skips tables that already exist; add their new columns here
+    Only nullable columns without constraints can be added with ALTER TABLE,
+    which is how new model columns must be declared (unique -> an Index)
+    """
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {ddl}')
+                added.append(f"{table.name}.{column.name}")
+
+    if added:
+        print(f"✓ Added columns: {', '.join(added)}")
+
+
+def create_missing_indexes(engine, metadata):
+    """create_all() skips indexes of tables that already exist; add them here"""
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
@@ -28,8 +28,18 @@ class Patient(Base):
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     
     # Relationships
-    visits = relationship("Visit", back_populates="patient", cascade="all, delete-orphan")
-    appointments = relationship("Appointment", back_populates="patient", cascade="all, delete-orphan")
+    visits = relationship("Visit", back_populates="patient", cascade="all, delete-orphan",
+                          passive_deletes=True)
+    appointments = relationship("Appointment", back_populates="patient", cascade="all, delete-orphan",
+                                passive_deletes=True)
+    summary = relationship("PatientSummary", back_populates="patient", uselist=False,
+                           viewonly=True)
+    
+    # NOCASE indexes let SQLite answer case-insensitive `LIKE 'prefix%'` with a range scan
+    __table_args__ = (
+        Index('ix_patients_full_name_nocase', full_name.collate('NOCASE')),
+        Index('ix_patients_patient_code_nocase', patient_code.collate('NOCASE')),
+    )
     
     def __repr__(self):
         return f"<Patient(code={self.patient_code}, name={self.full_name})>"
@@ -40,19 +50,28 @@ class Visit(Base):
     __tablename__ = 'visits'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    patient_id = Column(Integer, ForeignKey('patients.id'), nullable=False)
+    patient_id = Column(Integer, ForeignKey('patients.id', ondelete='CASCADE'), nullable=False, index=True)
     visit_date = Column(Date, nullable=False, index=True)
     symptoms = Column(Text, nullable=True)
     diagnosis = Column(Text, nullable=True)
     conclusion = Column(Text, nullable=True)
     notes = Column(Text, nullable=True)
+    source_ref = Column(String(40), nullable=True)  # file row an import created this from
     created_at = Column(DateTime, default=datetime.now)
     
     # Relationships
     patient = relationship("Patient", back_populates="visits")
-    test_results = relationship("TestResult", back_populates="visit", cascade="all, delete-orphan")
-    prescriptions = relationship("Prescription", back_populates="visit", cascade="all, delete-orphan")
-    appointment = relationship("Appointment", back_populates="visit", uselist=False, cascade="all, delete-orphan")
+    test_results = relationship("TestResult", back_populates="visit", cascade="all, delete-orphan",
+                                passive_deletes=True)
+    prescriptions = relationship("Prescription", back_populates="visit", cascade="all, delete-orphan",
+                                 passive_deletes=True)
+    appointment = relationship("Appointment", back_populates="visit", uselist=False, cascade="all, delete-orphan",
+                               passive_deletes=True)
+    
+    # Replaying an import skips rows it already created
+    __table_args__ = (
+        Index('ux_visits_source_ref', 'source_ref', unique=True),
+    )
     
     def __repr__(self):
         return f"<Visit(id={self.id}, patient_id={self.patient_id}, date={self.visit_date})>"
@@ -82,13 +101,14 @@ class TestResult(Base):
     __tablename__ = 'test_results'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    visit_id = Column(Integer, ForeignKey('visits.id'), nullable=False)
+    visit_id = Column(Integer, ForeignKey('visits.id', ondelete='CASCADE'), nullable=False)
     test_type_id = Column(Integer, ForeignKey('test_types.id'), nullable=False)
     result_value = Column(Float, nullable=True)
     result_text = Column(Text, nullable=True)
     unit = Column(String(50), nullable=True)
     test_date = Column(Date, nullable=False, index=True)
     notes = Column(Text, nullable=True)
+    source_ref = Column(String(40), nullable=True)  # file row an import created this from
     
     # Relationships
     visit = relationship("Visit", back_populates="test_results")
@@ -97,6 +117,7 @@ class TestResult(Base):
     # Composite index for efficient queries
     __table_args__ = (
         Index('idx_visit_test', 'visit_id', 'test_type_id'),
+        Index('ux_test_results_source_ref', 'source_ref', unique=True),
     )
     
     def __repr__(self):
@@ -126,7 +147,7 @@ class Prescription(Base):
     __tablename__ = 'prescriptions'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    visit_id = Column(Integer, ForeignKey('visits.id'), nullable=False)
+    visit_id = Column(Integer, ForeignKey('visits.id', ondelete='CASCADE'), nullable=False)
     medicine_id = Column(Integer, ForeignKey('medicines.id'), nullable=False)
     dosage = Column(String(100), nullable=True)
     frequency = Column(String(100), nullable=True)
@@ -151,8 +172,8 @@ class Appointment(Base):
     __tablename__ = 'appointments'
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    visit_id = Column(Integer, ForeignKey('visits.id'), unique=True, nullable=True)
-    patient_id = Column(Integer, ForeignKey('patients.id'), nullable=False, index=True)
+    visit_id = Column(Integer, ForeignKey('visits.id', ondelete='CASCADE'), unique=True, nullable=True)
+    patient_id = Column(Integer, ForeignKey('patients.id', ondelete='CASCADE'), nullable=False, index=True)
     appointment_date = Column(Date, nullable=False, index=True)
     reason = Column(Text, nullable=True)
     status = Column(String(50), default="PENDING")  # PENDING, COMPLETED, OVERDUE, CANCELLED
@@ -165,3 +186,55 @@ class Appointment(Base):
     
     def __repr__(self):
         return f"<Appointment(patient_id={self.patient_id}, date={self.appointment_date}, status={self.status})>"
+
+
+class PatientSummary(Base):
+    """
+    PatientSummary (Tổng hợp bệnh nhân) table
+    One row per patient, kept current by triggers (see database/patient_summary.py)
+    """
+    __tablename__ = 'patient_summary'
+    
+    patient_id = Column(Integer, ForeignKey('patients.id', ondelete='CASCADE'), primary_key=True)
+    visit_count = Column(Integer, nullable=False, default=0)
+    last_visit_date = Column(Date, nullable=True)
+    next_appointment_date = Column(Date, nullable=True)  # earliest PENDING appointment
+    latest_abnormal_result_id = Column(Integer, nullable=True, index=True)
+    latest_abnormal_test_name = Column(String(200), nullable=True)
+    latest_abnormal_value = Column(Float, nullable=True)
+    latest_abnormal_date = Column(Date, nullable=True)
+    
+    # Relationships
+    patient = relationship("Patient", back_populates="summary")
+    
+    def __repr__(self):
+        return f"<PatientSummary(patient_id={self.patient_id}, visits={self.visit_count})>"
+
+
+class ImportJournal(Base):
+    """
+    ImportJournal (Nhật ký nhập dữ liệu) table
+    One row per import run. The checkpoint columns are updated in the same
+    transaction as each chunk, so an interrupted import can be resumed from
+    the chunk after last_chunk (see ImportService.resume)
+    """
+    __tablename__ = 'import_journal'
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String(50), nullable=False)  # key of import_service.IMPORT_METHODS
+    file_path = Column(Text, nullable=False)
+    file_fingerprint = Column(String(64), nullable=False)  # sha256 of the file's content
+    column_mapping = Column(Text, nullable=False)  # JSON
+    options = Column(Text, nullable=False, default='{}')  # JSON keyword arguments of the import
+    chunk_size = Column(Integer, nullable=False)
+    last_chunk = Column(Integer, nullable=False, default=-1)  # -1 = no chunk committed yet
+    row_offset = Column(Integer, nullable=False, default=0)  # data rows read up to last_chunk
+    imported = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default='running')  # running, done, failed, cancelled
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f"<ImportJournal(id={self.id}, kind={self.kind}, status={self.status}, rows={self.row_offset})>"
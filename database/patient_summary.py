@@ -0,0 +1,204 @@
+"""
+Patient Summary
+Triggers that keep the patient_summary table in step with visits,
+appointments and test results, plus a full rebuild for existing databases
+
+Rebuild from the command line:
+    python -m database.patient_summary
+"""
+from typing import List
+
+SUMMARY_TABLE = "patient_summary"
+
+# Tables whose writes change patient_summary through the triggers below
+SOURCE_TABLES = ("patients", "visits", "appointments", "test_results", "test_types")
+
+# ----- Per-patient recompute fragments (correlated on patient_summary.patient_id) -----
+
+_VISIT_AGGREGATES = """
+    visit_count = (SELECT COUNT(*) FROM visits v
+                   WHERE v.patient_id = patient_summary.patient_id),
+    last_visit_date = (SELECT MAX(v.visit_date) FROM visits v
+                       WHERE v.patient_id = patient_summary.patient_id)
+"""
+
+_NEXT_APPOINTMENT = """
+    next_appointment_date = (SELECT MIN(a.appointment_date) FROM appointments a
+                             WHERE a.patient_id = patient_summary.patient_id
+                               AND a.status = 'PENDING')
+"""
+
+_LATEST_ABNORMAL = """
+    (latest_abnormal_result_id, latest_abnormal_test_name,
+     latest_abnormal_value, latest_abnormal_date) = (
+        SELECT r.id, t.name, r.result_value, r.test_date
+        FROM visits v
+        JOIN test_results r ON r.visit_id = v.id
+        JOIN test_types t ON t.id = r.test_type_id
+        WHERE v.patient_id = patient_summary.patient_id
+          AND (r.result_value < t.normal_range_min OR r.result_value > t.normal_range_max)
+        ORDER BY r.test_date DESC, r.id DESC
+        LIMIT 1
+    )
+"""
+
+TRIGGERS = {
+    "trg_patient_summary_patient_insert": """
+        AFTER INSERT ON patients
+        BEGIN
+            INSERT OR IGNORE INTO patient_summary (patient_id, visit_count) VALUES (NEW.id, 0);
+        END
+    """,
+
+    # Inserts are the hot path (imports), so they update incrementally
+    "trg_patient_summary_visit_insert": """
+        AFTER INSERT ON visits
+        BEGIN
+            UPDATE patient_summary SET
+                visit_count = visit_count + 1,
+                last_visit_date = MAX(COALESCE(last_visit_date, NEW.visit_date), NEW.visit_date)
+            WHERE patient_id = NEW.patient_id;
+        END
+    """,
+    "trg_patient_summary_visit_update": f"""
+        AFTER UPDATE OF patient_id, visit_date ON visits
+        BEGIN
+            UPDATE patient_summary SET {_VISIT_AGGREGATES}, {_LATEST_ABNORMAL}
+            WHERE patient_id IN (OLD.patient_id, NEW.patient_id);
+        END
+    """,
+    "trg_patient_summary_visit_delete": f"""
+        AFTER DELETE ON visits
+        BEGIN
+            UPDATE patient_summary SET {_VISIT_AGGREGATES}
+            WHERE patient_id = OLD.patient_id;
+        END
+    """,
+
+    "trg_patient_summary_appointment_insert": f"""
+        AFTER INSERT ON appointments
+        BEGIN
+            UPDATE patient_summary SET {_NEXT_APPOINTMENT}
+            WHERE patient_id = NEW.patient_id;
+        END
+    """,
+    "trg_patient_summary_appointment_update": f"""
+        AFTER UPDATE OF patient_id, appointment_date, status ON appointments
+        BEGIN
+            UPDATE patient_summary SET {_NEXT_APPOINTMENT}
+            WHERE patient_id IN (OLD.patient_id, NEW.patient_id);
+        END
+    """,
+    "trg_patient_summary_appointment_delete": f"""
+        AFTER DELETE ON appointments
+        BEGIN
+            UPDATE patient_summary SET {_NEXT_APPOINTMENT}
+            WHERE patient_id = OLD.patient_id;
+        END
+    """,
+
+    "trg_patient_summary_result_insert": """
+        AFTER INSERT ON test_results
+        WHEN NEW.result_value IS NOT NULL
+        BEGIN
+            UPDATE patient_summary SET
+                (latest_abnormal_result_id, latest_abnormal_test_name,
+                 latest_abnormal_value, latest_abnormal_date) = (
+                    SELECT NEW.id, t.name, NEW.result_value, NEW.test_date
+                    FROM test_types t WHERE t.id = NEW.test_type_id
+                )
+            WHERE patient_id = (SELECT patient_id FROM visits WHERE id = NEW.visit_id)
+              AND (latest_abnormal_date IS NULL OR NEW.test_date >= latest_abnormal_date)
+              AND EXISTS (
+                  SELECT 1 FROM test_types t
+                  WHERE t.id = NEW.test_type_id
+                    AND (NEW.result_value < t.normal_range_min
+                         OR NEW.result_value > t.normal_range_max)
+              );
+        END
+    """,
+    "trg_patient_summary_result_update": f"""
+        AFTER UPDATE OF visit_id, test_type_id, result_value, test_date ON test_results
+        BEGIN
+            UPDATE patient_summary SET {_LATEST_ABNORMAL}
+            WHERE patient_id IN (
+                SELECT patient_id FROM visits WHERE id IN (OLD.visit_id, NEW.visit_id)
+            );
+        END
+    """,
+    # Only deleting the result currently shown needs a recompute
+    "trg_patient_summary_result_delete": f"""
+        AFTER DELETE ON test_results
+        WHEN EXISTS (SELECT 1 FROM patient_summary WHERE latest_abnormal_result_id = OLD.id)
+        BEGIN
+            UPDATE patient_summary SET {_LATEST_ABNORMAL}
+            WHERE latest_abnormal_result_id = OLD.id;
+        END
+    """,
+
+    "trg_patient_summary_test_type_update": f"""
+        AFTER UPDATE OF name, normal_range_min, normal_range_max ON test_types
+        BEGIN
+            UPDATE patient_summary SET {_LATEST_ABNORMAL}
+            WHERE patient_id IN (
+                SELECT v.patient_id FROM test_results r
+                JOIN visits v ON v.id = r.visit_id
+                WHERE r.test_type_id = NEW.id
+            );
+        END
+    """,
+}
+
+
+def trigger_ddl() -> List[str]:
+    """CREATE TRIGGER statements for every summary trigger"""
+    return [f"CREATE TRIGGER {name} {body.strip()}" for name, body in TRIGGERS.items()]
+
+
+def install(engine):
+    """
+    Create the summary triggers if any are missing, then rebuild the table
+    Called from run_migrations(); safe to run on every start
+    """
+    with engine.begin() as conn:
+        existing = {
+            row[0] for row in conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+        }
+        if set(TRIGGERS) <= existing:
+            return
+
+        for name in TRIGGERS:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+        for ddl in trigger_ddl():
+            conn.exec_driver_sql(ddl)
+        _rebuild(conn)
+
+    print("✓ Patient summary triggers installed")
+
+
+def rebuild(engine):
+    """Recompute every patient_summary row from the source tables"""
+    with engine.begin() as conn:
+        _rebuild(conn)
+
+
+def _rebuild(conn):
+    conn.exec_driver_sql("DELETE FROM patient_summary")
+    conn.exec_driver_sql(
+        "INSERT INTO patient_summary (patient_id, visit_count) SELECT id, 0 FROM patients"
+    )
+    conn.exec_driver_sql(
+        f"UPDATE patient_summary SET {_VISIT_AGGREGATES}, {_NEXT_APPOINTMENT}, {_LATEST_ABNORMAL}"
+    )
+
+
+if __name__ == "__main__":
+    from .db_manager import get_db_manager, initialize_database
+
+    initialize_database()
+    db_manager = get_db_manager()
+    rebuild(db_manager._engine)
+    db_manager.invalidate_tables(SUMMARY_TABLE)
+    print("✓ Patient summary rebuilt")
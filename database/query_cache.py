@@ -0,0 +1,107 @@
+"""
+Query Result Cache
+Read-through cache for SELECT results, invalidated by per-table versions
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+
+class QueryCache:
+    """
+    LRU cache of frozen query results
+
+    Every entry remembers the version of each table it read. Committing a
+    write to a table bumps that table's version, so entries that read it are
+    treated as stale on their next lookup. Memory is bounded by the number of
+    entries and by the total number of cached rows.
+    """
+
+    def __init__(self, max_entries: int = 256, max_rows: int = 50000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+
+        self._entries: "OrderedDict[Any, Tuple[Any, Dict[str, int], int]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._rows = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def table_versions(self, tables: Iterable[str]) -> Dict[str, int]:
+        """Snapshot current versions of the given tables"""
+        with self._lock:
+            return {table: self._versions.get(table, 0) for table in tables}
+
+    def get(self, key) -> Optional[Any]:
+        """Return the cached result for key, or None on a miss or stale entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            result, versions, _ = entry
+            if any(self._versions.get(t, 0) != v for t, v in versions.items()):
+                self._remove(key)
+                self.invalidations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result, versions: Dict[str, int], rows: int):
+        """Store a result read at the given table versions"""
+        if rows > self.max_rows:
+            return
+
+        with self._lock:
+            # A commit landed while the query ran; the result may already be stale
+            if any(self._versions.get(t, 0) != v for t, v in versions.items()):
+                return
+
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (result, versions, rows)
+            self._rows += rows
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._rows > self.max_rows
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def bump(self, tables: Iterable[str]):
+        """Mark tables as changed; entries that read them become stale"""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'rows': self._rows,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+    def _remove(self, key):
+        _, _, rows = self._entries.pop(key)
+        self._rows -= rows
@@ -1,5 +1,6 @@
 -- Hospital Management System Database Schema
 -- SQLite DDL for reference
+-- ON DELETE CASCADE only fires with PRAGMA foreign_keys=ON (set on every connection)
 
 -- Patient table
 CREATE TABLE IF NOT EXISTS patients (
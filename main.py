@@ -2,7 +2,7 @@
 Main Application Entry Point
 """
 import customtkinter as ctk
-from database.db_manager import initialize_database
+from database.db_manager import initialize_database, verify_database
 from ui.main_window import MainWindow
 import config
 
@@ -19,10 +19,6 @@ class App(ctk.CTk):
         # Set icon (optional)
         # self.iconbitmap("assets/icon.ico")
         
-        # Initialize database
-        print("Initializing database...")
-        initialize_database()
-        
         # Theme settings
         ctk.set_appearance_mode(config.THEME_MODE)
         ctk.set_default_color_theme(config.COLOR_THEME)
@@ -30,6 +26,20 @@ class App(ctk.CTk):
         # Main Window Component
         self.main_window = MainWindow(self)
         self.main_window.pack(fill="both", expand=True)
+        
+        # Show the window first; the database is initialized once it is on screen
+        self.after(config.STARTUP_DEFER_MS, self.finish_startup)
+    
+    def finish_startup(self):
+        """Non-critical startup work, run after the window is displayed"""
+        print("Initializing database...")
+        initialize_database()
+        
+        self.main_window.set_navigation_enabled(True)
+        self.main_window.show_dashboard()
+        
+        # Full schema check is not needed to start; run it when the app is idle
+        self.after(config.SCHEMA_VERIFY_DELAY_MS, verify_database)
 
     def run(self):
         """Run the application"""
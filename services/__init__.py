@@ -1,16 +1,24 @@
 """Services package initialization"""
-from .patient_service import PatientService
-from .visit_service import VisitService
-from .test_service import TestService
-from .medicine_service import MedicineService
-from .appointment_service import AppointmentService
-from .import_service import ImportService
+import importlib
 
-__all__ = [
-    'PatientService',
-    'VisitService',
-    'TestService',
-    'MedicineService',
-    'AppointmentService',
-    'ImportService'
-]
+# Services are imported on first access; ImportService pulls in pandas
+_SERVICES = {
+    'PatientService': '.patient_service',
+    'VisitService': '.visit_service',
+    'TestService': '.test_service',
+    'MedicineService': '.medicine_service',
+    'AppointmentService': '.appointment_service',
+    'DashboardService': '.dashboard_service',
+    'ImportService': '.import_service',
+    'ImportJobManager': '.import_jobs',
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name in _SERVICES:
+        value = getattr(importlib.import_module(_SERVICES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,9 +5,9 @@ Business logic for appointment scheduling and alerts
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 from sqlalchemy.orm import joinedload
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, insert, update, delete
 from database.models import Appointment, Patient, Visit
-from database.db_manager import get_db_manager
+from database.db_manager import get_db_manager, cached_query
 import config
 
 
@@ -22,51 +22,31 @@ class AppointmentService:
                           notes: str = None) -> Appointment:
         """Create a new appointment"""
         with self.db_manager.session_scope() as session:
-            appointment = Appointment(
-                patient_id=patient_id,
-                visit_id=visit_id,
-                appointment_date=appointment_date,
-                reason=reason,
-                status="PENDING",
-                notes=notes
+            return session.scalar(
+                insert(Appointment)
+                .values(
+                    patient_id=patient_id,
+                    visit_id=visit_id,
+                    appointment_date=appointment_date,
+                    reason=reason,
+                    status="PENDING",
+                    notes=notes
+                )
+                .returning(Appointment)
             )
-            session.add(appointment)
-            session.flush()
-            session.refresh(appointment)
-            return appointment
     
     def get_all_appointments(self) -> List[Appointment]:
         """Get all appointments with patient info"""
         session = self.db_manager.get_session()
         try:
-            today = date.today()
-            appointments = session.query(Appointment)\
-                .options(joinedload(Appointment.patient))\
-                .order_by(Appointment.appointment_date.desc())\
-                .all()
-            
             # Update overdue status before returning
-            for appointment in appointments:
-                if (appointment.status == "PENDING" and 
-                    appointment.appointment_date < today):
-                    appointment.status = "OVERDUE"
-            
+            self._mark_overdue(session)
             session.commit()
             
-            # Force load all attributes before expunge to avoid detached errors
-            for appointment in appointments:
-                # Access all attributes to load them into memory
-                _ = appointment.id
-                _ = appointment.patient_id
-                _ = appointment.appointment_date
-                _ = appointment.reason
-                _ = appointment.status
-                _ = appointment.notes
-                if appointment.patient:
-                    _ = appointment.patient.full_name
-                session.expunge(appointment)
-            
-            return appointments
+            return session.query(Appointment)\
+                .options(joinedload(Appointment.patient))\
+                .order_by(Appointment.appointment_date.desc())\
+                .all()
         finally:
             session.close()
     
@@ -108,12 +88,12 @@ class AppointmentService:
         finally:
             session.close()
     
+    @cached_query
     def get_appointments_by_date_range(self, start_date: date, end_date: date) -> List[Appointment]:
         """Get appointments within a date range"""
         session = self.db_manager.get_session()
         try:
-            today = date.today()
-            appointments = session.query(Appointment)\
+            return session.query(Appointment)\
                 .options(joinedload(Appointment.patient))\
                 .filter(and_(
                     Appointment.appointment_date >= start_date,
@@ -121,76 +101,54 @@ class AppointmentService:
                 ))\
                 .order_by(Appointment.appointment_date)\
                 .all()
-            
-            # Update overdue status before returning
-            for appointment in appointments:
-                if (appointment.status == "PENDING" and 
-                    appointment.appointment_date < today):
-                    appointment.status = "OVERDUE"
-            
-            session.commit()
-            
-            # Force load all attributes before expunge
-            for appointment in appointments:
-                _ = appointment.id
-                _ = appointment.patient_id
-                _ = appointment.appointment_date
-                _ = appointment.reason
-                _ = appointment.status
-                _ = appointment.notes
-                if appointment.patient:
-                    _ = appointment.patient.full_name
-                session.expunge(appointment)
-            
-            return appointments
         finally:
             session.close()
     
+    @cached_query
     def get_overdue_appointments(self) -> List[Appointment]:
         """
-        Get all overdue appointments (past date and PENDING or already OVERDUE)
+        Get all overdue appointments (status OVERDUE, set by refresh_overdue())
         This is used for dashboard alerts
         """
         session = self.db_manager.get_session()
         try:
-            today = date.today()
-            
-            # Get appointments that are overdue (past date and PENDING or OVERDUE status)
-            overdue = session.query(Appointment)\
+            return session.query(Appointment)\
                 .options(joinedload(Appointment.patient))\
                 .filter(and_(
-                    Appointment.appointment_date < today,
-                    or_(
-                        Appointment.status == "PENDING",
-                        Appointment.status == "OVERDUE"
-                    )
+                    Appointment.appointment_date < date.today(),
+                    Appointment.status == "OVERDUE"
                 ))\
                 .order_by(Appointment.appointment_date)\
                 .all()
-            
-            # Auto-update PENDING to OVERDUE
-            for appointment in overdue:
-                if appointment.status == "PENDING":
-                    appointment.status = "OVERDUE"
-            
-            session.commit()
-            
-            # Force load all attributes before expunge
-            for appointment in overdue:
-                _ = appointment.id
-                _ = appointment.patient_id
-                _ = appointment.appointment_date
-                _ = appointment.reason
-                _ = appointment.status
-                _ = appointment.notes
-                if appointment.patient:
-                    _ = appointment.patient.full_name
-                session.expunge(appointment)
-            
-            return overdue
         finally:
             session.close()
     
+    def refresh_overdue(self) -> int:
+        """
+        Flag past PENDING appointments as OVERDUE; call before the cached
+        reads that filter on the status (once per panel or dashboard refresh)
+        Returns number of appointments changed
+        """
+        with self.db_manager.session_scope() as session:
+            return self._mark_overdue(session)
+    
+    def _mark_overdue(self, session) -> int:
+        """
+        Flag past PENDING appointments as OVERDUE in a single UPDATE
+        Returns number of appointments changed
+        """
+        result = session.execute(
+            update(Appointment)
+            .where(and_(
+                Appointment.status == "PENDING",
+                Appointment.appointment_date < date.today()
+            ))
+            .values(status="OVERDUE")
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+    
+    @cached_query
     def get_upcoming_appointments(self, days: int = 7) -> List[Appointment]:
         """Get upcoming appointments within next N days"""
         session = self.db_manager.get_session()
@@ -215,16 +173,16 @@ class AppointmentService:
     
     def update_appointment(self, appointment_id: int, **kwargs) -> Optional[Appointment]:
         """Update appointment"""
+        values = {key: value for key, value in kwargs.items() if key in Appointment.__table__.c}
         with self.db_manager.session_scope() as session:
-            appointment = session.query(Appointment).filter(Appointment.id == appointment_id).first()
-            if appointment:
-                for key, value in kwargs.items():
-                    if hasattr(appointment, key):
-                        setattr(appointment, key, value)
-                session.flush()
-                session.refresh(appointment)
-                return appointment
-            return None
+            if not values:
+                return session.get(Appointment, appointment_id)
+            return session.scalar(
+                update(Appointment)
+                .where(Appointment.id == appointment_id)
+                .values(**values)
+                .returning(Appointment)
+            )
     
     def mark_as_completed(self, appointment_id: int, visit_id: int = None) -> Optional[Appointment]:
         """Mark appointment as completed"""
@@ -240,13 +198,19 @@ class AppointmentService:
     def delete_appointment(self, appointment_id: int) -> bool:
         """Delete an appointment"""
         with self.db_manager.session_scope() as session:
-            appointment = session.query(Appointment).filter(Appointment.id == appointment_id).first()
-            if appointment:
-                session.delete(appointment)
-                return True
-            return False
+            result = session.execute(delete(Appointment).where(Appointment.id == appointment_id))
+            return result.rowcount > 0
     
+    @cached_query
     def get_overdue_count(self) -> int:
-        """Get count of overdue appointments"""
-        overdue = self.get_overdue_appointments()
-        return len(overdue)
+        """Get count of overdue appointments without loading them (see refresh_overdue)"""
+        session = self.db_manager.get_session()
+        try:
+            return session.query(Appointment)\
+                .filter(and_(
+                    Appointment.appointment_date < date.today(),
+                    Appointment.status == "OVERDUE"
+                ))\
+                .count()
+        finally:
+            session.close()
@@ -0,0 +1,97 @@
+"""
+Arrow Reader
+Reads .parquet and .feather (Arrow IPC) import files with pyarrow, an
+optional dependency imported on first use (as is pandas)
+
+Files are scanned as record batches re-cut to the import's chunk size, so
+memory stays around one chunk. Each chunk is handed to pandas as
+Arrow-backed columns (pd.ArrowDtype), so the file's types (numbers, dates,
+timestamps) and their buffers are kept as they are: the transforms use
+typed columns without parsing them again, and cells only become Python
+values when the import records are built (import_frames.records).
+"""
+import importlib.util
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Extension -> pyarrow.dataset format
+ARROW_FORMATS = {'.parquet': 'parquet', '.feather': 'feather'}
+
+# Columns pandas writes for a DataFrame's index; they are not data
+_INDEX_COLUMN_PREFIX = "__index_level_"
+
+
+def available() -> bool:
+    """Is pyarrow installed?"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def _pyarrow_dataset():
+    if not available():
+        raise ImportError("Reading .parquet/.feather files needs pyarrow (pip install pyarrow)")
+    import pyarrow.dataset
+
+    return pyarrow.dataset
+
+
+class ArrowFile:
+    """A .parquet or .feather file, read through pyarrow.dataset"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.format = ARROW_FORMATS[Path(file_path).suffix.lower()]
+        self._dataset = _pyarrow_dataset().dataset(file_path, format=self.format)
+        self.columns = [
+            name for name in self._dataset.schema.names if not name.startswith(_INDEX_COLUMN_PREFIX)
+        ]
+
+    @property
+    def num_rows(self) -> int:
+        """Number of rows, from the file's metadata where it has one"""
+        return self._dataset.count_rows()
+
+    def tables(self, chunk_size: int) -> Iterator:
+        """pyarrow Tables of chunk_size rows (the last may be shorter), in file order"""
+        import pyarrow as pa
+
+        pending, rows = [], 0
+        for batch in self._dataset.to_batches(columns=self.columns, batch_size=chunk_size):
+            pending.append(batch)
+            rows += batch.num_rows
+            while rows >= chunk_size:
+                table = pa.Table.from_batches(pending)
+                # Slices share the batches' buffers
+                yield table.slice(0, chunk_size)
+                rest = table.slice(chunk_size)
+                pending, rows = rest.to_batches(), rest.num_rows
+        if rows:
+            yield pa.Table.from_batches(pending)
+
+    def chunks(self, chunk_size: int) -> Iterator:
+        """DataFrames of at most chunk_size rows; the index continues across chunks"""
+        import pandas as pd
+
+        position = 0
+        for table in self.tables(chunk_size):
+            frame = _to_pandas(table)
+            frame.index = pd.RangeIndex(position, position + len(frame))
+            position += len(frame)
+            yield frame
+
+    def dataframe(self, nrows: Optional[int] = None):
+        """The first nrows rows (all when None)"""
+        if nrows is None:
+            table = self._dataset.to_table(columns=self.columns)
+        else:
+            table = self._dataset.head(nrows, columns=self.columns)
+        return _to_pandas(table)
+
+
+def _to_pandas(table):
+    """
+    Table as a DataFrame of Arrow-backed columns: no copy into NumPy or
+    Python objects, and integer columns with nulls stay integers
+    """
+    import pandas as pd
+
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
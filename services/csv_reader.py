@@ -0,0 +1,203 @@
+"""
+CSV Reader
+Streams .csv import files with the csv module and generators, without
+pandas: rows are read one chunk at a time, so memory stays around one chunk
+whatever the file size
+
+Rows match pd.read_csv(dtype=str): the header gets pandas' column names
+(blank names become 'Unnamed: i', repeated names 'name.1'), blank lines
+are left out of the row positions, short rows are padded and pandas'
+missing-value markers ('', 'NA', 'null', ...) read as None.
+
+Every CSV import reads its file with it, so no DataFrame is built and
+pandas is not imported: the SQL engine takes the raw cells (raw_rows) and
+converts them in SQLite, the other imports convert them here (typed_rows),
+with the same rules as the whole-column converters of import_frames.
+"""
+import csv
+import re
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# pandas' default na_values, so both readers agree on which cells are missing
+NA_VALUES = frozenset({
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+})
+
+# Dates imports accept: day first d/m/yyyy (or d-m-yyyy, d.m.yyyy, with a
+# two-digit year too), year first yyyy-m-d (or yyyy/m/d, yyyy.m.d) and
+# yyyymmdd, optionally followed by a time, which is dropped
+DATE_PATTERN = re.compile(
+    r"(?:(?P<y1>[0-9]{4})(?P<s1>[-/.])(?P<m1>[0-9]{1,2})(?P=s1)(?P<d1>[0-9]{1,2})"
+    r"|(?P<d2>[0-9]{1,2})(?P<s2>[-/.])(?P<m2>[0-9]{1,2})(?P=s2)(?P<y2>[0-9]{4}|[0-9]{2})"
+    r"|(?P<y3>[0-9]{4})(?P<m3>[0-9]{2})(?P<d3>[0-9]{2}))"
+    r"(?:[ T].*)?"
+)
+SHORT_YEAR_PIVOT = 69  # two-digit years below it are 20xx, the others 19xx (as strptime's %y)
+MIN_YEAR, MAX_YEAR = 1678, 2261  # years pandas timestamps hold in full
+
+INF = float("inf")
+
+
+class RowChunk:
+    """
+    Consecutive data rows of a CSV file
+    positions count data rows from 0 (blank lines excluded), so
+    position + 2 is the row number reported for a row, as with DataFrame chunks
+    """
+
+    __slots__ = ("columns", "positions", "rows")
+
+    def __init__(self, columns: List[str], positions: List[int], rows: List[tuple]):
+        self.columns = columns
+        self.positions = positions
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+class CsvFile:
+    """A UTF-8 CSV file with a header line"""
+
+    def __init__(self, file_path: str, encoding: str = "utf-8-sig"):
+        self.file_path = file_path
+        self.encoding = encoding
+        with open(file_path, newline="", encoding=encoding) as f:
+            header = next(csv.reader(f), [])
+        self.columns = _column_names(header)
+
+    def rows(self) -> Iterator[Tuple[int, tuple]]:
+        """(position, values) of every data row, values padded to the header's width"""
+        width = len(self.columns)
+        with open(self.file_path, newline="", encoding=self.encoding) as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            position = 0
+            for values in reader:
+                if not values or (len(values) == 1 and not values[0].strip()):
+                    continue  # blank line
+                if len(values) > width:
+                    raise ValueError(
+                        f"Line {reader.line_num}: expected {width} fields, saw {len(values)}"
+                    )
+                yield position, tuple(
+                    None if value in NA_VALUES else value for value in values
+                ) + (None,) * (width - len(values))
+                position += 1
+
+    def chunks(self, chunk_size: int) -> Iterator[RowChunk]:
+        """RowChunks of at most chunk_size rows"""
+        positions, rows = [], []
+        for position, values in self.rows():
+            positions.append(position)
+            rows.append(values)
+            if len(rows) >= chunk_size:
+                yield RowChunk(self.columns, positions, rows)
+                positions, rows = [], []
+        if rows:
+            yield RowChunk(self.columns, positions, rows)
+
+
+def raw_rows(chunk: RowChunk, column_mapping: Dict[str, str],
+             fields: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    The fields of each row as they are in the file (None for missing cells
+    and unmapped fields), in the chunk's row order; the SQL engine converts
+    and validates them
+    """
+    columns = {name: i for i, name in enumerate(chunk.columns)}
+    indexes = [(field, columns.get(column_mapping.get(field))) for field in fields]
+    return [
+        {field: None if i is None else values[i] for field, i in indexes}
+        for values in chunk.rows
+    ]
+
+
+def typed_rows(chunk: RowChunk, column_mapping: Dict[str, str],
+               fields: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    The fields of each row converted like import_frames.typed_columns:
+    fields maps field -> 'text', 'number' or 'date'; missing, blank and
+    unparseable cells, and every cell of an unmapped field, become None
+    """
+    converters = {'text': parse_text, 'number': parse_number, 'date': parse_date}
+    columns = {name: i for i, name in enumerate(chunk.columns)}
+    readers = [
+        (field, columns.get(column_mapping.get(field)), converters[kind])
+        for field, kind in fields.items()
+    ]
+    return [
+        {field: None if i is None else convert(values[i]) for field, i, convert in readers}
+        for values in chunk.rows
+    ]
+
+
+def parse_text(cell: Optional[str]) -> Optional[str]:
+    """Cell without surrounding whitespace; None when blank"""
+    if cell is None:
+        return None
+    return cell.strip() or None
+
+
+def parse_number(cell: Optional[str]) -> Optional[float]:
+    """
+    Cell as a float, as pd.to_numeric reads text (no '_' separators,
+    non-ASCII digits or overflowing exponents); None when blank, NaN or
+    not a number
+    """
+    text = parse_text(cell)
+    if text is None or "_" in text or not text.isascii():
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return None
+    if number != number or (number in (INF, -INF) and "inf" not in text.lower()):
+        return None
+    return number
+
+
+def parse_date(cell: Optional[str]) -> Optional[date]:
+    """
+    Cell as a date (see DATE_PATTERN): month first when the second part of
+    a day-first date cannot be a month; None when blank, not a valid date
+    or outside MIN_YEAR..MAX_YEAR
+    """
+    text = parse_text(cell)
+    match = DATE_PATTERN.fullmatch(text) if text is not None else None
+    if match is None:
+        return None
+    parts = match.groupdict()
+    if parts['d2'] is not None:
+        day, month, year = int(parts['d2']), int(parts['m2']), int(parts['y2'])
+        if len(parts['y2']) == 2:
+            year += 2000 if year < SHORT_YEAR_PIVOT else 1900
+        if month > 12:
+            day, month = month, day
+    else:
+        year = int(parts['y1'] or parts['y3'])
+        month = int(parts['m1'] or parts['m3'])
+        day = int(parts['d1'] or parts['d3'])
+    if not MIN_YEAR <= year <= MAX_YEAR:
+        return None
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _column_names(header: List[str]) -> List[str]:
+    """pandas' names for a header line: 'Unnamed: i' for blanks, 'name.n' for repeats"""
+    names, seen = [], {}
+    for i, name in enumerate(header):
+        name = name or f"Unnamed: {i}"
+        if name in seen:
+            seen[name] += 1
+            while f"{name}.{seen[name]}" in seen:
+                seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        seen.setdefault(name, 0)
+        names.append(name)
+    return names
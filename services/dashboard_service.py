@@ -0,0 +1,68 @@
+"""
+Dashboard Service
+Dashboard figures and the last known copy persisted between runs
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .patient_service import PatientService
+from .visit_service import VisitService
+from .appointment_service import AppointmentService
+import config
+
+
+class DashboardService:
+    """Service class for dashboard statistics"""
+
+    def __init__(self, cache_path: Path = config.DASHBOARD_CACHE_PATH):
+        self.cache_path = Path(cache_path)
+        self.patient_service = PatientService()
+        self.visit_service = VisitService()
+        self.appointment_service = AppointmentService()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Current figures; also flags past PENDING appointments as OVERDUE
+        Safe to call from a worker thread
+        """
+        self.appointment_service.refresh_overdue()
+        return {
+            'patient_count': self.patient_service.get_patient_count(),
+            'visit_count': self.visit_service.get_visit_count(),
+            'overdue_count': self.appointment_service.get_overdue_count()
+        }
+
+    def load_snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        Figures saved by the last refresh, or None when there are none for
+        this database (missing or unreadable file, other DATABASE_URL)
+        """
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(snapshot, dict) or snapshot.get('database') != config.DATABASE_URL:
+            return None
+        if not isinstance(snapshot.get('stats'), dict):
+            return None
+        return snapshot
+
+    def save_snapshot(self, stats: Dict[str, int], refresh_ms: float):
+        """Persist figures for the next start; written atomically"""
+        snapshot = {
+            'database': config.DATABASE_URL,
+            'saved_at': datetime.now().isoformat(timespec="seconds"),
+            'refresh_ms': round(refresh_ms, 1),
+            'stats': stats
+        }
+        temp_path = self.cache_path.with_suffix(".tmp")
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"⚠ Could not save dashboard cache: {e}")
@@ -0,0 +1,67 @@
+"""
+Excel Parser
+Streams .xlsx sheets with openpyxl in read-only mode, so an import holds
+one chunk of rows in memory rather than the whole sheet
+"""
+from typing import Iterator, Optional, Tuple
+import pandas as pd
+
+# A parsed data row is (position, values): position counts data rows from 0,
+# blank rows included, so position + 2 is the row number in the sheet.
+# Blank rows themselves are left out.
+
+
+def iter_rows(file_path: str, sheet_name: str, width: int) -> Iterator[Tuple[int, tuple]]:
+    """Stream the data rows of a sheet, values padded or cut to width columns"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name]
+        # Read to the real end, not the (possibly stale) recorded dimension
+        sheet.reset_dimensions()
+        for row_number, values in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
+            if all(value is None for value in values):
+                continue
+            yield row_number - 2, tuple(values[:width]) + (None,) * (width - len(values))
+    finally:
+        workbook.close()
+
+
+class ExcelSheet:
+    """One sheet of an .xlsx workbook (the active sheet by default)"""
+
+    def __init__(self, file_path: str, sheet_name: Optional[str] = None):
+        from openpyxl import load_workbook
+
+        self.file_path = file_path
+
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet = workbook[sheet_name] if sheet_name else workbook.active
+            header = next(sheet.iter_rows(max_row=1, values_only=True), ())
+            self.sheet_name = sheet.title
+        finally:
+            workbook.close()
+
+        self.columns = [
+            str(name) if name is not None else f"Unnamed: {i}"
+            for i, name in enumerate(header)
+        ]
+
+    def rows(self) -> Iterator[Tuple[int, tuple]]:
+        """All data rows in file order"""
+        if self.columns:
+            yield from iter_rows(self.file_path, self.sheet_name, len(self.columns))
+
+    def chunks(self, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """DataFrames of at most chunk_size rows, indexed by row position"""
+        batch, index = [], []
+        for position, values in self.rows():
+            batch.append(values)
+            index.append(position)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=self.columns, index=index)
+                batch, index = [], []
+        if batch:
+            yield pd.DataFrame(batch, columns=self.columns, index=index)
@@ -0,0 +1,105 @@
+"""
+Import Errors
+Bounded record of the rows an import rejects or skips: counts per
+(kind, code, column) and a capped sample stay in memory, while every row
+is streamed to a CSV report next to the source file
+"""
+import csv
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import config
+
+# Kinds: rejected rows are errors, duplicates left out on purpose are skipped
+ERROR = 'error'
+SKIPPED = 'skipped'
+
+# Codes
+MISSING_REQUIRED = 'missing_required'
+NOT_FOUND = 'not_found'
+WRITE_FAILED = 'write_failed'
+ALREADY_EXISTS = 'already_exists'
+DUPLICATE_ROW = 'duplicate_row'
+
+REPORT_HEADER = ('row', 'kind', 'code', 'column', 'message')
+
+
+def report_path(file_path: str, job_id: int) -> Path:
+    """Where the report of an import is written: next to the source file"""
+    source = Path(file_path)
+    return source.with_name(f"{source.stem}.import-{job_id}-errors.csv")
+
+
+class ImportErrorSink:
+    """
+    Rejected and skipped rows of one import run
+
+    add() counts the row under its (kind, code, column), keeps its message
+    while fewer than sample_size of that kind are kept and appends it to the
+    report, which is opened on the first row (appended to with append=True,
+    as when resuming the import that wrote it). When the folder of the
+    source file is not writable the report goes to config.IMPORT_REPORT_DIR.
+    """
+
+    def __init__(self, report_path: Path, append: bool = False,
+                 sample_size: int = config.IMPORT_ERROR_SAMPLE_SIZE):
+        self.report_path = report_path
+        self.append = append
+        self.sample_size = sample_size
+        self.counts: Dict[str, int] = {ERROR: 0, SKIPPED: 0}
+        self.samples: Dict[str, List[str]] = {ERROR: [], SKIPPED: []}
+        self._groups: Dict[Tuple[str, str, Optional[str]], List[Any]] = {}  # -> [count, first message]
+        self._file = None
+        self._writer = None
+
+    def add(self, kind: str, row_number: int, code: str, message: str, column: str = None):
+        """Record one row; message is the human-readable reason"""
+        self.counts[kind] += 1
+        if len(self.samples[kind]) < self.sample_size:
+            self.samples[kind].append(f"Row {row_number}: {message}")
+
+        group = self._groups.get((kind, code, column))
+        if group is None:
+            self._groups[(kind, code, column)] = [1, message]
+        else:
+            group[0] += 1
+
+        if self._writer is None and self.report_path is not None:
+            self._open()
+        if self._writer is not None:
+            self._writer.writerow((row_number, kind, code, column or '', message))
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One entry per (kind, code, column), most frequent first, with an example message"""
+        return [
+            {'kind': kind, 'code': code, 'column': column, 'count': count, 'example': example}
+            for (kind, code, column), (count, example) in sorted(
+                self._groups.items(), key=lambda item: -item[1][0]
+            )
+        ]
+
+    def close(self) -> Optional[str]:
+        """Flush the report; returns its path, or None when there is no report"""
+        if self._file is None:
+            # A resumed import may have nothing to add to the earlier run's report
+            if self.append and self.report_path is not None and self.report_path.exists():
+                return str(self.report_path)
+            return None
+        self._file.close()
+        self._file = self._writer = None
+        return str(self.report_path)
+
+    def _open(self):
+        for path in (self.report_path, Path(config.IMPORT_REPORT_DIR) / self.report_path.name):
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                header = not (self.append and path.exists())
+                self._file = open(path, "a" if self.append else "w", newline="", encoding="utf-8-sig")
+            except OSError:
+                continue
+            self.report_path = path
+            self._writer = csv.writer(self._file)
+            if header:
+                self._writer.writerow(REPORT_HEADER)
+            return
+        print(f"Cannot write import error report {self.report_path}")
+        self.report_path = None
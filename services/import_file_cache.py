@@ -0,0 +1,157 @@
+"""
+Parsed File Cache
+Keeps import files parsed in memory so one import reads its file only once
+"""
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from services.arrow_reader import ARROW_FORMATS, ArrowFile
+import config
+
+
+class ParsedFile:
+    """
+    One version of an import file, parsed on demand
+    The header, previews and the full DataFrame are each read at most once;
+    previews and the header come from bounded reads, not the full file
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.extension = Path(file_path).suffix.lower()
+        self._columns: Optional[List[str]] = None
+        self._previews: Dict[int, pd.DataFrame] = {}
+        self._frame: Optional[pd.DataFrame] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cells(self) -> int:
+        """Size of what is held in memory, for the cache bound"""
+        if self._frame is None:
+            return sum(p.size for p in self._previews.values())
+        return self._frame.size
+
+    def columns(self) -> List[str]:
+        """Column names from a header-only read"""
+        with self._lock:
+            if self._columns is None:
+                if self._frame is not None:
+                    self._columns = self._frame.columns.tolist()
+                else:
+                    self._columns = self._read(nrows=0).columns.tolist()
+            return self._columns
+
+    def preview(self, rows: int) -> pd.DataFrame:
+        """First rows, read without parsing the rest of the file"""
+        with self._lock:
+            if self._frame is not None:
+                return self._frame.head(rows)
+            preview = self._previews.get(rows)
+            if preview is None:
+                preview = self._previews[rows] = self._read(nrows=rows)
+            return preview
+
+    def dataframe(self) -> pd.DataFrame:
+        """The whole file"""
+        with self._lock:
+            if self._frame is None:
+                self._frame = self._read()
+                self._columns = self._frame.columns.tolist()
+                self._previews.clear()
+            return self._frame
+
+    def _read(self, nrows: Optional[int] = None) -> pd.DataFrame:
+        if self.extension == '.csv':
+            return pd.read_csv(self.file_path, nrows=nrows)
+        if self.extension in ['.xlsx', '.xls']:
+            return pd.read_excel(self.file_path, nrows=nrows)
+        if self.extension in ARROW_FORMATS:
+            return ArrowFile(self.file_path).dataframe(nrows)
+        raise ValueError(f"Unsupported file type: {self.extension}")
+
+
+class ParsedFileCache:
+    """
+    Parsed import files keyed by (path, mtime, size)
+
+    A file changed on disk gets a new key, so a stale parse is never served.
+    Least recently used files are dropped beyond max_entries files or
+    max_cells parsed cells in total (the file in use is always kept).
+    """
+
+    def __init__(self, max_entries: int = config.IMPORT_FILE_CACHE_ENTRIES,
+                 max_cells: int = config.IMPORT_FILE_CACHE_MAX_CELLS):
+        self.max_entries = max_entries
+        self.max_cells = max_cells
+
+        self._files: "OrderedDict[Tuple, ParsedFile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_path: str) -> ParsedFile:
+        """Parsed view of the file's current contents"""
+        key = self.file_key(file_path)
+        with self._lock:
+            parsed = self._files.get(key)
+            if parsed is not None:
+                self._files.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                # Older versions of this path can never be requested again
+                for old_key in [k for k in self._files if k[0] == key[0]]:
+                    del self._files[old_key]
+                parsed = self._files[key] = ParsedFile(file_path)
+            self._evict()
+        return parsed
+
+    def invalidate(self, file_path: str = None):
+        """Forget one file (or everything when file_path is None)"""
+        with self._lock:
+            if file_path is None:
+                self._files.clear()
+                return
+            path = str(Path(file_path).resolve())
+            for key in [k for k in self._files if k[0] == path]:
+                del self._files[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'files': len(self._files),
+                'cells': sum(f.cells for f in self._files.values())
+            }
+
+    @staticmethod
+    def file_key(file_path: str) -> Tuple[str, int, int]:
+        """(resolved path, mtime in ns, size); raises OSError for a missing file"""
+        stat = os.stat(file_path)
+        return (str(Path(file_path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+    def _evict(self):
+        while len(self._files) > 1:
+            cells = sum(f.cells for f in self._files.values())
+            if len(self._files) <= self.max_entries and cells <= self.max_cells:
+                break
+            self._files.popitem(last=False)
+
+
+_file_cache = None
+
+
+def get_parsed_file_cache() -> ParsedFileCache:
+    """Get the shared parsed file cache"""
+    global _file_cache
+    if _file_cache is None:
+        _file_cache = ParsedFileCache()
+    return _file_cache
@@ -0,0 +1,179 @@
+"""
+Import Frames
+The DataFrame side of imports: .xlsx, .xls, .parquet and .feather files
+are read as DataFrame chunks and converted and validated whole-column
+here. CSV imports never come through this module (see csv_reader), so
+pandas is only imported for the other formats.
+
+Columns keep their pandas or Arrow types through the transforms: typed
+columns of a file (numbers, dates) are not parsed again, and cells become
+Python values (None, int, float, str, date) only in records(), when the
+executemany parameters are built.
+"""
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List
+import pandas as pd
+from services.arrow_reader import ARROW_FORMATS, ArrowFile
+from services.csv_reader import DATE_PATTERN, MAX_YEAR, MIN_YEAR, SHORT_YEAR_PIVOT
+from services.excel_parser import ExcelSheet
+
+# DATE_PATTERN for Series.str.extract, which searches instead of matching the whole cell
+_DATE_CELL = f"^(?:{DATE_PATTERN.pattern})$"
+
+
+def chunks(file_path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield a non-CSV file as DataFrames of at most chunk_size rows
+    The index continues across chunks (0 = first data row), so
+    index + 2 is the row number in the file, header included
+    """
+    file_ext = Path(file_path).suffix.lower()
+
+    if file_ext == '.xlsx':
+        # The first sheet, streamed with openpyxl in read-only mode
+        yield from ExcelSheet(file_path).chunks(chunk_size)
+    elif file_ext in ARROW_FORMATS:
+        # Record batches re-cut to chunk_size, typed columns kept (see ArrowFile)
+        yield from ArrowFile(file_path).chunks(chunk_size)
+    elif file_ext == '.xls':
+        # xlrd cannot stream; read the (small, legacy-format) file once
+        df = pd.read_excel(file_path)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+    else:
+        raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def typed_columns(chunk: pd.DataFrame, column_mapping: Dict[str, str],
+                  fields: Dict[str, str]) -> pd.DataFrame:
+    """
+    The fields of a chunk, each converted as a whole column
+    fields maps field -> 'text', 'number' or 'date'. Missing, blank and
+    unparseable cells become missing values, as does every cell of a field
+    that is not mapped to a column of the chunk; the index is the chunk's.
+    Number and date columns keep their dtype (see records for the values);
+    values match csv_reader.typed_rows for the same text.
+    """
+    converters = {'text': _text_column, 'number': _number_column, 'date': _date_column}
+    columns = {}
+    for field, kind in fields.items():
+        column = column_mapping.get(field)
+        if column in chunk.columns:
+            columns[field] = converters[kind](chunk[column])
+        else:
+            columns[field] = _empty_column(chunk.index)
+    return pd.DataFrame(columns, index=chunk.index)
+
+
+def raw_columns(chunk: pd.DataFrame, column_mapping: Dict[str, str],
+                fields: Dict[str, str]) -> pd.DataFrame:
+    """
+    The fields of a chunk as they are in the file, for the staging table:
+    text and numbers as is, dates and Timestamps as ISO text, None for
+    missing cells and unmapped fields
+    """
+    columns = {}
+    for field in fields:
+        column = column_mapping.get(field)
+        if column not in chunk.columns:
+            columns[field] = _empty_column(chunk.index)
+            continue
+        values = chunk[column]
+        if values.dtype.kind == 'M' and values.dtype.type is not date:
+            # Timestamps, NumPy or Arrow; Arrow dates go through _raw_cell
+            values = values.dt.strftime('%Y-%m-%d %H:%M:%S')
+        elif pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+            values = values.map(_raw_cell, na_action='ignore')
+        columns[field] = values
+    return pd.DataFrame(columns, index=chunk.index)
+
+
+def records(frame: pd.DataFrame) -> List[tuple]:
+    """
+    (row_number, record) pairs for the writer; index + 2 is the file row
+    Cells become Python values here, column by column: None for missing
+    cells, dates for datetime columns
+    """
+    columns = [_python_values(frame[name]) for name in frame.columns]
+    rows = [dict(zip(frame.columns, values)) for values in zip(*columns)]
+    return list(zip((frame.index + 2).tolist(), rows))
+
+
+def missing_fields(frame: pd.DataFrame, fields: List[str]) -> pd.Series:
+    """The first of fields each row has no value in; None for complete rows"""
+    missing = _empty_column(frame.index)
+    for field in reversed(fields):
+        missing = missing.mask(frame[field].isna(), field)
+    return missing
+
+
+def source_refs(prefix: str, index: pd.Index) -> pd.Series:
+    """source_ref of each row of a chunk: '<file prefix>:<row number>'"""
+    return pd.Series([f"{prefix}:{idx + 2}" for idx in index], index=index, dtype=object)
+
+
+def fill_dates(dates: pd.Series, default: date) -> pd.Series:
+    """A date column of typed_columns with default for its missing dates"""
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.fillna(pd.Timestamp(default))
+    return dates.fillna(default)
+
+
+def split_result(text: pd.Series):
+    """(result_value, result_text): numbers go to the value, anything else to the text"""
+    numbers = pd.to_numeric(text, errors='coerce')
+    return numbers, text.where(numbers.isna(), None)
+
+
+def _raw_cell(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return value if isinstance(value, (str, int, float)) else str(value)
+
+
+def _text_column(column: pd.Series) -> pd.Series:
+    text = column.astype(str).str.strip()
+    return text.astype(object).where(column.notna() & (text != ""), None)
+
+
+def _number_column(column: pd.Series) -> pd.Series:
+    """Numeric columns as they are; anything else parsed from its text"""
+    if pd.api.types.is_numeric_dtype(column) and not pd.api.types.is_bool_dtype(column):
+        return column
+    return pd.to_numeric(_text_column(column), errors='coerce')
+
+
+def _date_column(column: pd.Series) -> pd.Series:
+    """
+    Cells as dates by csv_reader.parse_date's rules, on their text, which
+    for Excel dates and Timestamps is ISO. Columns that already hold dates
+    or timestamps (NumPy or Arrow) are only cut to the day.
+    """
+    if isinstance(column.dtype, pd.ArrowDtype) and column.dtype.kind == 'M':
+        return column if column.dtype.type is date else column.dt.date
+    if pd.api.types.is_datetime64_any_dtype(column):
+        return column.dt.normalize()
+
+    parts = _text_column(column).str.extract(_DATE_CELL)
+    year = pd.to_numeric(parts['y1'].fillna(parts['y2']).fillna(parts['y3']))
+    month = pd.to_numeric(parts['m1'].fillna(parts['m2']).fillna(parts['m3']))
+    day = pd.to_numeric(parts['d1'].fillna(parts['d2']).fillna(parts['d3']))
+
+    short = parts['y2'].str.len() == 2
+    year = year.mask(short, year + 1900 + 100 * (year < SHORT_YEAR_PIVOT))
+    swap = parts['d2'].notna() & (month > 12)
+    day, month = day.mask(swap, month), month.mask(swap, day)
+    year = year.where(year.between(MIN_YEAR, MAX_YEAR))
+
+    return pd.to_datetime(pd.DataFrame({'year': year, 'month': month, 'day': day}), errors='coerce')
+
+
+def _python_values(column: pd.Series) -> list:
+    if pd.api.types.is_datetime64_any_dtype(column):
+        column = column.dt.date
+    return column.astype(object).where(column.notna(), None).tolist()
+
+
+def _empty_column(index: pd.Index) -> pd.Series:
+    return pd.Series([None] * len(index), index=index, dtype=object)
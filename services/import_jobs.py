@@ -0,0 +1,134 @@
+"""
+Import Jobs
+Runs imports on a background thread, one at a time, with progress events
+and cancellation between chunks
+"""
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from services.import_service import IMPORT_METHODS, ImportService, import_progress
+
+# One worker: imports are the only bulk writer, so they never run side by side
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="import")
+    return _executor
+
+
+class ImportJob:
+    """
+    One import run on the import thread
+
+    The worker publishes progress dicts (see import_service._progress) and
+    sets result when the import returns; the UI drains events() from the Tk
+    thread. cancel() asks the import to stop before its next chunk; chunks
+    already committed stay in the database, and result['job_id'] (the
+    import journal id) lets ImportJobManager.resume() continue it.
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, kind: str, file_path: str):
+        self.kind = kind
+        self.file_path = file_path
+        self.status = self.QUEUED
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.cancel_event = threading.Event()
+        self._events = queue.Queue()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.DONE, self.FAILED, self.CANCELLED)
+
+    def publish(self, progress: Dict[str, Any]):
+        """Called by the import after every chunk (worker thread)"""
+        self.progress = progress
+        self._events.put(progress)
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Progress events published since the last call, oldest first"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def _finish(self, result: Dict[str, Any]):
+        self.result = result
+        if result.get('cancelled'):
+            self.status = self.CANCELLED
+        elif result.get('success'):
+            self.status = self.DONE
+        else:
+            self.status = self.FAILED
+
+
+class ImportJobManager:
+    """Starts import jobs and keeps track of the one that is running"""
+
+    def __init__(self):
+        self.import_service = ImportService()
+        self.active_job: Optional[ImportJob] = None
+        self._lock = threading.Lock()
+
+    def start(self, kind: str, file_path: str, column_mapping: Dict[str, str],
+              **options) -> ImportJob:
+        """
+        Queue an import of kind (a key of IMPORT_METHODS); options are passed
+        to the service method. Raises RuntimeError while another job is
+        unfinished
+        """
+        if kind not in IMPORT_METHODS:
+            raise ValueError(f"Unknown import kind: {kind}")
+
+        import_method = getattr(self.import_service, IMPORT_METHODS[kind])
+        return self._submit(ImportJob(kind, file_path), import_method, file_path, column_mapping, **options)
+
+    def resume(self, job_id: int) -> ImportJob:
+        """Queue ImportService.resume(job_id); same rules as start()"""
+        entry = self.import_service.get_import_job(job_id)
+        if entry is None:
+            raise ValueError(f"Import job {job_id} not found")
+        return self._submit(ImportJob(entry['kind'], entry['file_path']), self.import_service.resume, job_id)
+
+    def _submit(self, job: ImportJob, call: Callable, *args, **kwargs) -> ImportJob:
+        with self._lock:
+            if self.active_job is not None and not self.active_job.finished:
+                raise RuntimeError("Another import is still running")
+            self.active_job = job
+        _get_executor().submit(self._run, job, call, args, kwargs)
+        return job
+
+    def _run(self, job: ImportJob, call: Callable, args: tuple, kwargs: Dict[str, Any]):
+        job.status = ImportJob.RUNNING
+        try:
+            with import_progress(job):
+                result = call(*args, **kwargs)
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        job._finish(result)
+
+
+_job_manager = None
+
+
+def get_import_job_manager() -> ImportJobManager:
+    """Get the shared import job manager"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = ImportJobManager()
+    return _job_manager
@@ -1,56 +1,230 @@
 """
 Import Service
-Business logic for importing data from CSV/Excel files
+Business logic for importing data from CSV/Excel files, and from
+Parquet/Feather files when pyarrow is installed
+
+Imports stream the file in chunks of config.IMPORT_CHUNK_SIZE rows. Each
+chunk is read, transformed into records and written in its own transaction,
+so memory use depends on the chunk size, not on the file size. CSV files
+are read with csv_reader and converted row by row (typed_rows) without
+pandas; Excel and Arrow files come as DataFrames whose columns are
+converted and validated whole (import_frames.typed_columns). pandas is
+only imported for those formats and for previews.
+
+Every import is recorded in the import journal, whose checkpoint is updated
+in each chunk's transaction; resume(job_id) continues a failed or
+interrupted import after its last committed chunk. Visits and test results
+carry the file row they came from (source_ref), so replayed rows are
+skipped instead of duplicated.
+
+Visits and test results can also go through the SQL engine
+(config.IMPORT_ENGINE = 'sql', see import_staging): raw cells are staged
+in a temporary table and validated and merged by set-based statements.
+
+Rejected and skipped rows go to an ImportErrorSink: the result carries
+counts by error code and column and a capped sample of messages, and the
+full row-level report is written as CSV next to the source file.
 """
-from typing import List, Dict, Any, Optional
+import hashlib
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Iterator, Callable, Tuple, Iterable, TYPE_CHECKING
 from pathlib import Path
-import pandas as pd
 from datetime import datetime
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.models import Patient, Visit, TestType, TestResult, Medicine, ImportJournal
+from database.db_manager import get_db_manager
 from services.patient_service import PatientService
 from services.test_service import TestService
+from services.csv_reader import CsvFile, RowChunk, parse_number, raw_rows, typed_rows
+from services.arrow_reader import ARROW_FORMATS, ArrowFile
+from services import arrow_reader
+from services import import_staging
+from services.import_errors import (
+    ImportErrorSink, ERROR, SKIPPED, MISSING_REQUIRED, NOT_FOUND, WRITE_FAILED, ALREADY_EXISTS,
+    DUPLICATE_ROW, report_path
+)
 import config
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Fields each import reads and how their columns are converted
+# ('text', 'number' or 'date'); other mapped columns are ignored
+PATIENT_FIELDS = {
+    'patient_code': 'text', 'full_name': 'text', 'date_of_birth': 'date', 'gender': 'text',
+    'phone_number': 'text', 'address': 'text', 'notes': 'text'
+}
+TEST_RESULT_FIELDS = {
+    'test_name': 'text', 'result_value': 'text', 'unit': 'text', 'test_date': 'date', 'notes': 'text'
+}
+MEDICINE_FIELDS = {
+    'name': 'text', 'category': 'text', 'unit': 'text', 'usage': 'text', 'notes': 'text'
+}
+TEST_TYPE_FIELDS = {
+    'name': 'text', 'unit': 'text', 'normal_range_min': 'number', 'normal_range_max': 'number',
+    'notes': 'text'
+}
+VISIT_FIELDS = {
+    'patient_code': 'text', 'visit_date': 'date', 'symptoms': 'text', 'diagnosis': 'text',
+    'conclusion': 'text', 'notes': 'text'
+}
+TEST_RESULT_BATCH_FIELDS = {
+    'patient_code': 'text', 'test_type_name': 'text', 'test_date': 'date', 'result_value': 'text',
+    'result_text': 'text', 'notes': 'text'
+}
+
+IN_CLAUSE_LIMIT = 900  # keys per IN (...) lookup, under SQLite's 999-parameter default on older builds
+
+# Import kind (ImportJournal.kind) -> ImportService method
+IMPORT_METHODS = {
+    'patients': 'import_patients',
+    'medicines': 'import_medicines',
+    'test_types': 'import_test_types',
+    'visits': 'import_visits',
+    'test_results': 'import_test_results_batch',
+    'visit_test_results': 'import_test_results'
+}
+
+# Set by import_progress() for imports run inside its block
+_progress_listener = ContextVar("import_progress_listener", default=None)
+
+# Journal id of the import resume() is continuing
+_resumed_job = ContextVar("resumed_import_job", default=None)
+
+
+@contextmanager
+def import_progress(listener):
+    """
+    Report the progress of imports run inside the block to listener
+    listener.publish(progress) is called once before the first chunk and
+    after every chunk; once listener.cancel_event is set the import stops
+    before its next chunk, keeping the chunks already committed
+    Usage:
+        with import_progress(job):
+            result = service.import_patients(file_path, mapping)
+    """
+    token = _progress_listener.set(listener)
+    try:
+        yield
+    finally:
+        _progress_listener.reset(token)
+
 
 class ImportService:
     """Service class for data import operations"""
     
-    def __init__(self):
+    def __init__(self, engine: str = None):
+        self.db_manager = get_db_manager()
+        self.engine = engine or config.IMPORT_ENGINE
         self.patient_service = PatientService()
         self.test_service = TestService()
+        self.chunk_size = config.IMPORT_CHUNK_SIZE
     
-    def read_file(self, file_path: str) -> Optional[pd.DataFrame]:
+    @property
+    def file_cache(self):
+        """Shared parsed file cache; imported on first use, as it needs pandas"""
+        from services.import_file_cache import get_parsed_file_cache
+        
+        return get_parsed_file_cache()
+    
+    def read_file(self, file_path: str) -> Optional["pd.DataFrame"]:
         """
         Read CSV or Excel file and return DataFrame
+        Parsed once per file version; later calls are served from the file
+        cache, so callers must not modify the returned DataFrame
+        Imports do not use this; they stream the file with iter_chunks()
         Returns None if file cannot be read
         """
         try:
-            file_ext = Path(file_path).suffix.lower()
-            
-            if file_ext == '.csv':
-                df = pd.read_csv(file_path)
-            elif file_ext in ['.xlsx', '.xls']:
-                df = pd.read_excel(file_path)
-            else:
-                raise ValueError(f"Unsupported file type: {file_ext}")
-            
-            return df
+            return self.file_cache.get(file_path).dataframe()
         except Exception as e:
             print(f"Error reading file: {e}")
             return None
     
     def get_column_names(self, file_path: str) -> List[str]:
-        """Get list of column names from file"""
-        df = self.read_file(file_path)
-        if df is not None:
-            return df.columns.tolist()
-        return []
+        """Get list of column names from file (header-only read; CSV without pandas)"""
+        try:
+            if Path(file_path).suffix.lower() == '.csv':
+                return CsvFile(file_path).columns
+            return self.file_cache.get(file_path).columns()
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return []
+    
+    def preview_data(self, file_path: str, rows: int = 10) -> Optional["pd.DataFrame"]:
+        """Preview first N rows of data without reading the whole file"""
+        try:
+            return self.file_cache.get(file_path).preview(rows)
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return None
+    
+    # ===== Streaming =====
+    
+    def iter_chunks(self, file_path: str, chunk_size: int = None) -> Iterator[Any]:
+        """
+        Yield the file in chunks of at most chunk_size rows: CSV files as
+        csv_reader RowChunks, other files as DataFrames (import_frames.chunks)
+        Rows are numbered from 0 (first data row) across chunks, by
+        RowChunk.positions or the DataFrame index, so that number + 2 is
+        the row number in the file, header included
+        """
+        chunk_size = chunk_size or self.chunk_size
+        if Path(file_path).suffix.lower() == '.csv':
+            yield from CsvFile(file_path).chunks(chunk_size)
+        else:
+            from services import import_frames
+            
+            yield from import_frames.chunks(file_path, chunk_size)
     
-    def preview_data(self, file_path: str, rows: int = 10) -> Optional[pd.DataFrame]:
-        """Preview first N rows of data"""
+    def count_rows(self, file_path: str) -> int:
+        """
+        Number of data rows without parsing the file
+        CSV: line count (quoted line breaks make it an estimate);
+        XLSX: the sheet's recorded dimension when present;
+        Parquet/Feather: the file's metadata
+        """
+        file_ext = Path(file_path).suffix.lower()
+        
+        if file_ext in ARROW_FORMATS:
+            return ArrowFile(file_path).num_rows
+        
+        if file_ext == '.csv':
+            lines = 0
+            last = b"\n"
+            with open(file_path, "rb") as f:
+                while True:
+                    block = f.read(1 << 20)
+                    if not block:
+                        break
+                    lines += block.count(b"\n")
+                    last = block[-1:]
+            if last != b"\n":
+                lines += 1
+            return max(lines - 1, 0)
+        
+        if file_ext == '.xlsx':
+            from openpyxl import load_workbook
+            
+            workbook = load_workbook(file_path, read_only=True)
+            try:
+                sheet = workbook.active
+                if sheet.max_row is not None:
+                    return max(sheet.max_row - 1, 0)
+                return max(sum(1 for _ in sheet.iter_rows(values_only=True)) - 1, 0)
+            finally:
+                workbook.close()
+        
         df = self.read_file(file_path)
-        if df is not None:
-            return df.head(rows)
-        return None
+        return len(df) if df is not None else 0
+    
+    # ===== Imports =====
     
     def import_patients(self, file_path: str, column_mapping: Dict[str, str],
                        skip_duplicates: bool = True) -> Dict[str, Any]:
@@ -59,7 +233,7 @@ class ImportService:
         
         Args:
             file_path: Path to CSV/Excel file
-            column_mapping: Dict mapping file columns to patient fields
+            column_mapping: Dict mapping patient fields to file columns
                 Example: {
                     'patient_code': 'Mã BN',
                     'full_name': 'Họ tên',
@@ -74,64 +248,41 @@ class ImportService:
         Returns:
             Dict with import statistics
         """
-        df = self.read_file(file_path)
-        if df is None:
-            return {'success': False, 'error': 'Cannot read file'}
-        
-        # Reverse mapping for easier lookup
-        reverse_mapping = {v: k for k, v in column_mapping.items()}
-        
-        stats = {
-            'total': len(df),
-            'imported': 0,
-            'skipped': 0,
-            'errors': []
-        }
+        fields = {field: kind for field, kind in PATIENT_FIELDS.items() if field in column_mapping}
+        seen_codes = {}
         
-        for idx, row in df.iterrows():
-            try:
-                # Extract patient data
-                patient_data = {}
-                
-                for file_col, field_name in reverse_mapping.items():
-                    if file_col in row and pd.notna(row[file_col]):
-                        value = row[file_col]
-                        
-                        # Handle date conversion
-                        if field_name == 'date_of_birth' and value:
-                            try:
-                                if isinstance(value, str):
-                                    value = pd.to_datetime(value, dayfirst=True, errors='coerce').date()
-                                elif isinstance(value, pd.Timestamp):
-                                    value = value.date()
-                            except:
-                                value = None
-                        
-                        patient_data[field_name] = value
-                
-                # Check required fields
-                if 'patient_code' not in patient_data or 'full_name' not in patient_data:
-                    stats['errors'].append(f"Row {idx + 1}: Missing required fields")
-                    stats['skipped'] += 1
-                    continue
-                
-                # Check for duplicates
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, fields),
+                                     ['patient_code', 'full_name'], "Missing required fields")
                 if skip_duplicates:
-                    existing = self.patient_service.get_patient_by_code(patient_data['patient_code'])
-                    if existing:
-                        stats['skipped'] += 1
-                        continue
-                
-                # Create patient
-                self.patient_service.create_patient(**patient_data)
-                stats['imported'] += 1
-                
-            except Exception as e:
-                stats['errors'].append(f"Row {idx + 1}: {str(e)}")
-                stats['skipped'] += 1
+                    codes = [record['patient_code'] for _, record in rows]
+                    existing = self._existing_keys(Patient.patient_code, set(codes))
+                    rows = _keep(rows, _unique_rows(_row_numbers(rows), codes, existing, seen_codes, stats,
+                                                    "Patient code", 'patient_code'))
+                return rows
+            
+            from services.import_frames import records, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, fields)
+            
+            # Check required fields
+            frame = _require(stats, frame, ['patient_code', 'full_name'], "Missing required fields")
+            
+            # Check for duplicates, in the database and earlier in the file
+            if skip_duplicates:
+                codes = frame['patient_code']
+                existing = self._existing_keys(Patient.patient_code, codes.unique())
+                frame = frame.loc[_unique_rows((codes.index + 2).tolist(), codes, existing, seen_codes, stats,
+                                               "Patient code", 'patient_code')]
+            
+            return records(frame)
+        
+        def write(session, rows):
+            session.execute(_bulk_insert(Patient), rows)
         
-        stats['success'] = True
-        return stats
+        return self._run_import(file_path, transform, write, 'patients', column_mapping,
+                                {'skip_duplicates': skip_duplicates})
     
     def import_test_results(self, file_path: str, column_mapping: Dict[str, str],
                            patient_id: int, visit_id: int) -> Dict[str, Any]:
@@ -140,7 +291,7 @@ class ImportService:
         
         Args:
             file_path: Path to CSV/Excel file
-            column_mapping: Dict mapping file columns to test result fields
+            column_mapping: Dict mapping test result fields to file columns
                 Example: {
                     'test_name': 'Tên xét nghiệm',
                     'result_value': 'Kết quả',
@@ -153,97 +304,87 @@ class ImportService:
         Returns:
             Dict with import statistics
         """
-        df = self.read_file(file_path)
-        if df is None:
-            return {'success': False, 'error': 'Cannot read file'}
+        from services.visit_service import VisitService
         
-        reverse_mapping = {v: k for k, v in column_mapping.items()}
+        source = _source_prefix(file_path)
         
-        stats = {
-            'total': len(df),
-            'imported': 0,
-            'skipped': 0,
-            'errors': []
-        }
+        # Use visit date if test_date not provided
+        visit = VisitService().get_visit_by_id(visit_id)
+        default_date = visit.visit_date if visit else datetime.now().date()
         
-        for idx, row in df.iterrows():
-            try:
-                # Extract test result data
-                test_name = None
-                result_value = None
-                result_text = None
-                unit = None
-                test_date = None
-                notes = None
-                
-                for file_col, field_name in reverse_mapping.items():
-                    if file_col in row and pd.notna(row[file_col]):
-                        value = row[file_col]
-                        
-                        if field_name == 'test_name':
-                            test_name = str(value)
-                        elif field_name == 'result_value':
-                            try:
-                                result_value = float(value)
-                            except:
-                                result_text = str(value)
-                        elif field_name == 'unit':
-                            unit = str(value)
-                        elif field_name == 'test_date':
-                            try:
-                                if isinstance(value, str):
-                                    test_date = pd.to_datetime(value).date()
-                                elif isinstance(value, pd.Timestamp):
-                                    test_date = value.date()
-                            except:
-                                test_date = None
-                        elif field_name == 'notes':
-                            notes = str(value)
-                
-                # Validate required fields
-                if not test_name:
-                    stats['errors'].append(f"Row {idx + 1}: Missing test name")
-                    stats['skipped'] += 1
-                    continue
-                
-                # Get or create test type
-                test_type = self.test_service.get_test_type_by_name(test_name)
-                if not test_type:
-                    test_type = self.test_service.create_test_type(
-                        name=test_name,
-                        unit=unit
-                    )
-                
-                # Use visit date if test_date not provided
-                if not test_date:
-                    from services.visit_service import VisitService
-                    visit_service = VisitService()
-                    visit = visit_service.get_visit_by_id(visit_id)
-                    test_date = visit.visit_date if visit else datetime.now().date()
-                
-                # Create test result
-                self.test_service.create_test_result(
-                    visit_id=visit_id,
-                    test_type_id=test_type.id,
-                    test_date=test_date,
-                    result_value=result_value,
-                    result_text=result_text,
-                    unit=unit,
-                    notes=notes
-                )
-                
-                stats['imported'] += 1
-                
-            except Exception as e:
-                stats['errors'].append(f"Row {idx + 1}: {str(e)}")
-                stats['skipped'] += 1
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, TEST_RESULT_FIELDS),
+                                     ['test_name'], "Missing test name")
+                results = []
+                for row_number, record in rows:
+                    result_value, result_text = _split_value(record['result_value'])
+                    results.append((row_number, {
+                        'test_name': record['test_name'],
+                        'visit_id': visit_id,
+                        'test_date': record['test_date'] or default_date,
+                        'result_value': result_value,
+                        'result_text': result_text,
+                        'unit': record['unit'],
+                        'notes': record['notes'],
+                        'source_ref': f"{source}:{row_number}"
+                    }))
+                return results
+            
+            import pandas as pd
+            from services.import_frames import fill_dates, records, source_refs, split_result, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, TEST_RESULT_FIELDS)
+            
+            # Validate required fields
+            frame = _require(stats, frame, ['test_name'], "Missing test name")
+            
+            result_value, result_text = split_result(frame['result_value'])
+            return records(pd.DataFrame({
+                'test_name': frame['test_name'],
+                'visit_id': visit_id,
+                'test_date': fill_dates(frame['test_date'], default_date),
+                'result_value': result_value,
+                'result_text': result_text,
+                'unit': frame['unit'],
+                'notes': frame['notes'],
+                'source_ref': source_refs(source, frame.index)
+            }, index=frame.index))
         
-        stats['success'] = True
-        return stats
+        def write(session, rows):
+            # Get or create test types: one lookup, one batch insert
+            units = {}
+            for row in rows:
+                units.setdefault(row['test_name'], row['unit'])
+            type_ids = dict(self._lookup(select(TestType.name, TestType.id), TestType.name, units, session))
+            missing = [name for name in units if name not in type_ids]
+            if missing:
+                type_ids.update(session.execute(
+                    _bulk_insert(TestType).returning(TestType.name, TestType.id),
+                    [{'name': name, 'unit': units[name]} for name in missing]
+                ).all())
+            
+            return _insert_new(session, TestResult, [
+                {
+                    'visit_id': row['visit_id'],
+                    'test_type_id': type_ids[row['test_name']],
+                    'test_date': row['test_date'],
+                    'result_value': row['result_value'],
+                    'result_text': row['result_text'],
+                    'unit': row['unit'],
+                    'notes': row['notes'],
+                    'source_ref': row['source_ref']
+                }
+                for row in rows
+            ])
+        
+        return self._run_import(file_path, transform, write, 'visit_test_results', column_mapping,
+                                {'patient_id': patient_id, 'visit_id': visit_id})
     
     def validate_file(self, file_path: str) -> Dict[str, Any]:
         """
         Validate file before import
+        Reads only the header and counts lines; the file is parsed during import
         Returns validation results
         """
         result = {
@@ -266,270 +407,832 @@ class ImportService:
                 result['error'] = "File does not exist"
                 return result
             
-            # Read file
-            df = self.read_file(file_path)
-            if df is None:
+            if file_ext in ARROW_FORMATS and not arrow_reader.available():
+                result['error'] = "pyarrow is required to import .parquet/.feather files"
+                return result
+            
+            # Read header
+            columns = self.get_column_names(file_path)
+            if not columns:
                 result['error'] = "Cannot read file"
                 return result
             
             # Check size
-            if len(df) > config.MAX_IMPORT_ROWS:
+            row_count = self.count_rows(file_path)
+            if config.MAX_IMPORT_ROWS is not None and row_count > config.MAX_IMPORT_ROWS:
                 result['error'] = f"File too large (max {config.MAX_IMPORT_ROWS} rows)"
                 return result
             
             result['valid'] = True
-            result['row_count'] = len(df)
-            result['column_count'] = len(df.columns)
-            result['columns'] = df.columns.tolist()
-            
+            result['row_count'] = row_count
+            result['column_count'] = len(columns)
+            result['columns'] = columns
+        
         except Exception as e:
             result['error'] = str(e)
         
         return result
     
-    def load_file(self, file_path: str) -> Optional[pd.DataFrame]:
+    def load_file(self, file_path: str) -> Optional["pd.DataFrame"]:
         """Alias for read_file"""
         return self.read_file(file_path)
     
-    def import_medicines(self, file_path: str, column_mapping: dict, 
+    def import_medicines(self, file_path: str, column_mapping: dict,
                         skip_duplicates: bool = True) -> dict:
         """Import medicines from CSV/Excel"""
-        from services import MedicineService
+        # Medicines have no unique key; compare whitespace/case-normalized names.
+        # The catalogue is small, so its names are loaded once per import.
+        existing_names = None
+        seen_names = {}
         
-        try:
-            df = self.load_file(file_path)
-            if df is None or df.empty:
-                return {'success': False, 'error': 'File is empty'}
-            
-            medicine_service = MedicineService()
-            imported, skipped, errors = 0, 0, []
-            
-            for idx, row in df.iterrows():
-                try:
-                    data = {}
-                    for field, column in column_mapping.items():
-                        if column in row.index and pd.notna(row[column]):
-                            data[field] = str(row[column]).strip()
-                    
-                    if 'name' not in data or not data['name']:
-                        errors.append(f"Row {idx + 2}: Missing medicine name")
-                        continue
-                    
-                    if skip_duplicates:
-                        existing = medicine_service.search_medicines(data['name'], active_only=False)
-                        if existing:
-                            skipped += 1
-                            continue
-                    
-                    # Map usage/notes to description field
-                    description = data.get('usage') or data.get('notes')
-                    
-                    medicine_service.create_medicine(
-                        name=data.get('name'),
-                        category=data.get('category'),
-                        unit=data.get('unit'),
-                        description=description
-                    )
-                    imported += 1
-                except Exception as e:
-                    errors.append(f"Row {idx + 2}: {str(e)}")
-            
-            return {'success': True, 'total': len(df), 'imported': imported, 'skipped': skipped, 'errors': errors}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        def known_names():
+            nonlocal existing_names
+            if existing_names is None:
+                with self.db_manager.session_scope() as session:
+                    existing_names = {_normalize_name(name) for name in session.scalars(select(Medicine.name))}
+            return existing_names
+        
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, MEDICINE_FIELDS),
+                                     ['name'], "Missing medicine name")
+                if skip_duplicates:
+                    names = [record['name'] for _, record in rows]
+                    keep = _unique_rows(_row_numbers(rows), [_normalize_name(name) for name in names],
+                                        known_names(), seen_names, stats, "Medicine", 'name', names)
+                    rows = _keep(rows, keep)
+                return [
+                    (row_number, {
+                        'name': record['name'],
+                        'category': record['category'],
+                        'unit': record['unit'],
+                        'description': record['usage'] or record['notes'],
+                        'active': True
+                    })
+                    for row_number, record in rows
+                ]
+            
+            import pandas as pd
+            from services.import_frames import records, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, MEDICINE_FIELDS)
+            
+            frame = _require(stats, frame, ['name'], "Missing medicine name")
+            
+            if skip_duplicates:
+                keys = frame['name'].map(_normalize_name)
+                keep = _unique_rows((frame.index + 2).tolist(), keys, known_names(), seen_names, stats,
+                                    "Medicine", 'name', frame['name'])
+                frame = frame.loc[keep]
+            
+            return records(pd.DataFrame({
+                'name': frame['name'],
+                'category': frame['category'],
+                'unit': frame['unit'],
+                # Map usage/notes to description field
+                'description': frame['usage'].where(frame['usage'].notna(), frame['notes']),
+                'active': True
+            }, index=frame.index))
+        
+        def write(session, rows):
+            session.execute(_bulk_insert(Medicine), rows)
+        
+        return self._run_import(file_path, transform, write, 'medicines', column_mapping,
+                                {'skip_duplicates': skip_duplicates})
     
-    def import_test_types(self, file_path: str, column_mapping: dict, 
+    def import_test_types(self, file_path: str, column_mapping: dict,
                          skip_duplicates: bool = True) -> dict:
         """Import test types from CSV/Excel"""
-        try:
-            df = self.load_file(file_path)
-            if df is None or df.empty:
-                return {'success': False, 'error': 'File is empty'}
-            
-            imported, skipped, errors = 0, 0, []
-            
-            for idx, row in df.iterrows():
-                try:
-                    data = {}
-                    for field, column in column_mapping.items():
-                        if column in row.index and pd.notna(row[column]):
-                            value = row[column]
-                            if field in ['normal_range_min', 'normal_range_max']:
-                                try:
-                                    data[field] = float(value)
-                                except:
-                                    data[field] = None
-                            else:
-                                data[field] = str(value).strip()
-                    
-                    if 'name' not in data or 'unit' not in data:
-                        errors.append(f"Row {idx + 2}: Missing name or unit")
-                        continue
-                    
-                    if skip_duplicates:
-                        existing = self.test_service.get_test_type_by_name(data['name'])
-                        if existing:
-                            skipped += 1
-                            continue
-                    
-                    # Map notes to description field
-                    description = data.get('notes')
-                    
-                    self.test_service.create_test_type(
-                        name=data.get('name'),
-                        unit=data.get('unit'),
-                        normal_range_min=data.get('normal_range_min'),
-                        normal_range_max=data.get('normal_range_max'),
-                        description=description
-                    )
-                    imported += 1
-                except Exception as e:
-                    errors.append(f"Row {idx + 2}: {str(e)}")
-            
-            return {'success': True, 'total': len(df), 'imported': imported, 'skipped': skipped, 'errors': errors}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        seen_names = {}
+        
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, TEST_TYPE_FIELDS),
+                                     ['name', 'unit'], "Missing name or unit")
+                if skip_duplicates:
+                    names = [record['name'] for _, record in rows]
+                    existing = self._existing_keys(TestType.name, set(names))
+                    rows = _keep(rows, _unique_rows(_row_numbers(rows), names, existing, seen_names, stats,
+                                                    "Test type", 'name'))
+                return [
+                    (row_number, {
+                        'name': record['name'],
+                        'unit': record['unit'],
+                        'normal_range_min': record['normal_range_min'],
+                        'normal_range_max': record['normal_range_max'],
+                        'description': record['notes']
+                    })
+                    for row_number, record in rows
+                ]
+            
+            import pandas as pd
+            from services.import_frames import records, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, TEST_TYPE_FIELDS)
+            
+            frame = _require(stats, frame, ['name', 'unit'], "Missing name or unit")
+            
+            if skip_duplicates:
+                names = frame['name']
+                existing = self._existing_keys(TestType.name, names.unique())
+                frame = frame.loc[_unique_rows((names.index + 2).tolist(), names, existing, seen_names, stats,
+                                               "Test type", 'name')]
+            
+            return records(pd.DataFrame({
+                'name': frame['name'],
+                'unit': frame['unit'],
+                'normal_range_min': frame['normal_range_min'],
+                'normal_range_max': frame['normal_range_max'],
+                # Map notes to description field
+                'description': frame['notes']
+            }, index=frame.index))
+        
+        def write(session, rows):
+            session.execute(_bulk_insert(TestType), rows)
+        
+        return self._run_import(file_path, transform, write, 'test_types', column_mapping,
+                                {'skip_duplicates': skip_duplicates})
     
     def import_visits(self, file_path: str, column_mapping: dict) -> dict:
         """Import visits from CSV/Excel"""
-        from services import VisitService
+        source = _source_prefix(file_path)
+        if self.engine == 'sql':
+            return self._run_import(file_path, *_staged(column_mapping, VISIT_FIELDS, source,
+                                                         import_staging.merge_visits),
+                                    'visits', column_mapping)
         
-        try:
-            df = self.load_file(file_path)
-            if df is None or df.empty:
-                return {'success': False, 'error': 'File is empty'}
-            
-            visit_service = VisitService()
-            imported, skipped, errors = 0, 0, []
-            
-            for idx, row in df.iterrows():
-                try:
-                    data = {}
-                    for field, column in column_mapping.items():
-                        if column in row.index and pd.notna(row[column]):
-                            value = row[column]
-                            if field == 'visit_date':
-                                try:
-                                    data[field] = pd.to_datetime(value, dayfirst=True, errors='coerce').date()
-                                except:
-                                    data[field] = None
-                            else:
-                                data[field] = str(value).strip()
-                    
-                    if 'patient_code' not in data or 'visit_date' not in data:
-                        errors.append(f"Row {idx + 2}: Missing patient_code or visit_date")
-                        continue
-                    
-                    # Get patient by code
-                    patient = self.patient_service.get_patient_by_code(data['patient_code'])
-                    if not patient:
-                        errors.append(f"Row {idx + 2}: Patient {data['patient_code']} not found")
-                        continue
-                    
-                    visit_service.create_visit(
-                        patient_id=patient.id,
-                        visit_date=data.get('visit_date'),
-                        symptoms=data.get('symptoms'),
-                        diagnosis=data.get('diagnosis'),
-                        conclusion=data.get('conclusion'),
-                        notes=data.get('notes')
-                    )
-                    imported += 1
-                except Exception as e:
-                    errors.append(f"Row {idx + 2}: {str(e)}")
-            
-            return {'success': True, 'total': len(df), 'imported': imported, 'skipped': skipped, 'errors': errors}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, VISIT_FIELDS),
+                                     ['patient_code', 'visit_date'], "Missing patient_code or visit_date")
+                patient_ids = self._patient_ids({record['patient_code'] for _, record in rows})
+                rows = _resolve_rows(stats, rows, 'patient_code', patient_ids, "Patient {} not found")
+                return [
+                    (row_number, {
+                        'patient_id': patient_ids[record['patient_code']],
+                        'visit_date': record['visit_date'],
+                        'symptoms': record['symptoms'],
+                        'diagnosis': record['diagnosis'],
+                        'conclusion': record['conclusion'],
+                        'notes': record['notes'],
+                        'source_ref': f"{source}:{row_number}"
+                    })
+                    for row_number, record in rows
+                ]
+            
+            import pandas as pd
+            from services.import_frames import records, source_refs, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, VISIT_FIELDS)
+            
+            frame = _require(stats, frame, ['patient_code', 'visit_date'], "Missing patient_code or visit_date")
+            
+            # Get patients by code, once per distinct code
+            patient_ids = frame['patient_code'].map(self._patient_ids(frame['patient_code'].unique()))
+            _add_missing(stats, frame['patient_code'], patient_ids, "Patient {} not found")
+            frame = frame[patient_ids.notna()]
+            
+            return records(pd.DataFrame({
+                'patient_id': patient_ids[frame.index].astype(int),
+                'visit_date': frame['visit_date'],
+                'symptoms': frame['symptoms'],
+                'diagnosis': frame['diagnosis'],
+                'conclusion': frame['conclusion'],
+                'notes': frame['notes'],
+                'source_ref': source_refs(source, frame.index)
+            }, index=frame.index))
+        
+        def write(session, rows):
+            return _insert_new(session, Visit, rows)
+        
+        return self._run_import(file_path, transform, write, 'visits', column_mapping)
     
     def import_test_results_batch(self, file_path: str, column_mapping: dict) -> dict:
         """Import test results from CSV/Excel"""
-        from services import VisitService
+        source = _source_prefix(file_path)
+        if self.engine == 'sql':
+            return self._run_import(file_path, *_staged(column_mapping, TEST_RESULT_BATCH_FIELDS, source,
+                                                         import_staging.merge_test_results),
+                                    'test_results', column_mapping)
+        
+        def transform(chunk, stats):
+            if isinstance(chunk, RowChunk):
+                rows = _require_rows(stats, _typed_rows(chunk, column_mapping, TEST_RESULT_BATCH_FIELDS),
+                                     ['patient_code', 'test_type_name'], "Missing required fields")
+                patient_ids = self._patient_ids({record['patient_code'] for _, record in rows})
+                rows = _resolve_rows(stats, rows, 'patient_code', patient_ids, "Patient {} not found")
+                test_types = self._test_types({record['test_type_name'] for _, record in rows})
+                rows = _resolve_rows(stats, rows, 'test_type_name', test_types, "Test type '{}' not found")
+                
+                today = datetime.now().date()
+                results = []
+                for row_number, record in rows:
+                    type_id, unit = test_types[record['test_type_name']]
+                    result_value, result_text = _split_value(record['result_value'])
+                    results.append((row_number, {
+                        'patient_id': patient_ids[record['patient_code']],
+                        'test_type_id': type_id,
+                        'test_type_name': record['test_type_name'],
+                        'test_date': record['test_date'] or today,
+                        'result_value': result_value,
+                        'result_text': result_text or record['result_text'],
+                        'unit': unit,
+                        'notes': record['notes'],
+                        'source_ref': f"{source}:{row_number}"
+                    }))
+                return results
+            
+            import pandas as pd
+            from services.import_frames import fill_dates, records, source_refs, split_result, typed_columns
+            
+            frame = typed_columns(chunk, column_mapping, TEST_RESULT_BATCH_FIELDS)
+            
+            frame = _require(stats, frame, ['patient_code', 'test_type_name'], "Missing required fields")
+            
+            # Resolve patient codes and test type names, one query each
+            patient_ids = frame['patient_code'].map(self._patient_ids(frame['patient_code'].unique()))
+            _add_missing(stats, frame['patient_code'], patient_ids, "Patient {} not found")
+            frame = frame[patient_ids.notna()]
+            
+            test_types = self._test_types(frame['test_type_name'].unique())
+            type_ids = frame['test_type_name'].map({name: t[0] for name, t in test_types.items()})
+            _add_missing(stats, frame['test_type_name'], type_ids, "Test type '{}' not found")
+            frame = frame[type_ids.notna()]
+            units = frame['test_type_name'].map({name: t[1] for name, t in test_types.items()})
+            
+            result_value, result_text = split_result(frame['result_value'])
+            return records(pd.DataFrame({
+                'patient_id': patient_ids[frame.index].astype(int),
+                'test_type_id': type_ids[frame.index].astype(int),
+                'test_type_name': frame['test_type_name'],
+                'test_date': fill_dates(frame['test_date'], datetime.now().date()),
+                'result_value': result_value,
+                'result_text': result_text.where(result_text.notna(), frame['result_text']),
+                'unit': units,
+                'notes': frame['notes'],
+                'source_ref': source_refs(source, frame.index)
+            }, index=frame.index))
+        
+        def write(session, rows):
+            # Find or create the visit of each (patient, date)
+            keys = {}
+            for row in rows:
+                keys.setdefault((row['patient_id'], row['test_date']), row['test_type_name'])
+            visit_ids = self._visit_ids(session, keys)
+            
+            return _insert_new(session, TestResult, [
+                {
+                    'visit_id': visit_ids[(row['patient_id'], row['test_date'])],
+                    'test_type_id': row['test_type_id'],
+                    'test_date': row['test_date'],
+                    'result_value': row['result_value'],
+                    'result_text': row['result_text'],
+                    'unit': row['unit'],
+                    'notes': row['notes'],
+                    'source_ref': row['source_ref']
+                }
+                for row in rows
+            ])
+        
+        return self._run_import(file_path, transform, write, 'test_results', column_mapping)
+    
+    # ===== Pipeline =====
+    
+    def _run_import(self, file_path: str,
+                    transform: Callable[[Any, Dict[str, Any]], List[tuple]],
+                    write: Callable[[Any, List[Dict[str, Any]]], Optional[int]],
+                    kind: str, column_mapping: Dict[str, str],
+                    options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Stream the file through transform and write, one chunk at a time
+        
+        transform(chunk, stats) takes an iter_chunks() chunk (a RowChunk or
+        a DataFrame) and returns (row_number, record) pairs and records
+        rejected rows in stats; write(session, records) stores the records
+        inside the chunk's transaction and may return how many it inserted
+        (fewer when rows of an earlier run were skipped), or that count and
+        the (row_number, code, column, message) of records it rejected. A
+        chunk whose write fails is rolled back and retried one record per
+        transaction, so a bad row only costs itself. Statistics count every
+        data row: total = imported + skipped; rows stored by an earlier run
+        are counted in 'replayed'.
+        
+        Rejected rows ('error_count') and duplicates ('skipped_row_count')
+        are recorded in an ImportErrorSink: the result keeps the first
+        config.IMPORT_ERROR_SAMPLE_SIZE messages of each ('errors',
+        'skipped_rows'), counts by code and column ('error_summary') and the
+        path of the CSV report of every row ('error_report', None when there
+        is none).
+        
+        kind, column_mapping and options (the import method's other keyword
+        arguments) are recorded in the import journal so resume() can run the
+        import again; 'job_id' in the result is its journal id.
+        Inside import_progress() the import reports progress after each chunk
+        and can be cancelled between chunks ('cancelled': True in the result).
+        """
+        stats = {
+            'total': 0,
+            'imported': 0,
+            'skipped': 0,
+            'replayed': 0,
+            'issues': None
+        }
+        started = time.perf_counter()
+        listener = _progress_listener.get()
+        job_id = None
         
         try:
-            df = self.load_file(file_path)
-            if df is None or df.empty:
-                return {'success': False, 'error': 'File is empty'}
-            
-            visit_service = VisitService()
-            imported, skipped, errors = 0, 0, []
-            
-            for idx, row in df.iterrows():
-                try:
-                    data = {}
-                    for field, column in column_mapping.items():
-                        if column in row.index and pd.notna(row[column]):
-                            value = row[column]
-                            if field == 'test_date':
-                                data[field] = pd.to_datetime(value, dayfirst=True, errors='coerce').date()
-                            elif field == 'result_value':
-                                try:
-                                    data[field] = float(value)
-                                except:
-                                    data['result_text'] = str(value)
-                            else:
-                                data[field] = str(value).strip()
-                    
-                    if 'patient_code' not in data or 'test_type_name' not in data:
-                        errors.append(f"Row {idx + 2}: Missing required fields")
-                        continue
-                    
-                    # Get patient
-                    patient = self.patient_service.get_patient_by_code(data['patient_code'])
-                    if not patient:
-                        errors.append(f"Row {idx + 2}: Patient {data['patient_code']} not found")
-                        continue
-                    
-                    # Get test type
-                    test_type = self.test_service.get_test_type_by_name(data['test_type_name'])
-                    if not test_type:
-                        errors.append(f"Row {idx + 2}: Test type '{data['test_type_name']}' not found")
-                        continue
-                    
-                    # Get test date
-                    test_date = data.get('test_date', datetime.now().date())
-                    
-                    # Find or create visit for this date
-                    # Try to find existing visit on the same date
-                    from database.models import Visit
-                    from database.db_manager import get_db_manager
-                    db_manager = get_db_manager()
-                    session = db_manager.get_session()
-                    
-                    try:
-                        visit = session.query(Visit).filter(
-                            Visit.patient_id == patient.id,
-                            Visit.visit_date == test_date
-                        ).first()
-                        
-                        if not visit:
-                            # Create new visit for this test
-                            visit = visit_service.create_visit(
-                                patient_id=patient.id,
-                                visit_date=test_date,
-                                symptoms=f"Xét nghiệm {data['test_type_name']}",
-                                diagnosis="Xét nghiệm",
-                                conclusion="",
-                                notes=f"Tự động tạo từ import test results"
-                            )
-                        
-                        # Create test result with visit_id
-                        self.test_service.create_test_result(
-                            visit_id=visit.id,
-                            test_type_id=test_type.id,
-                            test_date=test_date,
-                            result_value=data.get('result_value'),
-                            result_text=data.get('result_text'),
-                            unit=test_type.unit,
-                            notes=data.get('notes')
-                        )
-                        imported += 1
-                    finally:
-                        session.close()
-                        
-                except Exception as e:
-                    errors.append(f"Row {idx + 2}: {str(e)}")
-            
-            return {'success': True, 'total': len(df), 'imported': imported, 'skipped': skipped, 'errors': errors}
+            job_id, chunk_size, first_chunk = self._open_journal(
+                kind, file_path, column_mapping, options or {}, stats
+            )
+            stats['issues'] = ImportErrorSink(report_path(file_path, job_id), append=first_chunk > 0)
+            expected = self.count_rows(file_path) if listener is not None else None
+            if listener is not None:
+                listener.publish(_progress(stats, started, expected))
+            for chunk_number, chunk in enumerate(self.iter_chunks(file_path, chunk_size)):
+                if listener is not None and listener.cancel_event.is_set():
+                    self._close_journal(job_id, 'cancelled')
+                    stats.update(_throughput(stats, started))
+                    return _result(stats, success=False, cancelled=True, job_id=job_id,
+                                   error='Import cancelled')
+                if chunk_number < first_chunk:
+                    continue  # committed by an earlier run
+                stats['total'] += len(chunk)
+                records = transform(chunk, stats)
+                self._write_chunk(records, write, stats, job_id, chunk_number)
+                if listener is not None:
+                    listener.publish(_progress(stats, started, expected))
         except Exception as e:
-            return {'success': False, 'error': str(e)}
+            if job_id is not None:
+                self._close_journal(job_id, 'failed', str(e))
+            stats.update(_throughput(stats, started))
+            return _result(stats, success=False, job_id=job_id, error=str(e))
+        
+        if stats['total'] == 0:
+            self._close_journal(job_id, 'failed', 'File is empty')
+            stats.update(_throughput(stats, started))
+            return _result(stats, success=False, job_id=job_id, error='File is empty')
+        
+        self._close_journal(job_id, 'done')
+        stats.update(_throughput(stats, started))
+        return _result(stats, job_id=job_id, success=True)
+    
+    def _write_chunk(self, records: List[tuple], write, stats: Dict[str, Any],
+                     job_id: int, chunk_number: int):
+        """
+        Write a chunk and its journal checkpoint in one transaction, falling
+        back to one row per transaction and a checkpoint after the last row;
+        rows committed before an interruption there are replay-safe (natural
+        keys or source_ref)
+        """
+        try:
+            with self.db_manager.session_scope() as session:
+                written, rejected = _outcome(write(session, [record for _, record in records]), records) \
+                    if records else (0, [])
+                replayed = len(records) - written - len(rejected)
+                self._checkpoint(session, job_id, chunk_number, stats['total'], stats['imported'] + written,
+                                 stats['skipped'] + replayed + len(rejected))
+            stats['imported'] += written
+            stats['skipped'] += replayed
+            stats['replayed'] += replayed
+            for row_number, code, column, message in rejected:
+                _add_error(stats, row_number, message, code, column)
+            return
+        except Exception:
+            pass
+        
+        for row_number, record in records:
+            try:
+                with self.db_manager.session_scope() as session:
+                    written, rejected = _outcome(write(session, [record]), [record])
+                replayed = 1 - written - len(rejected)
+                stats['imported'] += written
+                stats['skipped'] += replayed
+                stats['replayed'] += replayed
+                for _, code, column, message in rejected:
+                    _add_error(stats, row_number, message, code, column)
+            except Exception as e:
+                _add_error(stats, row_number, str(e))
+        
+        with self.db_manager.session_scope() as session:
+            self._checkpoint(session, job_id, chunk_number, stats['total'],
+                             stats['imported'], stats['skipped'])
+    
+    # ===== Journal =====
+    
+    def resume(self, job_id: int) -> Dict[str, Any]:
+        """
+        Continue an import recorded in the journal after its last committed
+        chunk, with the mapping and options it was started with
+        The file must be unchanged; the result counts the rows of both runs
+        ('resumed_from' is the number of rows the earlier runs had read)
+        """
+        with self.db_manager.session_scope() as session:
+            entry = session.get(ImportJournal, job_id)
+            if entry is None:
+                return {'success': False, 'error': f"Import job {job_id} not found"}
+            if entry.status == 'done':
+                return {'success': False, 'error': f"Import job {job_id} has already completed"}
+            kind, file_path, fingerprint = entry.kind, entry.file_path, entry.file_fingerprint
+            column_mapping, options = json.loads(entry.column_mapping), json.loads(entry.options)
+        
+        if not Path(file_path).exists():
+            return {'success': False, 'error': f"File {file_path} no longer exists"}
+        if file_fingerprint(file_path) != fingerprint:
+            return {'success': False, 'error': "File has changed since the import started"}
+        
+        token = _resumed_job.set(job_id)
+        try:
+            return getattr(self, IMPORT_METHODS[kind])(file_path, column_mapping, **options)
+        finally:
+            _resumed_job.reset(token)
+    
+    def get_import_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Journal entry of an import as a dict, or None"""
+        with self.db_manager.session_scope() as session:
+            entry = session.get(ImportJournal, job_id)
+            return _journal_dict(entry) if entry is not None else None
+    
+    def last_import(self) -> Optional[Dict[str, Any]]:
+        """
+        Journal entry of the most recent import as a dict, or None
+        Status 'running' with no import running means the app stopped during it
+        """
+        with self.db_manager.session_scope() as session:
+            entry = session.scalars(
+                select(ImportJournal).order_by(ImportJournal.id.desc()).limit(1)
+            ).first()
+            return _journal_dict(entry) if entry is not None else None
+    
+    def _open_journal(self, kind: str, file_path: str, column_mapping: Dict[str, str],
+                      options: Dict[str, Any], stats: Dict[str, Any]) -> tuple:
+        """
+        Journal entry of this run: a new one, or the entry resume() is
+        continuing, whose counts are carried into stats
+        Returns (job_id, chunk_size, first chunk to import)
+        """
+        job_id = _resumed_job.get()
+        with self.db_manager.session_scope() as session:
+            if job_id is None:
+                entry = ImportJournal(
+                    kind=kind,
+                    file_path=str(file_path),
+                    file_fingerprint=file_fingerprint(file_path),
+                    column_mapping=json.dumps(column_mapping, ensure_ascii=False),
+                    options=json.dumps(options),
+                    chunk_size=self.chunk_size
+                )
+                session.add(entry)
+                session.flush()
+                return entry.id, entry.chunk_size, 0
+            
+            entry = session.get(ImportJournal, job_id)
+            entry.status = 'running'
+            entry.error = None
+            stats.update(total=entry.row_offset, imported=entry.imported, skipped=entry.skipped,
+                         resumed_from=entry.row_offset)
+            return entry.id, entry.chunk_size, entry.last_chunk + 1
+    
+    def _checkpoint(self, session, job_id: int, chunk_number: int, row_offset: int,
+                    imported: int, skipped: int):
+        """Record chunk_number as committed, inside the chunk's transaction"""
+        session.execute(
+            update(ImportJournal)
+            .where(ImportJournal.id == job_id)
+            .values(last_chunk=chunk_number, row_offset=row_offset, imported=imported,
+                    skipped=skipped, updated_at=datetime.now())
+        )
+    
+    def _close_journal(self, job_id: int, status: str, error: str = None):
+        with self.db_manager.session_scope() as session:
+            session.execute(
+                update(ImportJournal)
+                .where(ImportJournal.id == job_id)
+                .values(status=status, error=error, updated_at=datetime.now())
+            )
+    
+    
+    # ===== Key resolution =====
+    
+    def _lookup(self, statement, column, keys, session=None,
+                keys_per_query: int = IN_CLAUSE_LIMIT) -> list:
+        """
+        Rows of statement restricted to column IN keys, split into queries of
+        keys_per_query keys; runs in session when given, else in its own
+        """
+        if session is None:
+            with self.db_manager.session_scope() as session:
+                return self._lookup(statement, column, keys, session, keys_per_query)
+        
+        keys = list(keys)
+        rows = []
+        for start in range(0, len(keys), keys_per_query):
+            rows.extend(session.execute(statement.where(column.in_(keys[start:start + keys_per_query]))))
+        return rows
+    
+    def _existing_keys(self, column, keys) -> set:
+        """Which of keys are already stored in column"""
+        return {key for key, in self._lookup(select(column), column, keys)}
+    
+    def _patient_ids(self, codes: Iterable[str]) -> Dict[str, int]:
+        """Patient id of each of the (distinct) codes that exists"""
+        return dict(self._lookup(select(Patient.patient_code, Patient.id), Patient.patient_code, codes))
+    
+    def _test_types(self, names: Iterable[str]) -> Dict[str, tuple]:
+        """(id, unit) of each of the (distinct) test type names that exists"""
+        return {
+            name: (type_id, unit)
+            for name, type_id, unit in self._lookup(
+                select(TestType.name, TestType.id, TestType.unit), TestType.name, names
+            )
+        }
+    
+    def _visit_ids(self, session, keys: Dict[tuple, str]) -> Dict[tuple, int]:
+        """
+        Visit id of each (patient_id, visit_date) in keys, creating the missing
+        visits in one batch; keys maps to the test type name used in the
+        created visit's symptoms
+        """
+        existing = select(Visit.patient_id, Visit.visit_date, func.min(Visit.id)) \
+            .group_by(Visit.patient_id, Visit.visit_date)
+        visit_ids = {
+            (patient_id, visit_date): visit_id
+            for patient_id, visit_date, visit_id in self._lookup(
+                existing, tuple_(Visit.patient_id, Visit.visit_date), keys, session,
+                keys_per_query=IN_CLAUSE_LIMIT // 2
+            )
+        }
+        
+        missing = [key for key in keys if key not in visit_ids]
+        if missing:
+            created = session.execute(
+                _bulk_insert(Visit).returning(Visit.patient_id, Visit.visit_date, Visit.id),
+                [
+                    {
+                        'patient_id': patient_id,
+                        'visit_date': visit_date,
+                        'symptoms': f"Xét nghiệm {keys[(patient_id, visit_date)]}",
+                        'diagnosis': "Xét nghiệm",
+                        'conclusion': "",
+                        'notes': "Tự động tạo từ import test results"
+                    }
+                    for patient_id, visit_date in missing
+                ]
+            )
+            visit_ids.update({(patient_id, visit_date): visit_id for patient_id, visit_date, visit_id in created})
+        return visit_ids
+
+
+def _staged(column_mapping: Dict[str, str], fields: Dict[str, str], source: str, merge) -> tuple:
+    """
+    transform and write of the SQL engine: the chunk's raw cells go to
+    merge(session, rows) (see import_staging), which validates them
+    """
+    def transform(chunk, stats):
+        if isinstance(chunk, RowChunk):
+            return [
+                (position + 2, {**row, 'row_number': position + 2, 'source_ref': f"{source}:{position + 2}"})
+                for position, row in zip(chunk.positions, raw_rows(chunk, column_mapping, fields))
+            ]
+        from services.import_frames import raw_columns, records, source_refs
+        
+        return records(raw_columns(chunk, column_mapping, fields).assign(
+            row_number=chunk.index + 2,
+            source_ref=source_refs(source, chunk.index)
+        ))
+    
+    def write(session, rows):
+        return merge(session, rows)
+    
+    return transform, write
+
+
+def file_fingerprint(file_path: str) -> str:
+    """sha256 of a file's content; remembered per (path, size, mtime)"""
+    stat = os.stat(file_path)
+    return _fingerprint(str(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _fingerprint(file_path: str, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _source_prefix(file_path: str) -> str:
+    """Prefix of the source_refs of a file's rows: its content, not its name"""
+    return file_fingerprint(file_path)[:16]
+
+
+def _journal_dict(entry: ImportJournal) -> Dict[str, Any]:
+    return {
+        'job_id': entry.id,
+        'kind': entry.kind,
+        'file_path': entry.file_path,
+        'status': entry.status,
+        'row_offset': entry.row_offset,
+        'imported': entry.imported,
+        'skipped': entry.skipped,
+        'error': entry.error,
+        'updated_at': entry.updated_at
+    }
+
+
+def _add_error(stats: Dict[str, Any], row_number: int, message: str,
+               code: str = WRITE_FAILED, column: str = None):
+    """Record a rejected row"""
+    stats['issues'].add(ERROR, row_number, code, message, column)
+    stats['skipped'] += 1
+
+
+def _require(stats: Dict[str, Any], frame: "pd.DataFrame", fields: List[str], message: str) -> "pd.DataFrame":
+    """
+    Rows of frame with a value in every one of fields; the others are
+    rejected, counted under the first field they miss
+    """
+    from services.import_frames import missing_fields
+    
+    missing = missing_fields(frame, fields)
+    for idx, field in missing.dropna().items():
+        _add_error(stats, idx + 2, message, MISSING_REQUIRED, field)
+    return frame[missing.isna()]
+
+
+def _add_missing(stats: Dict[str, Any], keys: "pd.Series", resolved: "pd.Series", message: str):
+    """Record rows whose key did not resolve; message is formatted with the key"""
+    missing = resolved.isna()
+    for idx, key in keys[missing].items():
+        _add_error(stats, idx + 2, message.format(key), NOT_FOUND, keys.name)
+
+
+def _typed_rows(chunk: RowChunk, column_mapping: Dict[str, str], fields: Dict[str, str]) -> List[tuple]:
+    """(row_number, record) pairs of a CSV chunk's fields, converted by csv_reader.typed_rows"""
+    return list(zip([position + 2 for position in chunk.positions], typed_rows(chunk, column_mapping, fields)))
+
+
+def _row_numbers(rows: List[tuple]) -> List[int]:
+    return [row_number for row_number, _ in rows]
+
+
+def _keep(rows: List[tuple], keep: List[bool]) -> List[tuple]:
+    return [row for row, kept in zip(rows, keep) if kept]
+
+
+def _require_rows(stats: Dict[str, Any], rows: List[tuple], fields: List[str], message: str) -> List[tuple]:
+    """_require for (row_number, record) pairs"""
+    kept = []
+    for row_number, record in rows:
+        missing = next((field for field in fields if record[field] is None), None)
+        if missing is None:
+            kept.append((row_number, record))
+        else:
+            _add_error(stats, row_number, message, MISSING_REQUIRED, missing)
+    return kept
+
+
+def _resolve_rows(stats: Dict[str, Any], rows: List[tuple], field: str, resolved: Dict[Any, Any],
+                  message: str) -> List[tuple]:
+    """
+    (row_number, record) pairs whose field value is a key of resolved; the
+    others are rejected, message formatted with the value (_add_missing)
+    """
+    kept = []
+    for row_number, record in rows:
+        if record[field] in resolved:
+            kept.append((row_number, record))
+        else:
+            _add_error(stats, row_number, message.format(record[field]), NOT_FOUND, field)
+    return kept
+
+
+def _split_value(text: Optional[str]) -> Tuple[Optional[float], Optional[str]]:
+    """(result_value, result_text) of one cell, as import_frames.split_result"""
+    number = parse_number(text)
+    return (number, None) if number is not None else (None, text)
+
+
+def _result(stats: Dict[str, Any], **fields) -> Dict[str, Any]:
+    """
+    An import's result: stats and fields, with the error sink closed and
+    replaced by its samples, counts, summary and report path
+    """
+    issues = stats.pop('issues')
+    result = {**stats, **fields, 'errors': [], 'error_count': 0, 'skipped_rows': [],
+              'skipped_row_count': 0, 'error_summary': [], 'error_report': None}
+    if issues is not None:
+        result.update(
+            errors=issues.samples[ERROR],
+            error_count=issues.counts[ERROR],
+            skipped_rows=issues.samples[SKIPPED],
+            skipped_row_count=issues.counts[SKIPPED],
+            error_summary=issues.summary(),
+            error_report=issues.close()
+        )
+    return result
+
+
+def _bulk_insert(model):
+    """
+    ORM bulk INSERT that binds None values; without render_nulls rows are
+    grouped by which columns are None and a chunk is sent as many statements
+    """
+    return insert(model).execution_options(render_nulls=True)
+
+
+def _insert_new(session, model, rows: List[Dict[str, Any]]) -> int:
+    """
+    Bulk INSERT of rows carrying a source_ref, skipping those an earlier run
+    of the same file stored already; returns the number inserted
+    """
+    statement = sqlite_insert(model).on_conflict_do_nothing(index_elements=['source_ref'])
+    statement = statement.execution_options(render_nulls=True).returning(model.id)
+    return len(session.execute(statement, rows).all())
+
+
+def _outcome(result, records: list) -> Tuple[int, List[Tuple[int, str, str, str]]]:
+    """
+    (rows stored, rejected (row_number, code, column, message)) from a
+    write's return value: None (all records stored), a count, or a
+    (count, rejected) pair
+    """
+    if result is None:
+        return len(records), []
+    if isinstance(result, tuple):
+        return result
+    return result, []
+
+
+def _unique_rows(row_numbers: List[int], keys: Iterable, existing: set, seen: Dict[Any, int],
+                 stats: Dict[str, Any], label: str, column: str, names: Iterable = None) -> List[bool]:
+    """
+    Keep-mask dropping rows whose key is stored already or appeared in an
+    earlier row of the file; seen maps keys to their first row and carries
+    over between chunks. keys (and names) hold a value per row of
+    row_numbers. Each dropped row is reported in 'skipped_rows', by its
+    names value when the key is a normalized form of it, under the key's
+    field (column)
+    """
+    keep = []
+    for row_number, key, name in zip(row_numbers, keys, keys if names is None else names):
+        if key in existing:
+            _add_skip(stats, row_number, f"{label} '{name}' already exists", ALREADY_EXISTS, column)
+        elif key in seen:
+            _add_skip(stats, row_number, f"{label} '{name}' duplicates row {seen[key]}", DUPLICATE_ROW, column)
+        else:
+            seen[key] = row_number
+            keep.append(True)
+            continue
+        keep.append(False)
+    return keep
+
+
+def _add_skip(stats: Dict[str, Any], row_number: int, reason: str, code: str, column: str):
+    """Record a row left out on purpose (a duplicate)"""
+    stats['issues'].add(SKIPPED, row_number, code, reason, column)
+    stats['skipped'] += 1
+
+
+def _normalize_name(name: str) -> str:
+    """Name compared case-insensitively with runs of whitespace collapsed"""
+    return " ".join(name.split()).casefold()
+
+
+def _throughput(stats: Dict[str, Any], started: float) -> Dict[str, float]:
+    """Elapsed seconds and rows per second so far, in this run"""
+    elapsed = time.perf_counter() - started
+    rows = stats['total'] - stats.get('resumed_from', 0)
+    return {
+        'elapsed': round(elapsed, 3),
+        'rows_per_second': round(rows / elapsed) if elapsed > 0 else 0
+    }
+
+
+def _progress(stats: Dict[str, Any], started: float, expected: Optional[int]) -> Dict[str, Any]:
+    """
+    Progress event for import_progress listeners
+    expected is the estimated number of data rows (None if unknown); eta is
+    the estimated seconds left at the current rate
+    """
+    throughput = _throughput(stats, started)
+    rate = throughput['rows_per_second']
+    eta = None
+    if expected and rate:
+        eta = round(max(expected - stats['total'], 0) / rate, 1)
+    return {
+        'parsed': stats['total'],
+        'written': stats['imported'],
+        'skipped': stats['skipped'],
+        'errors': stats['issues'].counts[ERROR],
+        'expected': expected,
+        **throughput,
+        'eta': eta
+    }
+
+
+
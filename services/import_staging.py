@@ -0,0 +1,261 @@
+"""
+Import Staging
+SQL engine for imports (config.IMPORT_ENGINE = 'sql'): the raw mapped cells
+of a chunk are loaded into a temporary staging table with executemany, then
+cleaned, validated, resolved to ids and merged by set-based statements
+inside SQLite. Rows the statements reject keep their reason in the staging
+table's error columns (code, column, message), which are returned as the
+chunk's error report.
+"""
+from datetime import date, datetime
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import Column, DateTime, Integer, MetaData, Numeric, Table, Text, bindparam, column, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import CreateTable
+from database.models import Visit, TestResult
+from services.import_errors import MISSING_REQUIRED, NOT_FOUND
+
+# Staging tables are TEMPORARY (per connection) and not part of the app schema
+_metadata = MetaData()
+
+
+def _staging_table(name: str, *columns: Column) -> Table:
+    """Staging table with the given columns plus those every import uses"""
+    return Table(
+        name, _metadata,
+        Column("row_number", Integer, primary_key=True),
+        *columns,
+        Column("source_ref", Text),
+        # Filled by the set-based steps
+        Column("day", Integer),
+        Column("month", Integer),
+        Column("year", Integer),
+        Column("patient_id", Integer),
+        Column("error", Text),
+        Column("error_code", Text),
+        Column("error_column", Text),
+        prefixes=["TEMPORARY"]
+    )
+
+
+TEST_RESULT_STAGING = _staging_table(
+    "staging_test_results",
+    Column("patient_code", Text),
+    Column("test_type_name", Text),
+    Column("test_date", Text),
+    Column("result_value", Text),
+    Column("result_text", Text),
+    Column("notes", Text),
+    # Derived
+    Column("result_number", Numeric),
+    Column("test_type_id", Integer),
+    Column("unit", Text),
+    Column("visit_id", Integer)
+)
+
+VISIT_STAGING = _staging_table(
+    "staging_visits",
+    Column("patient_code", Text),
+    Column("visit_date", Text),
+    Column("symptoms", Text),
+    Column("diagnosis", Text),
+    Column("conclusion", Text),
+    Column("notes", Text)
+)
+
+# Raw cells that are loaded; the other columns are derived
+TEST_RESULT_CELLS = ("patient_code", "test_type_name", "test_date", "result_value", "result_text", "notes")
+VISIT_CELLS = ("patient_code", "visit_date", "symptoms", "diagnosis", "conclusion", "notes")
+
+Rejected = List[Tuple[int, str, str, str]]  # (row_number, code, column, message)
+
+
+def merge_test_results(session, rows: List[Dict[str, Any]]) -> Tuple[int, Rejected]:
+    """
+    Stage and merge a chunk of test results (import_test_results_batch)
+    Returns (rows inserted, [(row_number, code, column, message), ...]);
+    valid rows not inserted were stored by an earlier run (source_ref)
+    """
+    staging = TEST_RESULT_STAGING.name
+    conn = _load(session, TEST_RESULT_STAGING, TEST_RESULT_CELLS, rows)
+
+    _parse_dates(conn, staging, "test_date")
+    # NUMERIC affinity keeps well-formed numbers only, so typeof() tells numbers from text
+    conn.exec_driver_sql(f"UPDATE {staging} SET result_number = result_value")
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET error = 'Missing required fields', error_code = '{MISSING_REQUIRED}',
+            error_column = CASE WHEN patient_code IS NULL THEN 'patient_code' ELSE 'test_type_name' END
+        WHERE patient_code IS NULL OR test_type_name IS NULL
+    """)
+    _resolve_patients(conn, staging)
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET (test_type_id, unit) = (
+            SELECT id, unit FROM test_types WHERE test_types.name = {staging}.test_type_name
+        )
+        WHERE error IS NULL
+    """)
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET error = 'Test type ''' || test_type_name || ''' not found',
+            error_code = '{NOT_FOUND}', error_column = 'test_type_name'
+        WHERE error IS NULL AND test_type_id IS NULL
+    """)
+    conn.exec_driver_sql(
+        f"UPDATE {staging} SET test_date = ? WHERE error IS NULL AND test_date IS NULL",
+        (date.today().isoformat(),)
+    )
+
+    # Same-day visit matching: the patient's first visit on the test date,
+    # created (named after the first row's test) where there is none
+    match_visits = f"""
+        UPDATE {staging} SET visit_id = (
+            SELECT min(id) FROM visits
+            WHERE visits.patient_id = {staging}.patient_id AND visits.visit_date = {staging}.test_date
+        )
+        WHERE error IS NULL AND visit_id IS NULL
+    """
+    conn.exec_driver_sql(match_visits)
+    new_visits = text(f"""
+        SELECT patient_id, test_date, 'Xét nghiệm ' || test_type_name, 'Xét nghiệm', '',
+               'Tự động tạo từ import test results', :now
+        FROM (
+            SELECT patient_id, test_date, test_type_name, min(row_number) AS first_row
+            FROM {staging}
+            WHERE error IS NULL AND visit_id IS NULL
+            GROUP BY patient_id, test_date
+        )
+        ORDER BY first_row
+    """).bindparams(bindparam("now", datetime.now(), type_=DateTime))
+    # The merging INSERT ... SELECTs run through the session rather than conn,
+    # so the tables they write are tracked for cache invalidation
+    created = session.execute(_insert_select(
+        Visit,
+        ["patient_id", "visit_date", "symptoms", "diagnosis", "conclusion", "notes", "created_at"],
+        new_visits
+    )).rowcount
+    if created:
+        conn.exec_driver_sql(match_visits)
+
+    new_results = text(f"""
+        SELECT visit_id, test_type_id,
+               CASE WHEN typeof(result_number) IN ('integer', 'real') THEN result_number END,
+               CASE WHEN result_value IS NOT NULL AND typeof(result_number) = 'text'
+                    THEN result_value ELSE result_text END,
+               unit, test_date, notes, source_ref
+        FROM {staging}
+        WHERE error IS NULL
+        ORDER BY row_number
+    """)
+    inserted = session.execute(_insert_select(
+        TestResult,
+        ["visit_id", "test_type_id", "result_value", "result_text", "unit", "test_date", "notes", "source_ref"],
+        new_results
+    ).on_conflict_do_nothing(index_elements=["source_ref"])).rowcount
+    return inserted, _report(conn, staging)
+
+
+def merge_visits(session, rows: List[Dict[str, Any]]) -> Tuple[int, Rejected]:
+    """Stage and merge a chunk of visits (import_visits); returns like merge_test_results"""
+    staging = VISIT_STAGING.name
+    conn = _load(session, VISIT_STAGING, VISIT_CELLS, rows)
+
+    _parse_dates(conn, staging, "visit_date")
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET error = 'Missing patient_code or visit_date', error_code = '{MISSING_REQUIRED}',
+            error_column = CASE WHEN patient_code IS NULL THEN 'patient_code' ELSE 'visit_date' END
+        WHERE patient_code IS NULL OR visit_date IS NULL
+    """)
+    _resolve_patients(conn, staging)
+
+    new_visits = text(f"""
+        SELECT patient_id, visit_date, symptoms, diagnosis, conclusion, notes, source_ref, :now
+        FROM {staging}
+        WHERE error IS NULL
+        ORDER BY row_number
+    """).bindparams(bindparam("now", datetime.now(), type_=DateTime))
+    inserted = session.execute(_insert_select(
+        Visit,
+        ["patient_id", "visit_date", "symptoms", "diagnosis", "conclusion", "notes", "source_ref", "created_at"],
+        new_visits
+    ).on_conflict_do_nothing(index_elements=["source_ref"])).rowcount
+    return inserted, _report(conn, staging)
+
+
+def _insert_select(model, names: List[str], select_sql):
+    """INSERT INTO model (names) <select_sql>; the SELECT lists its values in that order"""
+    return sqlite_insert(model).from_select(names, select_sql.columns(*(column(name) for name in names)))
+
+
+def _load(session, table: Table, cells: Tuple[str, ...], rows: List[Dict[str, Any]]):
+    """
+    Empty the staging table on the session's connection and load rows into
+    it with one executemany; cells are trimmed and blanks become NULL
+    """
+    conn = session.connection()
+    conn.execute(CreateTable(table, if_not_exists=True))
+    conn.execute(table.delete())
+    conn.execute(table.insert(), [
+        {"row_number": row["row_number"], "source_ref": row["source_ref"],
+         **{cell: row.get(cell) for cell in cells}}
+        for row in rows
+    ])
+    conn.exec_driver_sql(
+        f"UPDATE {table.name} SET "
+        + ", ".join(f"{cell} = NULLIF(TRIM({cell}), '')" for cell in cells)
+    )
+    return conn
+
+
+def _parse_dates(conn, staging: str, column: str):
+    """
+    Rewrite column as yyyy-mm-dd: d/m/yyyy is rebuilt from its parts (month
+    first when the second part cannot be a month, as pandas does), ISO text
+    (an Excel date) is cut to its date part; anything else, and impossible
+    dates such as 31/02, become NULL
+    """
+    first_slash = f"instr({column}, '/')"
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET
+            day = CAST({column} AS INTEGER),
+            month = CAST(substr({column}, {first_slash} + 1) AS INTEGER),
+            year = CAST(substr({column}, {first_slash} + instr(substr({column}, {first_slash} + 1), '/') + 1)
+                        AS INTEGER)
+        WHERE {column} GLOB '[0-9]*/[0-9]*/[0-9][0-9][0-9][0-9]*'
+    """)
+    conn.exec_driver_sql(f"UPDATE {staging} SET day = month, month = day WHERE month > 12")
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET {column} = CASE
+            WHEN year IS NOT NULL THEN printf('%04d-%02d-%02d', year, month, day)
+            WHEN {column} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*' THEN substr({column}, 1, 10)
+        END
+        WHERE {column} IS NOT NULL
+    """)
+    # date() accepts day 31 of any month; a round trip through '+0 days' does not
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET {column} = NULL
+        WHERE {column} IS NOT date({column}, '+0 days')
+    """)
+
+
+def _resolve_patients(conn, staging: str):
+    """patient_code -> patient_id for rows still valid; unknown codes are errors"""
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET patient_id = (
+            SELECT id FROM patients WHERE patients.patient_code = {staging}.patient_code
+        )
+        WHERE error IS NULL
+    """)
+    conn.exec_driver_sql(f"""
+        UPDATE {staging} SET error = 'Patient ' || patient_code || ' not found',
+            error_code = '{NOT_FOUND}', error_column = 'patient_code'
+        WHERE error IS NULL AND patient_id IS NULL
+    """)
+
+
+def _report(conn, staging: str) -> Rejected:
+    """The staging table's rejected rows, in file order"""
+    return [
+        tuple(row) for row in conn.exec_driver_sql(
+            f"SELECT row_number, error_code, error_column, error FROM {staging} "
+            f"WHERE error IS NOT NULL ORDER BY row_number"
+        )
+    ]
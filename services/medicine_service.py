@@ -3,9 +3,10 @@ Medicine Service
 Business logic for medicine catalog and prescription management
 """
 from typing import List, Optional
+from sqlalchemy import insert, update, delete
 from sqlalchemy.orm import joinedload
 from database.models import Medicine, Prescription, Visit
-from database.db_manager import get_db_manager
+from database.db_manager import get_db_manager, cached_query
 
 
 class MedicineService:
@@ -19,24 +20,18 @@ class MedicineService:
     def create_medicine(self, name: str, category: str = None,
                        unit: str = None, description: str = None) -> Medicine:
         """Create a new medicine"""
-        session = self.db_manager.get_session()
-        try:
-            medicine = Medicine(
-                name=name,
-                category=category,
-                unit=unit,
-                description=description,
-                active=True  # Default to active when creating
+        with self.db_manager.session_scope() as session:
+            return session.scalar(
+                insert(Medicine)
+                .values(
+                    name=name,
+                    category=category,
+                    unit=unit,
+                    description=description,
+                    active=True  # Default to active when creating
+                )
+                .returning(Medicine)
             )
-            session.add(medicine)
-            session.commit()  # CRITICAL: Commit to save to database
-            session.refresh(medicine)
-            return medicine
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            session.close()
     
     def get_medicine_by_id(self, medicine_id: int) -> Optional[Medicine]:
         """Get medicine by ID"""
@@ -54,6 +49,7 @@ class MedicineService:
         finally:
             session.close()
     
+    @cached_query
     def get_all_medicines(self, active_only: bool = True) -> List[Medicine]:
         """Get all medicines"""
         session = self.db_manager.get_session()
@@ -65,6 +61,7 @@ class MedicineService:
         finally:
             session.close()
     
+    @cached_query
     def get_medicines_by_category(self, category: str, active_only: bool = True) -> List[Medicine]:
         """Get medicines by category"""
         session = self.db_manager.get_session()
@@ -76,6 +73,7 @@ class MedicineService:
         finally:
             session.close()
     
+    @cached_query
     def search_medicines(self, keyword: str, active_only: bool = True) -> List[Medicine]:
         """Search medicines by name"""
         session = self.db_manager.get_session()
@@ -91,16 +89,16 @@ class MedicineService:
     
     def update_medicine(self, medicine_id: int, **kwargs) -> Optional[Medicine]:
         """Update medicine"""
+        values = {key: value for key, value in kwargs.items() if key in Medicine.__table__.c}
         with self.db_manager.session_scope() as session:
-            medicine = session.query(Medicine).filter(Medicine.id == medicine_id).first()
-            if medicine:
-                for key, value in kwargs.items():
-                    if hasattr(medicine, key):
-                        setattr(medicine, key, value)
-                session.flush()
-                session.refresh(medicine)
-                return medicine
-            return None
+            if not values:
+                return session.get(Medicine, medicine_id)
+            return session.scalar(
+                update(Medicine)
+                .where(Medicine.id == medicine_id)
+                .values(**values)
+                .returning(Medicine)
+            )
     
     def deactivate_medicine(self, medicine_id: int) -> bool:
         """Deactivate a medicine (soft delete)"""
@@ -109,11 +107,8 @@ class MedicineService:
     def delete_medicine(self, medicine_id: int) -> bool:
         """Delete a medicine (hard delete)"""
         with self.db_manager.session_scope() as session:
-            medicine = session.query(Medicine).filter(Medicine.id == medicine_id).first()
-            if medicine:
-                session.delete(medicine)
-                return True
-            return False
+            result = session.execute(delete(Medicine).where(Medicine.id == medicine_id))
+            return result.rowcount > 0
     
     # ===== Prescription Management =====
     
@@ -122,18 +117,18 @@ class MedicineService:
                           duration_days: int = None, notes: str = None) -> Prescription:
         """Create a new prescription"""
         with self.db_manager.session_scope() as session:
-            prescription = Prescription(
-                visit_id=visit_id,
-                medicine_id=medicine_id,
-                dosage=dosage,
-                frequency=frequency,
-                duration_days=duration_days,
-                notes=notes
+            return session.scalar(
+                insert(Prescription)
+                .values(
+                    visit_id=visit_id,
+                    medicine_id=medicine_id,
+                    dosage=dosage,
+                    frequency=frequency,
+                    duration_days=duration_days,
+                    notes=notes
+                )
+                .returning(Prescription)
             )
-            session.add(prescription)
-            session.flush()
-            session.refresh(prescription)
-            return prescription
     
     def get_prescription_by_id(self, prescription_id: int) -> Optional[Prescription]:
         """Get prescription by ID"""
@@ -173,22 +168,19 @@ class MedicineService:
     
     def update_prescription(self, prescription_id: int, **kwargs) -> Optional[Prescription]:
         """Update prescription"""
+        values = {key: value for key, value in kwargs.items() if key in Prescription.__table__.c}
         with self.db_manager.session_scope() as session:
-            prescription = session.query(Prescription).filter(Prescription.id == prescription_id).first()
-            if prescription:
-                for key, value in kwargs.items():
-                    if hasattr(prescription, key):
-                        setattr(prescription, key, value)
-                session.flush()
-                session.refresh(prescription)
-                return prescription
-            return None
+            if not values:
+                return session.get(Prescription, prescription_id)
+            return session.scalar(
+                update(Prescription)
+                .where(Prescription.id == prescription_id)
+                .values(**values)
+                .returning(Prescription)
+            )
     
     def delete_prescription(self, prescription_id: int) -> bool:
         """Delete a prescription"""
         with self.db_manager.session_scope() as session:
-            prescription = session.query(Prescription).filter(Prescription.id == prescription_id).first()
-            if prescription:
-                session.delete(prescription)
-                return True
-            return False
+            result = session.execute(delete(Prescription).where(Prescription.id == prescription_id))
+            return result.rowcount > 0
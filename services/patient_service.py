@@ -4,10 +4,10 @@ Business logic for patient management
 """
 from typing import List, Optional
 from datetime import datetime
-from sqlalchemy import or_
-from sqlalchemy.orm import Session
+from sqlalchemy import or_, insert, update, delete
+from sqlalchemy.orm import Session, joinedload
 from database.models import Patient
-from database.db_manager import get_db_manager
+from database.db_manager import get_db_manager, cached_query
 
 
 class PatientService:
@@ -21,19 +21,19 @@ class PatientService:
                       phone_number=None, address=None, notes=None) -> Patient:
         """Create a new patient"""
         with self.db_manager.session_scope() as session:
-            patient = Patient(
-                patient_code=patient_code,
-                full_name=full_name,
-                date_of_birth=date_of_birth,
-                gender=gender,
-                phone_number=phone_number,
-                address=address,
-                notes=notes
+            return session.scalar(
+                insert(Patient)
+                .values(
+                    patient_code=patient_code,
+                    full_name=full_name,
+                    date_of_birth=date_of_birth,
+                    gender=gender,
+                    phone_number=phone_number,
+                    address=address,
+                    notes=notes
+                )
+                .returning(Patient)
             )
-            session.add(patient)
-            session.flush()
-            session.refresh(patient)
-            return patient
     
     def get_patient_by_id(self, patient_id: int) -> Optional[Patient]:
         """Get patient by ID"""
@@ -53,35 +53,32 @@ class PatientService:
     
     def update_patient(self, patient_id: int, **kwargs) -> Optional[Patient]:
         """Update patient information"""
+        values = {key: value for key, value in kwargs.items() if key in Patient.__table__.c}
+        values['updated_at'] = datetime.now()
         with self.db_manager.session_scope() as session:
-            patient = session.query(Patient).filter(Patient.id == patient_id).first()
-            if patient:
-                for key, value in kwargs.items():
-                    if hasattr(patient, key):
-                        setattr(patient, key, value)
-                patient.updated_at = datetime.now()
-                session.flush()
-                session.refresh(patient)
-                return patient
-            return None
+            return session.scalar(
+                update(Patient)
+                .where(Patient.id == patient_id)
+                .values(**values)
+                .returning(Patient)
+            )
     
     def delete_patient(self, patient_id: int) -> bool:
-        """Delete a patient"""
+        """Delete a patient (visits, results and appointments cascade in the database)"""
         with self.db_manager.session_scope() as session:
-            patient = session.query(Patient).filter(Patient.id == patient_id).first()
-            if patient:
-                session.delete(patient)
-                return True
-            return False
+            result = session.execute(delete(Patient).where(Patient.id == patient_id))
+            return result.rowcount > 0
     
-    def search_patients(self, keyword: str = "", limit: int = 100) -> List[Patient]:
+    @cached_query
+    def search_patients(self, keyword: str = "", limit: int = 100, offset: int = 0) -> List[Patient]:
         """
         Search patients by name, phone, or patient code
-        Returns list of matching patients
+        Returns list of matching patients with their summary row loaded;
+        offset pages through the results (newest first)
         """
         session = self.db_manager.get_session()
         try:
-            query = session.query(Patient)
+            query = session.query(Patient).options(joinedload(Patient.summary))
             
             if keyword:
                 search_pattern = f"%{keyword}%"
@@ -93,10 +90,41 @@ class PatientService:
                     )
                 )
             
-            return query.order_by(Patient.created_at.desc()).limit(limit).all()
+            return query.order_by(Patient.created_at.desc(), Patient.id.desc())\
+                .offset(offset)\
+                .limit(limit)\
+                .all()
+        finally:
+            session.close()
+    
+    @cached_query
+    def search_patients_by_prefix(self, keyword: str, limit: int = 20) -> List[Patient]:
+        """
+        Patients whose name or code starts with keyword (case-insensitive)
+        Each column is read in NOCASE index order and stops after `limit`
+        rows, so the cost per keystroke does not grow with the table
+        """
+        session = self.db_manager.get_session()
+        try:
+            escaped = keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"{escaped}%"
+            
+            patients = {}
+            for column in (Patient.full_name, Patient.patient_code):
+                matches = session.query(Patient)\
+                    .filter(column.like(pattern, escape="\\"))\
+                    .order_by(column.collate('NOCASE'))\
+                    .limit(limit)\
+                    .all()
+                for patient in matches:
+                    patients.setdefault(patient.id, patient)
+            
+            ordered = sorted(patients.values(), key=lambda p: (p.full_name.lower(), p.id))
+            return ordered[:limit]
         finally:
             session.close()
     
+    @cached_query
     def get_all_patients(self, limit: int = 1000) -> List[Patient]:
         """Get all patients"""
         session = self.db_manager.get_session()
@@ -125,6 +153,7 @@ class PatientService:
         finally:
             session.close()
     
+    @cached_query
     def get_patient_count(self) -> int:
         """Get total number of patients"""
         session = self.db_manager.get_session()
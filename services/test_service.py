@@ -5,9 +5,9 @@ Business logic for test types and test results management
 from typing import List, Optional, Dict, Any
 from datetime import date
 from sqlalchemy.orm import joinedload
-from sqlalchemy import and_
+from sqlalchemy import and_, insert, update, delete
 from database.models import TestType, TestResult, Visit
-from database.db_manager import get_db_manager
+from database.db_manager import get_db_manager, cached_query
 
 
 class TestService:
@@ -23,18 +23,18 @@ class TestService:
                         normal_range_max: float = None, description: str = None) -> TestType:
         """Create a new test type"""
         with self.db_manager.session_scope() as session:
-            test_type = TestType(
-                name=name,
-                category=category,
-                unit=unit,
-                normal_range_min=normal_range_min,
-                normal_range_max=normal_range_max,
-                description=description
+            return session.scalar(
+                insert(TestType)
+                .values(
+                    name=name,
+                    category=category,
+                    unit=unit,
+                    normal_range_min=normal_range_min,
+                    normal_range_max=normal_range_max,
+                    description=description
+                )
+                .returning(TestType)
             )
-            session.add(test_type)
-            session.flush()
-            session.refresh(test_type)
-            return test_type
     
     def get_test_type_by_id(self, test_type_id: int) -> Optional[TestType]:
         """Get test type by ID"""
@@ -52,6 +52,7 @@ class TestService:
         finally:
             session.close()
     
+    @cached_query
     def get_all_test_types(self) -> List[TestType]:
         """Get all test types"""
         session = self.db_manager.get_session()
@@ -60,6 +61,7 @@ class TestService:
         finally:
             session.close()
     
+    @cached_query
     def get_test_types_by_category(self, category: str) -> List[TestType]:
         """Get test types by category"""
         session = self.db_manager.get_session()
@@ -73,25 +75,22 @@ class TestService:
     
     def update_test_type(self, test_type_id: int, **kwargs) -> Optional[TestType]:
         """Update test type"""
+        values = {key: value for key, value in kwargs.items() if key in TestType.__table__.c}
         with self.db_manager.session_scope() as session:
-            test_type = session.query(TestType).filter(TestType.id == test_type_id).first()
-            if test_type:
-                for key, value in kwargs.items():
-                    if hasattr(test_type, key):
-                        setattr(test_type, key, value)
-                session.flush()
-                session.refresh(test_type)
-                return test_type
-            return None
+            if not values:
+                return session.get(TestType, test_type_id)
+            return session.scalar(
+                update(TestType)
+                .where(TestType.id == test_type_id)
+                .values(**values)
+                .returning(TestType)
+            )
     
     def delete_test_type(self, test_type_id: int) -> bool:
         """Delete a test type"""
         with self.db_manager.session_scope() as session:
-            test_type = session.query(TestType).filter(TestType.id == test_type_id).first()
-            if test_type:
-                session.delete(test_type)
-                return True
-            return False
+            result = session.execute(delete(TestType).where(TestType.id == test_type_id))
+            return result.rowcount > 0
     
     # ===== Test Result Management =====
     
@@ -101,19 +100,19 @@ class TestService:
                           notes: str = None) -> TestResult:
         """Create a new test result"""
         with self.db_manager.session_scope() as session:
-            test_result = TestResult(
-                visit_id=visit_id,
-                test_type_id=test_type_id,
-                test_date=test_date,
-                result_value=result_value,
-                result_text=result_text,
-                unit=unit,
-                notes=notes
+            return session.scalar(
+                insert(TestResult)
+                .values(
+                    visit_id=visit_id,
+                    test_type_id=test_type_id,
+                    test_date=test_date,
+                    result_value=result_value,
+                    result_text=result_text,
+                    unit=unit,
+                    notes=notes
+                )
+                .returning(TestResult)
             )
-            session.add(test_result)
-            session.flush()
-            session.refresh(test_result)
-            return test_result
     
     def get_test_result_by_id(self, result_id: int) -> Optional[TestResult]:
         """Get test result by ID"""
@@ -140,25 +139,22 @@ class TestService:
     
     def update_test_result(self, result_id: int, **kwargs) -> Optional[TestResult]:
         """Update test result"""
+        values = {key: value for key, value in kwargs.items() if key in TestResult.__table__.c}
         with self.db_manager.session_scope() as session:
-            result = session.query(TestResult).filter(TestResult.id == result_id).first()
-            if result:
-                for key, value in kwargs.items():
-                    if hasattr(result, key):
-                        setattr(result, key, value)
-                session.flush()
-                session.refresh(result)
-                return result
-            return None
+            if not values:
+                return session.get(TestResult, result_id)
+            return session.scalar(
+                update(TestResult)
+                .where(TestResult.id == result_id)
+                .values(**values)
+                .returning(TestResult)
+            )
     
     def delete_test_result(self, result_id: int) -> bool:
         """Delete a test result"""
         with self.db_manager.session_scope() as session:
-            result = session.query(TestResult).filter(TestResult.id == result_id).first()
-            if result:
-                session.delete(result)
-                return True
-            return False
+            result = session.execute(delete(TestResult).where(TestResult.id == result_id))
+            return result.rowcount > 0
     
     # ===== Timeline Queries (Key Feature) =====
     
@@ -4,9 +4,10 @@ Business logic for visit/examination management
 """
 from typing import List, Optional
 from datetime import date, datetime
+from sqlalchemy import insert, update, delete
 from sqlalchemy.orm import joinedload
 from database.models import Visit, Patient
-from database.db_manager import get_db_manager
+from database.db_manager import get_db_manager, cached_query
 
 
 class VisitService:
@@ -18,32 +19,23 @@ class VisitService:
     def create_visit(self, patient_id: int, visit_date: date,
                      symptoms: str = None, diagnosis: str = None,
                      conclusion: str = None, notes: str = None) -> Visit:
-        """Create a new visit"""
-        session = self.db_manager.get_session()
-        try:
-            new_visit = Visit(
-                patient_id=patient_id,
-                visit_date=visit_date,
-                symptoms=symptoms,
-                diagnosis=diagnosis,
-                conclusion=conclusion,
-                notes=notes
+        """
+        Create a new visit
+        Related objects are not loaded; use get_visit_by_id when they are needed
+        """
+        with self.db_manager.session_scope() as session:
+            return session.scalar(
+                insert(Visit)
+                .values(
+                    patient_id=patient_id,
+                    visit_date=visit_date,
+                    symptoms=symptoms,
+                    diagnosis=diagnosis,
+                    conclusion=conclusion,
+                    notes=notes
+                )
+                .returning(Visit)
             )
-            session.add(new_visit)
-            session.commit()
-            
-            # Get the visit ID before closing session
-            visit_id = new_visit.id
-            session.close()
-            
-            # Return fresh visit with eager loaded patient
-            return self.get_visit_by_id(visit_id)
-        except Exception as e:
-            session.rollback()
-            raise e
-        finally:
-            if session.is_active:
-                session.close()
     
     def get_visit_by_id(self, visit_id: int) -> Optional[Visit]:
         """Get visit by ID with related data"""
@@ -62,25 +54,22 @@ class VisitService:
     
     def update_visit(self, visit_id: int, **kwargs) -> Optional[Visit]:
         """Update visit information"""
+        values = {key: value for key, value in kwargs.items() if key in Visit.__table__.c}
         with self.db_manager.session_scope() as session:
-            visit = session.query(Visit).filter(Visit.id == visit_id).first()
-            if visit:
-                for key, value in kwargs.items():
-                    if hasattr(visit, key):
-                        setattr(visit, key, value)
-                session.flush()
-                session.refresh(visit)
-                return visit
-            return None
+            if not values:
+                return session.get(Visit, visit_id)
+            return session.scalar(
+                update(Visit)
+                .where(Visit.id == visit_id)
+                .values(**values)
+                .returning(Visit)
+            )
     
     def delete_visit(self, visit_id: int) -> bool:
-        """Delete a visit"""
+        """Delete a visit (results, prescriptions and appointment cascade in the database)"""
         with self.db_manager.session_scope() as session:
-            visit = session.query(Visit).filter(Visit.id == visit_id).first()
-            if visit:
-                session.delete(visit)
-                return True
-            return False
+            result = session.execute(delete(Visit).where(Visit.id == visit_id))
+            return result.rowcount > 0
     
     def get_patient_visits(self, patient_id: int, limit: int = 100) -> List[Visit]:
         """Get all visits for a specific patient"""
@@ -94,13 +83,15 @@ class VisitService:
         finally:
             session.close()
     
-    def get_recent_visits(self, limit: int = 50) -> List[Visit]:
-        """Get recent visits across all patients"""
+    @cached_query
+    def get_recent_visits(self, limit: int = 50, offset: int = 0) -> List[Visit]:
+        """Get recent visits across all patients; offset pages further back"""
         session = self.db_manager.get_session()
         try:
             return session.query(Visit)\
                 .options(joinedload(Visit.patient))\
-                .order_by(Visit.visit_date.desc())\
+                .order_by(Visit.visit_date.desc(), Visit.id.desc())\
+                .offset(offset)\
                 .limit(limit)\
                 .all()
         finally:
@@ -119,6 +110,7 @@ class VisitService:
         finally:
             session.close()
     
+    @cached_query
     def get_visit_count(self) -> int:
         """Get total number of visits"""
         session = self.db_manager.get_session()
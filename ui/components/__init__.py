@@ -1,16 +1,23 @@
 """UI Components package initialization"""
-from .patient_panel import PatientPanel
-from .visit_panel import VisitPanel
-from .test_panel import TestPanel
-from .appointment_panel import AppointmentPanel
-from .medicine_panel import MedicinePanel
-from .import_panel import ImportPanel
+import importlib
 
-__all__ = [
-    'PatientPanel',
-    'VisitPanel',
-    'TestPanel',
-    'AppointmentPanel',
-    'MedicinePanel',
-    'ImportPanel'
-]
+# Panels are imported when first shown, not at startup
+_PANELS = {
+    'DashboardPanel': '.dashboard_panel',
+    'PatientPanel': '.patient_panel',
+    'VisitPanel': '.visit_panel',
+    'TestPanel': '.test_panel',
+    'AppointmentPanel': '.appointment_panel',
+    'MedicinePanel': '.medicine_panel',
+    'ImportPanel': '.import_panel',
+}
+
+__all__ = list(_PANELS)
+
+
+def __getattr__(name):
+    if name in _PANELS:
+        value = getattr(importlib.import_module(_PANELS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,12 +6,17 @@ from tkinter import messagebox
 from datetime import date, timedelta
 from services import AppointmentService, PatientService
 from utils import Formatters
+from ui.utils.widgets import VirtualListView
+from ui.utils.patient_picker import PatientPicker
 import config
 
 
 class AppointmentPanel(ctk.CTkFrame):
     """Panel for appointment management"""
     
+    # Tables whose changes make the panel reload when it is shown again
+    DATA_TABLES = ("appointments", "patients")
+    
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
@@ -92,20 +97,26 @@ class AppointmentPanel(ctk.CTkFrame):
         ).pack(side="left", padx=5)
         
         # Appointment list
-        self.list_frame = ctk.CTkScrollableFrame(content)
-        self.list_frame.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
-        self.list_frame.grid_columnconfigure(0, weight=1)
+        self.list_view = VirtualListView(
+            content,
+            create_row=self.create_appointment_card,
+            bind_row=self.bind_appointment_card,
+            row_height=160,
+            empty_text="Không có lịch hẹn nào"
+        )
+        self.list_view.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
     
-    def load_appointments(self, filter_type="upcoming"):
+    def load_appointments(self, filter_type="upcoming", keep_position=False):
         """Load appointments"""
-        # Clear list
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
+        self.current_filter = filter_type
         
         # Clear alerts
         for widget in self.alerts_frame.winfo_children():
             widget.destroy()
         
+        # Statuses first: the cached reads below do not update them
+        self.appointment_service.refresh_overdue()
+        
         # Load based on filter
         if filter_type == "overdue":
             appointments = self.appointment_service.get_overdue_appointments()
@@ -129,101 +140,75 @@ class AppointmentPanel(ctk.CTkFrame):
             )
             alert_label.pack(padx=20, pady=15)
         
-        if not appointments:
-            no_data = ctk.CTkLabel(
-                self.list_frame,
-                text="Không có lịch hẹn nào",
-                font=("Arial", 14),
-                text_color="gray"
-            )
-            no_data.grid(row=0, column=0, pady=50)
-            return
-        
-        # Display appointments
-        for idx, appt in enumerate(appointments):
-            self.create_appointment_card(appt, idx)
+        # Display appointments (date-bounded, so already fully loaded)
+        self.list_view.set_items(appointments, keep_position=keep_position)
     
-    def create_appointment_card(self, appointment, row):
-        """Create appointment card"""
-        # Color based on status
-        if appointment.status == "OVERDUE":
-            fg_color = "#FFEBEE"
-        elif appointment.status == "COMPLETED":
-            fg_color = "#E8F5E9"
-        else:
-            fg_color = "#f0f0f0"
-        
-        card = ctk.CTkFrame(self.list_frame, fg_color=fg_color, corner_radius=10)
-        card.grid(row=row, column=0, sticky="ew", pady=5, padx=5)
+    def refresh(self, changed_tables):
+        """Reload the list with the current filter"""
+        self.load_appointments(self.current_filter, keep_position=True)
+    
+    def create_appointment_card(self, parent):
+        """Create an empty appointment card; filled in by bind_appointment_card"""
+        card = ctk.CTkFrame(parent, corner_radius=10)
         
         info_frame = ctk.CTkFrame(card, fg_color="transparent")
         info_frame.pack(fill="both", expand=True, padx=15, pady=10)
         
         # Patient and date
-        header_text = f"👤 {appointment.patient.full_name} | 📅 {Formatters.format_date(appointment.appointment_date)}"
-        header_label = ctk.CTkLabel(
-            info_frame,
-            text=header_text,
-            font=("Arial", 16, "bold"),
-            anchor="w"
-        )
-        header_label.pack(anchor="w")
+        card.header_label = ctk.CTkLabel(info_frame, font=("Arial", 16, "bold"), anchor="w")
+        card.header_label.pack(anchor="w")
         
         # Status
-        status_text = config.APPOINTMENT_STATUS.get(appointment.status, appointment.status)
-        status_color = "#F44336" if appointment.status == "OVERDUE" else "#4CAF50" if appointment.status == "COMPLETED" else "#2196F3"
-        
-        status_label = ctk.CTkLabel(
-            info_frame,
-            text=f"📊 Trạng thái: {status_text}",
-            font=("Arial", 12),
-            text_color=status_color,
-            anchor="w"
-        )
-        status_label.pack(anchor="w", pady=(5, 0))
+        card.status_label = ctk.CTkLabel(info_frame, font=("Arial", 12), anchor="w")
+        card.status_label.pack(anchor="w", pady=(5, 0))
         
         # Reason
-        if appointment.reason:
-            reason_label = ctk.CTkLabel(
-                info_frame,
-                text=f"📝 Lý do: {appointment.reason}",
-                font=("Arial", 12),
-                text_color="#555",
-                anchor="w"
-            )
-            reason_label.pack(anchor="w", pady=(5, 0))
+        card.reason_label = ctk.CTkLabel(info_frame, font=("Arial", 12), text_color="#555", anchor="w")
+        card.reason_label.pack(anchor="w", pady=(5, 0))
         
         # Buttons
         btn_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
         btn_frame.pack(anchor="w", pady=(10, 0))
         
-        if appointment.status != "COMPLETED":
-            complete_btn = ctk.CTkButton(
-                btn_frame,
-                text="✅ Hoàn Thành",
-                command=lambda a=appointment: self.complete_appointment(a),
-                width=120,
-                fg_color="#4CAF50"
-            )
-            complete_btn.pack(side="left", padx=(0, 5))
+        card.complete_btn = ctk.CTkButton(btn_frame, text="✅ Hoàn Thành", width=120, fg_color="#4CAF50")
+        card.complete_btn.pack(side="left", padx=(0, 5))
         
-        edit_btn = ctk.CTkButton(
-            btn_frame,
-            text="✏️ Sửa",
-            command=lambda a=appointment: self.edit_appointment(a),
-            width=80,
-            fg_color="#FF9800"
-        )
-        edit_btn.pack(side="left", padx=5)
+        card.edit_btn = ctk.CTkButton(btn_frame, text="✏️ Sửa", width=80, fg_color="#FF9800")
+        card.edit_btn.pack(side="left", padx=5)
         
-        cancel_btn = ctk.CTkButton(
-            btn_frame,
-            text="❌ Hủy",
-            command=lambda a=appointment: self.cancel_appointment(a),
-            width=80,
-            fg_color="#F44336"
+        card.cancel_btn = ctk.CTkButton(btn_frame, text="❌ Hủy", width=80, fg_color="#F44336")
+        card.cancel_btn.pack(side="left", padx=5)
+        
+        return card
+    
+    def bind_appointment_card(self, card, appointment):
+        """Show an appointment in a (possibly recycled) card"""
+        # Color based on status
+        if appointment.status == "OVERDUE":
+            fg_color = "#FFEBEE"
+        elif appointment.status == "COMPLETED":
+            fg_color = "#E8F5E9"
+        else:
+            fg_color = "#f0f0f0"
+        card.configure(fg_color=fg_color)
+        
+        card.header_label.configure(
+            text=f"👤 {appointment.patient.full_name} | 📅 {Formatters.format_date(appointment.appointment_date)}"
         )
-        cancel_btn.pack(side="left", padx=5)
+        
+        status_text = config.APPOINTMENT_STATUS.get(appointment.status, appointment.status)
+        status_color = "#F44336" if appointment.status == "OVERDUE" else "#4CAF50" if appointment.status == "COMPLETED" else "#2196F3"
+        card.status_label.configure(text=f"📊 Trạng thái: {status_text}", text_color=status_color)
+        
+        card.reason_label.configure(text=f"📝 Lý do: {appointment.reason}" if appointment.reason else "")
+        
+        if appointment.status != "COMPLETED":
+            card.complete_btn.configure(command=lambda a=appointment: self.complete_appointment(a))
+            card.complete_btn.pack(side="left", padx=(0, 5), before=card.edit_btn)
+        else:
+            card.complete_btn.pack_forget()
+        card.edit_btn.configure(command=lambda a=appointment: self.edit_appointment(a))
+        card.cancel_btn.configure(command=lambda a=appointment: self.cancel_appointment(a))
     
     def add_appointment(self):
         """Add new appointment"""
@@ -282,7 +267,6 @@ class AppointmentDialog(ctk.CTkToplevel):
         
         self.appointment = appointment
         self.result = None
-        self.patient_service = PatientService()
         
         self.create_form()
         
@@ -302,17 +286,11 @@ class AppointmentDialog(ctk.CTkToplevel):
             row=row, column=0, sticky="w", pady=10
         )
         
-        patients = self.patient_service.get_all_patients(limit=500)
-        patient_names = [f"{p.patient_code} - {p.full_name}" for p in patients]
-        
-        self.patient_combo = ctk.CTkComboBox(form, values=patient_names, width=300)
-        self.patient_combo.grid(row=row, column=1, sticky="ew", pady=10)
+        self.patient_picker = PatientPicker(form, width=300)
+        self.patient_picker.grid(row=row, column=1, sticky="ew", pady=10)
         
         if self.appointment:
-            patient_text = f"{self.appointment.patient.patient_code} - {self.appointment.patient.full_name}"
-            self.patient_combo.set(patient_text)
-        
-        self.patients_list = patients
+            self.patient_picker.set_patient(self.appointment.patient)
         row += 1
         
         # Date
@@ -368,17 +346,8 @@ class AppointmentDialog(ctk.CTkToplevel):
     
     def save(self):
         """Save"""
-        # Get patient
-        selected_text = self.patient_combo.get()
-        
-        # Find patient by matching text
-        patient = None
-        for p in self.patients_list:
-            if f"{p.patient_code} - {p.full_name}" == selected_text:
-                patient = p
-                break
-        
-        if not patient:
+        patient_id = self.patient_picker.get_patient_id()
+        if patient_id is None:
             messagebox.showerror("Lỗi", "Vui lòng chọn bệnh nhân")
             return
         
@@ -389,7 +358,7 @@ class AppointmentDialog(ctk.CTkToplevel):
             return
         
         self.result = {
-            'patient_id': patient.id,
+            'patient_id': patient_id,
             'appointment_date': appt_date,
             'reason': self.reason_text.get("1.0", "end-1c").strip() or None,
             'notes': self.notes_text.get("1.0", "end-1c").strip() or None
@@ -0,0 +1,209 @@
+"""
+Dashboard Panel - Statistics and Alerts
+"""
+import customtkinter as ctk
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+from services import DashboardService
+
+# Dashboard refreshes run here so the window never waits for the counts
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard")
+    return _executor
+
+
+class DashboardPanel(ctk.CTkFrame):
+    """
+    Dashboard with statistics cards and the overdue alert
+
+    The layout is built at once from the figures saved by the last refresh
+    (placeholders on the very first run), then revalidate() recomputes them
+    on a worker thread. Only cards whose number changed are updated, and a
+    failed refresh keeps the previous figures. The figures depend on today's
+    date as well as the tables, so MainWindow revalidates on every show
+    instead of listing DATA_TABLES.
+    """
+
+    # (stat key, title, color)
+    CARDS = (
+        ("patient_count", "Tổng Bệnh Nhân", "#2196F3"),
+        ("visit_count", "Tổng Lượt Khám", "#4CAF50"),
+        ("overdue_count", "Lịch Hẹn Quá Hạn", "#F44336"),
+    )
+    EMPTY_COLOR = "#9E9E9E"
+    LATENCY_HISTORY = 50
+
+    def __init__(self, master, on_view_overdue: Optional[Callable[[], None]] = None):
+        super().__init__(master)
+
+        self.dashboard_service = DashboardService()
+        self.on_view_overdue = on_view_overdue
+
+        self.values: Dict[str, Optional[int]] = {key: None for key, _, _ in self.CARDS}
+        self.value_labels = {}
+        self.cards = {}
+        self._future = None
+
+        self.latencies = deque(maxlen=self.LATENCY_HISTORY)
+        self.refresh_count = 0
+        self.error_count = 0
+
+        self.create_widgets()
+
+        snapshot = self.dashboard_service.load_snapshot()
+        if snapshot is not None:
+            self.apply_stats(snapshot['stats'])
+
+    def create_widgets(self):
+        """Build the layout once; values are filled in by apply_stats()"""
+        self.grid_columnconfigure((0, 1, 2), weight=1)
+
+        # Title
+        title = ctk.CTkLabel(
+            self,
+            text="📊 Trang Chủ",
+            font=("Arial", 24, "bold")
+        )
+        title.grid(row=0, column=0, columnspan=2, padx=20, pady=20, sticky="w")
+
+        self.status_label = ctk.CTkLabel(
+            self,
+            text="⏳ Đang tải số liệu...",
+            font=("Arial", 12),
+            text_color="gray"
+        )
+        self.status_label.grid(row=0, column=2, padx=20, pady=20, sticky="e")
+
+        # Statistics cards
+        for column, (key, title_text, color) in enumerate(self.CARDS):
+            card = ctk.CTkFrame(self, fg_color=self.EMPTY_COLOR, corner_radius=10)
+            card.grid(row=1, column=column, padx=10, pady=10, sticky="ew")
+
+            ctk.CTkLabel(
+                card,
+                text=title_text,
+                font=("Arial", 14),
+                text_color="white"
+            ).pack(padx=20, pady=(20, 5), anchor="w")
+
+            value_label = ctk.CTkLabel(
+                card,
+                text="—",
+                font=("Arial", 32, "bold"),
+                text_color="white"
+            )
+            value_label.pack(padx=20, pady=(0, 20), anchor="w")
+
+            self.cards[key] = card
+            self.value_labels[key] = value_label
+
+        # Alerts section, shown while there are overdue appointments
+        self.alerts_frame = ctk.CTkFrame(self, fg_color="#FFF3E0", corner_radius=10)
+
+        self.alert_label = ctk.CTkLabel(
+            self.alerts_frame,
+            text="",
+            font=("Arial", 14, "bold"),
+            text_color="#E65100"
+        )
+        self.alert_label.pack(padx=20, pady=15)
+
+        view_btn = ctk.CTkButton(
+            self.alerts_frame,
+            text="Xem Chi Tiết",
+            command=self.view_overdue,
+            fg_color="#FF9800",
+            hover_color="#F57C00"
+        )
+        view_btn.pack(pady=(0, 15))
+
+    def apply_stats(self, stats: Dict[str, Any]):
+        """Show new figures, touching only the cards that changed"""
+        for key, _, color in self.CARDS:
+            value = stats.get(key)
+            if value == self.values[key]:
+                continue
+            self.values[key] = value
+
+            self.value_labels[key].configure(text="—" if value is None else str(value))
+            if key == "overdue_count":
+                self.cards[key].configure(fg_color=color if value else self.EMPTY_COLOR)
+                self.update_alert(value or 0)
+            elif self.cards[key].cget("fg_color") != color:
+                self.cards[key].configure(fg_color=color)
+
+    def update_alert(self, overdue_count: int):
+        """Show or hide the overdue alert"""
+        if overdue_count > 0:
+            self.alert_label.configure(
+                text=f"⚠️ Có {overdue_count} lịch hẹn quá hạn. Vui lòng kiểm tra!"
+            )
+            self.alerts_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=20, sticky="ew")
+        else:
+            self.alerts_frame.grid_remove()
+
+    def view_overdue(self):
+        """Alert button: open the appointments"""
+        if self.on_view_overdue:
+            self.on_view_overdue()
+
+    def set_status(self, text: str, color: str = "gray"):
+        """Small status line next to the title"""
+        self.status_label.configure(text=text, text_color=color)
+
+    # ===== Background refresh =====
+
+    def revalidate(self):
+        """Recompute the figures on the worker thread; current values stay on screen"""
+        if self._future is not None:
+            return  # a refresh is already running
+
+        self.set_status("⏳ Đang cập nhật...")
+        self._future = _get_executor().submit(self._timed_stats)
+        self._poll(self._future)
+
+    def _timed_stats(self):
+        """Worker thread: figures and how long computing them took (ms)"""
+        started = time.perf_counter()
+        stats = self.dashboard_service.get_stats()
+        return stats, (time.perf_counter() - started) * 1000
+
+    def _poll(self, future):
+        if not self.winfo_exists():
+            return
+        if not future.done():
+            self.after(50, self._poll, future)
+            return
+
+        self._future = None
+        error = future.exception()
+        if error is not None:
+            self.error_count += 1
+            self.set_status(f"⚠️ Không cập nhật được số liệu: {error}", "red")
+            return
+
+        stats, elapsed_ms = future.result()
+        self.refresh_count += 1
+        self.latencies.append(elapsed_ms)
+        self.apply_stats(stats)
+        self.set_status(f"Cập nhật lúc {datetime.now().strftime('%H:%M:%S')}")
+        self.dashboard_service.save_snapshot(stats, elapsed_ms)
+
+    def refresh_stats(self) -> Dict[str, Any]:
+        """Latency metrics of background refreshes (ms, last LATENCY_HISTORY runs)"""
+        latencies = list(self.latencies)
+        return {
+            'refreshes': self.refresh_count,
+            'errors': self.error_count,
+            'last_ms': latencies[-1] if latencies else None,
+            'avg_ms': sum(latencies) / len(latencies) if latencies else None,
+            'max_ms': max(latencies) if latencies else None
+        }
@@ -3,10 +3,19 @@ Data Import Panel
 """
 import customtkinter as ctk
 from tkinter import messagebox, filedialog
-import pandas as pd
 from services import ImportService
+from services.import_jobs import get_import_job_manager
 import config
 
+# Error codes of import results (services.import_errors) as shown to the user
+ISSUE_LABELS = {
+    'missing_required': "Thiếu dữ liệu bắt buộc",
+    'not_found': "Không tìm thấy",
+    'write_failed': "Lỗi ghi dữ liệu",
+    'already_exists': "Đã tồn tại",
+    'duplicate_row': "Trùng với dòng trước"
+}
+
 
 class ImportPanel(ctk.CTkFrame):
     """Panel for importing data from CSV/Excel files"""
@@ -15,6 +24,7 @@ class ImportPanel(ctk.CTkFrame):
         super().__init__(master, fg_color="transparent")
         
         self.import_service = ImportService()
+        self.job_manager = get_import_job_manager()
         self.selected_file = None
         self.preview_data = None
         
@@ -23,6 +33,13 @@ class ImportPanel(ctk.CTkFrame):
         
         self.create_header()
         self.create_content()
+        
+        # An import started before this panel was rebuilt keeps running
+        job = self.job_manager.active_job
+        if job is not None and not job.finished:
+            self.watch_job(job)
+        else:
+            self.update_resume_button()
     
     def create_header(self):
         """Create header section"""
@@ -129,7 +146,7 @@ class ImportPanel(ctk.CTkFrame):
         self.preview_text.configure(state="disabled")
         
         # Import button
-        import_btn = ctk.CTkButton(
+        self.import_btn = ctk.CTkButton(
             content,
             text="📥 Nhập Dữ Liệu",
             command=self.import_data,
@@ -138,7 +155,47 @@ class ImportPanel(ctk.CTkFrame):
             fg_color="#4CAF50",
             hover_color="#45A049"
         )
-        import_btn.pack(pady=20)
+        self.import_btn.pack(pady=20)
+        
+        # Continues the latest unfinished import; shown by update_resume_button()
+        self.resume_btn = ctk.CTkButton(
+            content,
+            text="↻ Tiếp Tục Lần Nhập Dở",
+            command=self.resume_import,
+            height=35,
+            font=("Arial", 13),
+            fg_color="#FF9800",
+            hover_color="#F57C00"
+        )
+        self.unfinished_import = None
+        
+        # Progress of the running import; shown by watch_job()
+        self.progress_frame = ctk.CTkFrame(content)
+        
+        self.progress_bar = ctk.CTkProgressBar(self.progress_frame)
+        self.progress_bar.pack(fill="x", padx=15, pady=(15, 5))
+        self.progress_bar.set(0)
+        
+        progress_row = ctk.CTkFrame(self.progress_frame, fg_color="transparent")
+        progress_row.pack(fill="x", padx=15, pady=(0, 15))
+        
+        self.progress_label = ctk.CTkLabel(
+            progress_row,
+            text="",
+            font=("Arial", 12),
+            justify="left"
+        )
+        self.progress_label.pack(side="left")
+        
+        self.cancel_btn = ctk.CTkButton(
+            progress_row,
+            text="⏹ Hủy",
+            command=self.cancel_import,
+            width=100,
+            fg_color="#F44336",
+            hover_color="#D32F2F"
+        )
+        self.cancel_btn.pack(side="right")
     
     def create_instructions(self, parent):
         """Create general instructions section"""
@@ -289,6 +346,7 @@ BN001,HIV,25/01/2026,Âm tính"""
         filetypes = [
             ("CSV files", "*.csv"),
             ("Excel files", "*.xlsx *.xls"),
+            ("Parquet/Feather files", "*.parquet *.feather"),
             ("All files", "*.*")
         ]
         
@@ -366,15 +424,7 @@ BN001,HIV,25/01/2026,Âm tính"""
         if not dialog.result:
             return
         
-        try:
-            result = self.import_service.import_patients(
-                self.selected_file,
-                dialog.result,
-                skip_duplicates=True
-            )
-            self.show_import_result(result)
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(e)}")
+        self.start_import("patients", dialog.result, skip_duplicates=True)
     
     def import_medicines(self):
         """Import medicines from file"""
@@ -389,15 +439,7 @@ BN001,HIV,25/01/2026,Âm tính"""
         if not dialog.result:
             return
         
-        try:
-            result = self.import_service.import_medicines(
-                self.selected_file,
-                dialog.result,
-                skip_duplicates=True
-            )
-            self.show_import_result(result)
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(e)}")
+        self.start_import("medicines", dialog.result, skip_duplicates=True)
     
     def import_test_types(self):
         """Import test types from file"""
@@ -412,15 +454,7 @@ BN001,HIV,25/01/2026,Âm tính"""
         if not dialog.result:
             return
         
-        try:
-            result = self.import_service.import_test_types(
-                self.selected_file,
-                dialog.result,
-                skip_duplicates=True
-            )
-            self.show_import_result(result)
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(e)}")
+        self.start_import("test_types", dialog.result, skip_duplicates=True)
     
     def import_visits(self):
         """Import visits from file"""
@@ -435,14 +469,7 @@ BN001,HIV,25/01/2026,Âm tính"""
         if not dialog.result:
             return
         
-        try:
-            result = self.import_service.import_visits(
-                self.selected_file,
-                dialog.result
-            )
-            self.show_import_result(result)
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(e)}")
+        self.start_import("visits", dialog.result)
     
     def import_test_results(self):
         """Import test results from file"""
@@ -457,14 +484,99 @@ BN001,HIV,25/01/2026,Âm tính"""
         if not dialog.result:
             return
         
+        self.start_import("test_results", dialog.result)
+    
+    def start_import(self, kind, column_mapping, **options):
+        """Run the import on the import thread and follow its progress"""
         try:
-            result = self.import_service.import_test_results_batch(
-                self.selected_file,
-                dialog.result
-            )
-            self.show_import_result(result)
-        except Exception as e:
-            messagebox.showerror("Lỗi", f"Không thể nhập dữ liệu: {str(e)}")
+            job = self.job_manager.start(kind, self.selected_file, column_mapping, **options)
+        except RuntimeError:
+            messagebox.showwarning("Cảnh Báo", "Đang có một lần nhập dữ liệu khác chạy, vui lòng đợi")
+            return
+        self.watch_job(job)
+    
+    def update_resume_button(self):
+        """Offer to continue the most recent import that did not complete"""
+        entry = self.import_service.last_import()
+        if entry is not None and entry['status'] != 'done' and entry['row_offset'] > 0:
+            self.unfinished_import = entry
+            self.resume_btn.pack(pady=(0, 20), after=self.import_btn)
+        else:
+            self.unfinished_import = None
+            self.resume_btn.pack_forget()
+    
+    def resume_import(self):
+        """Continue the unfinished import after its last committed chunk"""
+        entry = self.unfinished_import
+        if entry is None:
+            return
+        
+        file_name = entry['file_path'].split("/")[-1]
+        if not messagebox.askyesno(
+            "Tiếp Tục Nhập",
+            f"Tiếp tục nhập file {file_name} từ dòng {entry['row_offset'] + 1}?\n"
+            f"Đã nhập trước đó: {entry['imported']} dòng."
+        ):
+            return
+        
+        try:
+            job = self.job_manager.resume(entry['job_id'])
+        except RuntimeError:
+            messagebox.showwarning("Cảnh Báo", "Đang có một lần nhập dữ liệu khác chạy, vui lòng đợi")
+            return
+        self.resume_btn.pack_forget()
+        self.watch_job(job)
+    
+    def watch_job(self, job):
+        """Show the progress area and poll job until it finishes"""
+        self.resume_btn.pack_forget()
+        self.import_btn.configure(state="disabled")
+        self.cancel_btn.configure(state="normal", text="⏹ Hủy")
+        self.progress_bar.set(0)
+        self.progress_label.configure(text="Đang chuẩn bị...")
+        self.progress_frame.pack(fill="x", padx=20, pady=(0, 20), after=self.import_btn)
+        self.after(200, self._poll_job, job)
+    
+    def _poll_job(self, job):
+        if not self.winfo_exists():
+            return
+        
+        events = job.events()
+        if events:
+            self.show_progress(events[-1])
+        
+        if not job.finished:
+            self.after(200, self._poll_job, job)
+            return
+        
+        self.progress_frame.pack_forget()
+        self.import_btn.configure(state="normal")
+        self.update_resume_button()
+        self.show_import_result(job.result)
+    
+    def show_progress(self, progress):
+        """Render one progress event of the running import"""
+        expected = progress['expected']
+        if expected:
+            self.progress_bar.set(min(progress['parsed'] / expected, 1))
+            parsed = f"Đã đọc: {progress['parsed']}/{expected} dòng"
+        else:
+            parsed = f"Đã đọc: {progress['parsed']} dòng"
+        
+        text = (
+            f"{parsed}   Đã nhập: {progress['written']}   Bỏ qua: {progress['skipped']}"
+            f"   Lỗi: {progress['errors']}\n{progress['rows_per_second']} dòng/giây"
+        )
+        if progress['eta'] is not None and progress['parsed']:
+            text += f"   Còn lại khoảng {progress['eta']:.0f} giây"
+        self.progress_label.configure(text=text)
+    
+    def cancel_import(self):
+        """Stop the running import after its current chunk"""
+        job = self.job_manager.active_job
+        if job is not None and not job.finished:
+            job.cancel()
+            self.cancel_btn.configure(state="disabled", text="Đang hủy...")
     
     def show_import_result(self, result):
         """Show import result message"""
@@ -475,17 +587,55 @@ Nhập dữ liệu thành công!
 Tổng số dòng: {result['total']}
 Đã nhập: {result['imported']}
 Bỏ qua: {result['skipped']}
+Thời gian: {result['elapsed']:.1f} giây ({result['rows_per_second']} dòng/giây)
             """
             
-            if result['errors']:
-                message += f"\n\nLỗi ({len(result['errors'])} dòng):\n"
-                message += "\n".join(result['errors'][:5])
-                if len(result['errors']) > 5:
-                    message += f"\n... và {len(result['errors']) - 5} lỗi khác"
+            if result.get('resumed_from'):
+                message += f"\nTiếp tục từ dòng {result['resumed_from'] + 1} của lần nhập trước"
+            if result.get('replayed'):
+                message += f"\nĐã có sẵn từ lần nhập trước: {result['replayed']} dòng"
+            
+            if result['error_count']:
+                message += f"\n\nLỗi ({result['error_count']} dòng):\n"
+                message += self.format_issues(result['error_summary'], 'error')
+            
+            if result['skipped_row_count']:
+                message += f"\n\nTrùng lặp ({result['skipped_row_count']} dòng):\n"
+                message += self.format_issues(result['error_summary'], 'skipped')
+            
+            if result['error_report']:
+                message += f"\n\nChi tiết từng dòng: {result['error_report']}"
             
             messagebox.showinfo("Thành Công", message.strip())
+        elif result.get('cancelled'):
+            messagebox.showinfo(
+                "Đã Hủy",
+                f"Đã hủy nhập dữ liệu sau {result['total']} dòng.\n"
+                f"Đã nhập: {result['imported']} dòng (các dòng này được giữ lại).\n"
+                "Có thể nhập tiếp bằng nút \"Tiếp Tục Lần Nhập Dở\"."
+            )
         else:
-            messagebox.showerror("Lỗi", result.get('error', 'Unknown error'))
+            message = result.get('error', 'Unknown error')
+            if result.get('imported'):
+                # Chunks committed before the failure stay imported
+                message += f"\n\nĐã nhập {result['imported']} dòng trước khi gặp lỗi."
+                message += "\nCó thể nhập tiếp bằng nút \"Tiếp Tục Lần Nhập Dở\"."
+            if result.get('error_report'):
+                message += f"\n\nChi tiết từng dòng: {result['error_report']}"
+            messagebox.showerror("Lỗi", message)
+    
+    def format_issues(self, summary, kind, limit=5):
+        """One line per error code and column of kind ('error' or 'skipped'), most frequent first"""
+        groups = [group for group in summary if group['kind'] == kind]
+        lines = [
+            f"• {ISSUE_LABELS.get(group['code'], group['code'])}"
+            f"{' (' + group['column'] + ')' if group['column'] else ''}: {group['count']} dòng"
+            f" — VD: {group['example']}"
+            for group in groups[:limit]
+        ]
+        if len(groups) > limit:
+            lines.append(f"... và {len(groups) - limit} loại khác")
+        return "\n".join(lines)
 
 
 class ColumnMappingDialog(ctk.CTkToplevel):
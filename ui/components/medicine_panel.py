@@ -4,12 +4,17 @@ Medicine and Prescription Management Panel
 import customtkinter as ctk
 from tkinter import messagebox
 from services import MedicineService
+from ui.utils.widgets import VirtualListView
+from ui.utils.search import IncrementalSearch, like_contains
 import config
 
 
 class MedicinePanel(ctk.CTkFrame):
     """Panel for medicine catalog and prescription management"""
     
+    # Tables whose changes make the panel reload when it is shown again
+    DATA_TABLES = ("medicines",)
+    
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
@@ -69,6 +74,16 @@ class MedicinePanel(ctk.CTkFrame):
         self.search_entry.pack(side="left", padx=(0, 10))
         self.search_entry.bind("<Return>", lambda e: self.search_medicines())
         
+        # Search as you type (the active catalog is small, so results are always complete)
+        self.search = IncrementalSearch(
+            self.search_entry,
+            fetch=lambda keyword: self.medicine_service.search_medicines(keyword, active_only=True),
+            matches=lambda medicine, keyword: like_contains(medicine.name, keyword),
+            on_results=lambda keyword, medicines, complete: self.show_medicines(medicines),
+            tables=self.DATA_TABLES,
+            result_limit=float("inf")
+        )
+        
         search_btn = ctk.CTkButton(
             search_frame,
             text="🔍 Tìm Kiếm",
@@ -78,28 +93,24 @@ class MedicinePanel(ctk.CTkFrame):
         )
         search_btn.pack(side="left")
         
-        # Medicine list
-        self.list_frame = ctk.CTkScrollableFrame(content)
-        self.list_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-        self.list_frame.grid_columnconfigure(0, weight=1)
+        # Medicine list (category headers and medicines share one row type)
+        self.list_view = VirtualListView(
+            content,
+            create_row=self.create_medicine_card,
+            bind_row=self.bind_medicine_card,
+            row_height=60,
+            row_gap=6,
+            empty_text="Không tìm thấy thuốc nào"
+        )
+        self.list_view.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
     
-    def load_medicines(self, keyword=""):
+    def load_medicines(self, keyword="", keep_position=False):
         """Load medicines"""
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-        
         medicines = self.medicine_service.search_medicines(keyword, active_only=True)
-        
-        if not medicines:
-            no_data = ctk.CTkLabel(
-                self.list_frame,
-                text="Không tìm thấy thuốc nào",
-                font=("Arial", 14),
-                text_color="gray"
-            )
-            no_data.grid(row=0, column=0, pady=50)
-            return
-        
+        self.show_medicines(medicines, keep_position=keep_position)
+    
+    def show_medicines(self, medicines, keep_position=False):
+        """Display medicines grouped by category"""
         # Group by category
         by_category = {}
         for med in medicines:
@@ -108,75 +119,67 @@ class MedicinePanel(ctk.CTkFrame):
                 by_category[cat] = []
             by_category[cat].append(med)
         
-        # Display by category
-        row = 0
+        # Flatten into rows: a header row per category, then its medicines
+        rows = []
         for category, meds in sorted(by_category.items()):
-            # Category header
-            cat_label = ctk.CTkLabel(
-                self.list_frame,
-                text=f"📁 {category}",
-                font=("Arial", 16, "bold"),
-                anchor="w"
-            )
-            cat_label.grid(row=row, column=0, sticky="ew", padx=10, pady=(15, 5))
-            row += 1
-            
-            # Medicines in category
-            for med in meds:
-                self.create_medicine_card(med, row)
-                row += 1
+            rows.append(("category", category))
+            rows.extend(("medicine", med) for med in meds)
+        
+        self.list_view.set_items(rows, keep_position=keep_position)
     
-    def create_medicine_card(self, medicine, row):
-        """Create medicine card"""
-        card = ctk.CTkFrame(self.list_frame, fg_color="#f0f0f0", corner_radius=8)
-        card.grid(row=row, column=0, sticky="ew", pady=3, padx=5)
-        card.grid_columnconfigure(1, weight=1)
-        
-        # Medicine info
-        name_label = ctk.CTkLabel(
-            card,
-            text=f"💊 {medicine.name}",
-            font=("Arial", 14, "bold"),
-            anchor="w"
-        )
-        name_label.grid(row=0, column=0, sticky="w", padx=15, pady=10)
-        
-        if medicine.unit:
-            unit_label = ctk.CTkLabel(
-                card,
-                text=f"Đơn vị: {medicine.unit}",
-                font=("Arial", 11),
-                text_color="gray",
-                anchor="w"
-            )
-            unit_label.grid(row=0, column=1, sticky="w", padx=10, pady=10)
+    def refresh(self, changed_tables):
+        """Reload the list, keeping the current search"""
+        self.load_medicines(self.search_entry.get(), keep_position=True)
+    
+    def create_medicine_card(self, parent):
+        """Create an empty list row; bind_medicine_card shows a header or a medicine"""
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        
+        # Category header
+        row.cat_label = ctk.CTkLabel(row, font=("Arial", 16, "bold"), anchor="w")
+        
+        # Medicine card
+        row.card = ctk.CTkFrame(row, fg_color="#f0f0f0", corner_radius=8)
+        row.card.grid_columnconfigure(1, weight=1)
+        
+        row.name_label = ctk.CTkLabel(row.card, font=("Arial", 14, "bold"), anchor="w")
+        row.name_label.grid(row=0, column=0, sticky="w", padx=15, pady=10)
+        
+        row.unit_label = ctk.CTkLabel(row.card, font=("Arial", 11), text_color="gray", anchor="w")
+        row.unit_label.grid(row=0, column=1, sticky="w", padx=10, pady=10)
         
         # Buttons
-        btn_frame = ctk.CTkFrame(card, fg_color="transparent")
+        btn_frame = ctk.CTkFrame(row.card, fg_color="transparent")
         btn_frame.grid(row=0, column=2, padx=10, pady=10)
         
-        edit_btn = ctk.CTkButton(
-            btn_frame,
-            text="✏️ Sửa",
-            command=lambda m=medicine: self.edit_medicine(m),
-            width=80,
-            fg_color="#FF9800"
-        )
-        edit_btn.pack(side="left", padx=2)
+        row.edit_btn = ctk.CTkButton(btn_frame, text="✏️ Sửa", width=80, fg_color="#FF9800")
+        row.edit_btn.pack(side="left", padx=2)
         
-        deactivate_btn = ctk.CTkButton(
-            btn_frame,
-            text="🗑️ Xóa",
-            command=lambda m=medicine: self.deactivate_medicine(m),
-            width=80,
-            fg_color="#F44336"
-        )
-        deactivate_btn.pack(side="left", padx=2)
+        row.deactivate_btn = ctk.CTkButton(btn_frame, text="🗑️ Xóa", width=80, fg_color="#F44336")
+        row.deactivate_btn.pack(side="left", padx=2)
+        
+        return row
+    
+    def bind_medicine_card(self, row, item):
+        """Show a category header or a medicine in a (possibly recycled) row"""
+        kind, value = item
+        if kind == "category":
+            row.card.pack_forget()
+            row.cat_label.configure(text=f"📁 {value}")
+            row.cat_label.pack(fill="both", expand=True, padx=5)
+            return
+        
+        medicine = value
+        row.cat_label.pack_forget()
+        row.card.pack(fill="both", expand=True)
+        row.name_label.configure(text=f"💊 {medicine.name}")
+        row.unit_label.configure(text=f"Đơn vị: {medicine.unit}" if medicine.unit else "")
+        row.edit_btn.configure(command=lambda m=medicine: self.edit_medicine(m))
+        row.deactivate_btn.configure(command=lambda m=medicine: self.deactivate_medicine(m))
     
     def search_medicines(self):
         """Search medicines"""
-        keyword = self.search_entry.get()
-        self.load_medicines(keyword)
+        self.search.search_now()
     
     def add_medicine(self):
         """Add new medicine"""
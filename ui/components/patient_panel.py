@@ -6,12 +6,17 @@ from tkinter import messagebox
 from datetime import datetime
 from services import PatientService
 from utils import Formatters, Validators
+from ui.utils.widgets import VirtualListView, PagedDataSource
+from ui.utils.search import IncrementalSearch, like_contains
 import config
 
 
 class PatientPanel(ctk.CTkFrame):
     """Panel for patient management"""
     
+    # Tables whose changes make the panel reload when it is shown again
+    DATA_TABLES = ("patients", "patient_summary")
+    
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
@@ -76,6 +81,17 @@ class PatientPanel(ctk.CTkFrame):
         self.search_entry.pack(side="left", padx=(0, 10))
         self.search_entry.bind("<Return>", lambda e: self.search_patients())
         
+        # Search as you type
+        self.search = IncrementalSearch(
+            self.search_entry,
+            fetch=lambda keyword: self.patient_service.search_patients(
+                keyword, limit=config.SEARCH_RESULT_LIMIT
+            ),
+            matches=self.patient_matches,
+            on_results=self.show_search_results,
+            tables=self.DATA_TABLES
+        )
+        
         search_btn = ctk.CTkButton(
             search_frame,
             text="🔍 Tìm Kiếm",
@@ -85,38 +101,52 @@ class PatientPanel(ctk.CTkFrame):
         )
         search_btn.pack(side="left")
         
-        # Patient list (scrollable)
-        self.list_frame = ctk.CTkScrollableFrame(content)
-        self.list_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-        self.list_frame.grid_columnconfigure(0, weight=1)
+        # Patient list (virtualized, paged from the database)
+        self.list_view = VirtualListView(
+            content,
+            create_row=self.create_patient_card,
+            bind_row=self.bind_patient_card,
+            row_height=140,
+            empty_text="Không tìm thấy bệnh nhân nào"
+        )
+        self.list_view.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
     
-    def load_patients(self, keyword=""):
-        """Load and display patients"""
-        # Clear current list
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-        
-        # Load patients
-        patients = self.patient_service.search_patients(keyword, limit=100)
-        
-        if not patients:
-            no_data = ctk.CTkLabel(
-                self.list_frame,
-                text="Không tìm thấy bệnh nhân nào",
-                font=("Arial", 14),
-                text_color="gray"
-            )
-            no_data.grid(row=0, column=0, pady=50)
-            return
-        
-        # Display patients
-        for idx, patient in enumerate(patients):
-            self.create_patient_card(patient, idx)
+    def load_patients(self, keyword="", keep_position=False):
+        """Load and display patients, a page at a time as the list scrolls"""
+        source = PagedDataSource(
+            lambda offset, limit: self.patient_service.search_patients(
+                keyword, limit=limit, offset=offset
+            ),
+            page_size=config.LIST_PAGE_SIZE
+        )
+        self.list_view.set_source(source, keep_position=keep_position)
+    
+    def show_search_results(self, keyword, patients, complete):
+        """Show a search result; incomplete results keep paging from the database"""
+        source = PagedDataSource(
+            lambda offset, limit: self.patient_service.search_patients(
+                keyword, limit=limit, offset=offset
+            ),
+            page_size=config.LIST_PAGE_SIZE,
+            rows=patients,
+            exhausted=complete
+        )
+        self.list_view.set_source(source)
     
-    def create_patient_card(self, patient, row):
-        """Create a patient card"""
-        card = ctk.CTkFrame(self.list_frame, fg_color="#f0f0f0", corner_radius=10)
-        card.grid(row=row, column=0, sticky="ew", pady=5, padx=5)
+    @staticmethod
+    def patient_matches(patient, keyword):
+        """In-memory version of the search_patients() filter"""
+        return like_contains(patient.full_name, keyword) \
+            or like_contains(patient.phone_number, keyword) \
+            or like_contains(patient.patient_code, keyword)
+    
+    def refresh(self, changed_tables):
+        """Reload the list, keeping the current search and scroll position"""
+        self.load_patients(self.search_entry.get(), keep_position=True)
+    
+    def create_patient_card(self, parent):
+        """Create an empty patient card; filled in by bind_patient_card"""
+        card = ctk.CTkFrame(parent, fg_color="#f0f0f0", corner_radius=10)
         card.grid_columnconfigure(1, weight=1)
         
         # Patient info
@@ -124,72 +154,69 @@ class PatientPanel(ctk.CTkFrame):
         info_frame.grid(row=0, column=0, columnspan=3, sticky="ew", padx=15, pady=10)
         
         # Name and code
-        name_label = ctk.CTkLabel(
-            info_frame,
-            text=f"👤 {patient.full_name}",
-            font=("Arial", 16, "bold"),
-            anchor="w"
-        )
-        name_label.pack(anchor="w")
-        
-        code_label = ctk.CTkLabel(
-            info_frame,
-            text=f"Mã BN: {patient.patient_code}",
-            font=("Arial", 12),
-            text_color="gray",
-            anchor="w"
-        )
-        code_label.pack(anchor="w")
+        card.name_label = ctk.CTkLabel(info_frame, font=("Arial", 16, "bold"), anchor="w")
+        card.name_label.pack(anchor="w")
+        
+        card.code_label = ctk.CTkLabel(info_frame, font=("Arial", 12), text_color="gray", anchor="w")
+        card.code_label.pack(anchor="w")
         
         # Details
-        details_text = f"📅 {Formatters.format_date(patient.date_of_birth) if patient.date_of_birth else 'N/A'} | "
-        details_text += f"⚥ {patient.gender or 'N/A'} | "
-        details_text += f"📞 {patient.phone_number or 'N/A'}"
+        card.details_label = ctk.CTkLabel(info_frame, font=("Arial", 12), text_color="#555", anchor="w")
+        card.details_label.pack(anchor="w", pady=(5, 0))
         
-        details_label = ctk.CTkLabel(
-            info_frame,
-            text=details_text,
-            font=("Arial", 12),
-            text_color="#555",
-            anchor="w"
-        )
-        details_label.pack(anchor="w", pady=(5, 0))
+        # Summary (visits, next appointment, latest abnormal lab)
+        card.summary_label = ctk.CTkLabel(info_frame, font=("Arial", 12), anchor="w")
+        card.summary_label.pack(anchor="w", pady=(2, 0))
         
         # Action buttons
         btn_frame = ctk.CTkFrame(card, fg_color="transparent")
         btn_frame.grid(row=0, column=3, padx=10, pady=10)
         
-        view_btn = ctk.CTkButton(
-            btn_frame,
-            text="👁️ Xem",
-            command=lambda p=patient: self.view_patient(p),
-            width=80,
-            fg_color="#2196F3"
-        )
-        view_btn.pack(side="left", padx=2)
+        card.view_btn = ctk.CTkButton(btn_frame, text="👁️ Xem", width=80, fg_color="#2196F3")
+        card.view_btn.pack(side="left", padx=2)
         
-        edit_btn = ctk.CTkButton(
-            btn_frame,
-            text="✏️ Sửa",
-            command=lambda p=patient: self.edit_patient(p),
-            width=80,
-            fg_color="#FF9800"
-        )
-        edit_btn.pack(side="left", padx=2)
+        card.edit_btn = ctk.CTkButton(btn_frame, text="✏️ Sửa", width=80, fg_color="#FF9800")
+        card.edit_btn.pack(side="left", padx=2)
         
-        delete_btn = ctk.CTkButton(
-            btn_frame,
-            text="🗑️ Xóa",
-            command=lambda p=patient: self.delete_patient(p),
-            width=80,
-            fg_color="#F44336"
-        )
-        delete_btn.pack(side="left", padx=2)
+        card.delete_btn = ctk.CTkButton(btn_frame, text="🗑️ Xóa", width=80, fg_color="#F44336")
+        card.delete_btn.pack(side="left", padx=2)
+        
+        return card
+    
+    def bind_patient_card(self, card, patient):
+        """Show a patient in a (possibly recycled) card"""
+        card.name_label.configure(text=f"👤 {patient.full_name}")
+        card.code_label.configure(text=f"Mã BN: {patient.patient_code}")
+        
+        details_text = f"📅 {Formatters.format_date(patient.date_of_birth) if patient.date_of_birth else 'N/A'} | "
+        details_text += f"⚥ {patient.gender or 'N/A'} | "
+        details_text += f"📞 {patient.phone_number or 'N/A'}"
+        card.details_label.configure(text=details_text)
+        
+        summary_text, summary_color = self.format_summary(patient.summary)
+        card.summary_label.configure(text=summary_text, text_color=summary_color)
+        
+        card.view_btn.configure(command=lambda p=patient: self.view_patient(p))
+        card.edit_btn.configure(command=lambda p=patient: self.edit_patient(p))
+        card.delete_btn.configure(command=lambda p=patient: self.delete_patient(p))
+    
+    def format_summary(self, summary):
+        """Build the summary line of a patient card; returns (text, color)"""
+        if not summary or not summary.visit_count:
+            return "🩺 Chưa có lần khám", "gray"
+        
+        text = f"🩺 {summary.visit_count} lần khám, gần nhất {Formatters.format_date(summary.last_visit_date)}"
+        if summary.next_appointment_date:
+            text += f" | 📅 Hẹn: {Formatters.format_date(summary.next_appointment_date)}"
+        if summary.latest_abnormal_date:
+            text += (f" | ⚠️ {summary.latest_abnormal_test_name}: {summary.latest_abnormal_value}"
+                     f" ({Formatters.format_date(summary.latest_abnormal_date)})")
+            return text, "#E65100"
+        return text, "#555"
     
     def search_patients(self):
         """Search patients"""
-        keyword = self.search_entry.get()
-        self.load_patients(keyword)
+        self.search.search_now()
     
     def show_add_dialog(self):
         """Show add patient dialog"""
@@ -4,20 +4,25 @@ Test Management Panel with Timeline View
 import customtkinter as ctk
 from tkinter import messagebox
 from datetime import date
-from services import TestService, PatientService, VisitService
-from utils import Formatters, ChartHelper
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from services import TestService, VisitService
+from utils import Formatters, get_chart_renderer
+from utils.chart_renderer import deliver
+from ui.utils.widgets import VirtualListView
+from ui.utils.patient_picker import PatientPicker
 import config
 
 
 class TestPanel(ctk.CTkFrame):
     """Panel for test management and timeline view"""
     
+    # Tables whose changes make the panel reload when it is shown again
+    DATA_TABLES = ("test_types",)
+    
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
         self.test_service = TestService()
-        self.patient_service = PatientService()
+        self.chart_renderer = get_chart_renderer()
         
         # Configure grid
         self.grid_columnconfigure(0, weight=1)
@@ -70,37 +75,37 @@ class TestPanel(ctk.CTkFrame):
         add_btn.grid(row=0, column=0, sticky="w", padx=10, pady=10)
         
         # List
-        self.test_types_list = ctk.CTkScrollableFrame(tab)
+        self.test_types_list = VirtualListView(
+            tab,
+            create_row=self.create_test_type_row,
+            bind_row=self.bind_test_type_row,
+            row_height=56,
+            empty_text="Chưa có loại xét nghiệm nào"
+        )
         self.test_types_list.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
         
         self.load_test_types()
     
     def load_test_types(self):
         """Load test types"""
-        for widget in self.test_types_list.winfo_children():
-            widget.destroy()
+        self.test_types_list.set_items(self.test_service.get_all_test_types(), keep_position=True)
+    
+    def create_test_type_row(self, parent):
+        """Create an empty test type row; filled in by bind_test_type_row"""
+        card = ctk.CTkFrame(parent, fg_color="#f0f0f0", corner_radius=8)
         
-        test_types = self.test_service.get_all_test_types()
-        
-        for idx, tt in enumerate(test_types):
-            card = ctk.CTkFrame(self.test_types_list, fg_color="#f0f0f0", corner_radius=8)
-            card.pack(fill="x", pady=5, padx=5)
-            
-            info = ctk.CTkLabel(
-                card,
-                text=f"🧪 {tt.name} | {tt.category or 'N/A'} | {tt.unit or 'N/A'}",
-                font=("Arial", 13),
-                anchor="w"
-            )
-            info.pack(side="left", padx=15, pady=10, fill="x", expand=True)
-            
-            edit_btn = ctk.CTkButton(
-                card,
-                text="✏️",
-                width=40,
-                command=lambda t=tt: self.edit_test_type(t)
-            )
-            edit_btn.pack(side="right", padx=5, pady=5)
+        card.edit_btn = ctk.CTkButton(card, text="✏️", width=40)
+        card.edit_btn.pack(side="right", padx=5, pady=5)
+        
+        card.info_label = ctk.CTkLabel(card, font=("Arial", 13), anchor="w")
+        card.info_label.pack(side="left", padx=15, pady=10, fill="x", expand=True)
+        
+        return card
+    
+    def bind_test_type_row(self, card, tt):
+        """Show a test type in a (possibly recycled) row"""
+        card.info_label.configure(text=f"🧪 {tt.name} | {tt.category or 'N/A'} | {tt.unit or 'N/A'}")
+        card.edit_btn.configure(command=lambda t=tt: self.edit_test_type(t))
     
     def add_test_type(self):
         """Add new test type"""
@@ -143,17 +148,12 @@ class TestPanel(ctk.CTkFrame):
             side="left", padx=5
         )
         
-        patients = self.patient_service.get_all_patients(limit=500)
-        patient_names = [f"{p.patient_code} - {p.full_name}" for p in patients]
-        
-        self.timeline_patient_combo = ctk.CTkComboBox(
+        self.timeline_patient_picker = PatientPicker(
             select_frame,
-            values=patient_names,
             width=300,
             command=self.on_patient_selected
         )
-        self.timeline_patient_combo.pack(side="left", padx=10)
-        self.patients_list = patients
+        self.timeline_patient_picker.pack(side="left", padx=10)
         
         # Test type selection
         ctk.CTkLabel(select_frame, text="Loại XN:", font=("Arial", 13, "bold")).pack(
@@ -172,24 +172,19 @@ class TestPanel(ctk.CTkFrame):
         )
         view_btn.pack(side="left", padx=10)
         
-        # Results frame
-        self.timeline_results = ctk.CTkScrollableFrame(tab)
+        # Results frame: chart on top, virtualized result history below
+        self.timeline_results = ctk.CTkFrame(tab, fg_color="transparent")
         self.timeline_results.grid(row=2, column=0, sticky="nsew", padx=10, pady=10)
+        self.timeline_results.grid_columnconfigure(0, weight=1)
+        self.timeline_results.grid_rowconfigure(1, weight=1)
     
-    def on_patient_selected(self, choice):
+    def refresh(self, changed_tables):
+        """Reload only the parts backed by changed tables"""
+        if "test_types" in changed_tables:
+            self.load_test_types()
+    
+    def on_patient_selected(self, patient):
         """When patient is selected, load their test types"""
-        selected_text = self.timeline_patient_combo.get()
-        
-        # Find patient by matching text
-        patient = None
-        for p in self.patients_list:
-            if f"{p.patient_code} - {p.full_name}" == selected_text:
-                patient = p
-                break
-        
-        if not patient:
-            return
-        
         # Get all test types this patient has
         latest_tests = self.test_service.get_patient_all_tests_latest(patient.id)
         test_names = list(set([t['test_name'] for t in latest_tests]))
@@ -205,15 +200,7 @@ class TestPanel(ctk.CTkFrame):
             widget.destroy()
         
         # Get selections
-        selected_text = self.timeline_patient_combo.get()
-        
-        # Find patient by matching text
-        patient = None
-        for p in self.patients_list:
-            if f"{p.patient_code} - {p.full_name}" == selected_text:
-                patient = p
-                break
-        
+        patient = self.timeline_patient_picker.get_patient()
         if not patient:
             messagebox.showwarning("Cảnh Báo", "Vui lòng chọn bệnh nhân")
             return
@@ -247,12 +234,12 @@ class TestPanel(ctk.CTkFrame):
         self.display_timeline_table(timeline, test_type)
         
         # Display chart
-        self.display_timeline_chart(timeline, test_type)
+        self.display_timeline_chart(patient, timeline, test_type)
     
     def display_timeline_table(self, timeline, test_type):
         """Display timeline as table"""
         table_frame = ctk.CTkFrame(self.timeline_results, fg_color="#f9f9f9", corner_radius=10)
-        table_frame.pack(fill="x", padx=10, pady=10)
+        table_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
         
         title = ctk.CTkLabel(
             table_frame,
@@ -261,23 +248,35 @@ class TestPanel(ctk.CTkFrame):
         )
         title.pack(padx=15, pady=15, anchor="w")
         
-        for item in reversed(timeline):  # Show newest first
-            row = ctk.CTkFrame(table_frame, fg_color="white", corner_radius=5)
-            row.pack(fill="x", padx=15, pady=5)
-            
-            date_str = Formatters.format_date(item['date'])
-            value_str = str(item['value']) if item['value'] else item.get('text', 'N/A')
-            unit_str = item.get('unit', test_type.unit or '')
-            
-            text = f"📅 {date_str} | 📊 {value_str} {unit_str}"
-            
-            label = ctk.CTkLabel(row, text=text, font=("Arial", 13), anchor="w")
-            label.pack(padx=10, pady=8, anchor="w")
+        history = VirtualListView(
+            table_frame,
+            create_row=self.create_timeline_row,
+            bind_row=lambda row, item: self.bind_timeline_row(row, item, test_type),
+            row_height=46,
+            row_gap=6
+        )
+        history.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        history.set_items(list(reversed(timeline)))  # Show newest first
     
-    def display_timeline_chart(self, timeline, test_type):
-        """Display timeline as chart"""
+    def create_timeline_row(self, parent):
+        """Create an empty result history row"""
+        row = ctk.CTkFrame(parent, fg_color="white", corner_radius=5)
+        row.label = ctk.CTkLabel(row, font=("Arial", 13), anchor="w")
+        row.label.pack(padx=10, pady=8, anchor="w")
+        return row
+    
+    def bind_timeline_row(self, row, item, test_type):
+        """Show one result in a (possibly recycled) history row"""
+        date_str = Formatters.format_date(item['date'])
+        value_str = str(item['value']) if item['value'] else item.get('text', 'N/A')
+        unit_str = item.get('unit', test_type.unit or '')
+        
+        row.label.configure(text=f"📅 {date_str} | 📊 {value_str} {unit_str}")
+    
+    def display_timeline_chart(self, patient, timeline, test_type):
+        """Display timeline as chart (rendered off the UI thread, cached per data version)"""
         chart_frame = ctk.CTkFrame(self.timeline_results, fg_color="white", corner_radius=10)
-        chart_frame.pack(fill="both", expand=True, padx=10, pady=10)
+        chart_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
         
         title = ctk.CTkLabel(
             chart_frame,
@@ -286,19 +285,24 @@ class TestPanel(ctk.CTkFrame):
         )
         title.pack(padx=15, pady=15, anchor="w")
         
-        # Create chart
-        fig = ChartHelper.create_timeline_chart(
-            timeline,
-            test_type.name,
-            test_type.normal_range_min,
-            test_type.normal_range_max,
-            figsize=(10, 5)
+        chart_label = ctk.CTkLabel(
+            chart_frame,
+            text="⏳ Đang vẽ biểu đồ...",
+            font=("Arial", 13),
+            text_color="gray"
         )
+        chart_label.pack(fill="both", expand=True, padx=15, pady=15)
+        
+        size = (1000, 400)
+        future = self.chart_renderer.render_timeline(patient.id, test_type, timeline, size)
+        
+        def show(image, error):
+            if error is not None:
+                chart_label.configure(text=f"Không thể vẽ biểu đồ: {error}", text_color="red")
+                return
+            chart_label.configure(text="", image=ctk.CTkImage(light_image=image, size=size))
         
-        # Embed in tkinter
-        canvas = FigureCanvasTkAgg(fig, chart_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill="both", expand=True, padx=15, pady=15)
+        deliver(chart_label, future, show)
 
 
 class TestTypeDialog(ctk.CTkToplevel):
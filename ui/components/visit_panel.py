@@ -4,8 +4,10 @@ Visit Management Panel
 import customtkinter as ctk
 from tkinter import messagebox
 from datetime import datetime, date
-from services import VisitService, PatientService
+from services import VisitService
 from utils import Formatters
+from ui.utils.widgets import VirtualListView, PagedDataSource
+from ui.utils.patient_picker import PatientPicker
 from ui.components.visit_details_dialog import VisitDetailsDialog
 import config
 
@@ -13,11 +15,13 @@ import config
 class VisitPanel(ctk.CTkFrame):
     """Panel for visit/examination management"""
     
+    # Tables whose changes make the panel reload when it is shown again
+    DATA_TABLES = ("visits", "patients")
+    
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
         self.visit_service = VisitService()
-        self.patient_service = PatientService()
         
         # Configure grid
         self.grid_columnconfigure(0, weight=1)
@@ -55,80 +59,64 @@ class VisitPanel(ctk.CTkFrame):
     
     def create_content(self):
         """Create content area"""
-        self.list_frame = ctk.CTkScrollableFrame(self)
-        self.list_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
-        self.list_frame.grid_columnconfigure(0, weight=1)
+        self.list_view = VirtualListView(
+            self,
+            create_row=self.create_visit_card,
+            bind_row=self.bind_visit_card,
+            row_height=130,
+            empty_text="Chưa có lần khám nào"
+        )
+        self.list_view.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
     
-    def load_visits(self):
-        """Load recent visits"""
-        for widget in self.list_frame.winfo_children():
-            widget.destroy()
-        
-        visits = self.visit_service.get_recent_visits(limit=50)
-        
-        if not visits:
-            no_data = ctk.CTkLabel(
-                self.list_frame,
-                text="Chưa có lần khám nào",
-                font=("Arial", 14),
-                text_color="gray"
-            )
-            no_data.grid(row=0, column=0, pady=50)
-            return
-        
-        for idx, visit in enumerate(visits):
-            self.create_visit_card(visit, idx)
+    def load_visits(self, keep_position=False):
+        """Load recent visits, a page at a time as the list scrolls"""
+        source = PagedDataSource(
+            lambda offset, limit: self.visit_service.get_recent_visits(limit=limit, offset=offset),
+            page_size=config.LIST_PAGE_SIZE
+        )
+        self.list_view.set_source(source, keep_position=keep_position)
     
-    def create_visit_card(self, visit, row):
-        """Create visit card"""
-        card = ctk.CTkFrame(self.list_frame, fg_color="#f0f0f0", corner_radius=10)
-        card.grid(row=row, column=0, sticky="ew", pady=5, padx=5)
+    def refresh(self, changed_tables):
+        """Reload the recent visits list"""
+        self.load_visits(keep_position=True)
+    
+    def create_visit_card(self, parent):
+        """Create an empty visit card; filled in by bind_visit_card"""
+        card = ctk.CTkFrame(parent, fg_color="#f0f0f0", corner_radius=10)
         
         info_frame = ctk.CTkFrame(card, fg_color="transparent")
         info_frame.pack(fill="both", expand=True, padx=15, pady=10)
         
         # Patient and date
-        header_text = f"👤 {visit.patient.full_name} | 📅 {Formatters.format_date(visit.visit_date)}"
-        header_label = ctk.CTkLabel(
-            info_frame,
-            text=header_text,
-            font=("Arial", 16, "bold"),
-            anchor="w"
-        )
-        header_label.pack(anchor="w")
+        card.header_label = ctk.CTkLabel(info_frame, font=("Arial", 16, "bold"), anchor="w")
+        card.header_label.pack(anchor="w")
         
         # Diagnosis
-        if visit.diagnosis:
-            diag_label = ctk.CTkLabel(
-                info_frame,
-                text=f"🔍 Chẩn đoán: {visit.diagnosis[:100]}...",
-                font=("Arial", 12),
-                text_color="#555",
-                anchor="w"
-            )
-            diag_label.pack(anchor="w", pady=(5, 0))
+        card.diag_label = ctk.CTkLabel(info_frame, font=("Arial", 12), text_color="#555", anchor="w")
+        card.diag_label.pack(anchor="w", pady=(5, 0))
         
         # Buttons
         btn_frame = ctk.CTkFrame(info_frame, fg_color="transparent")
         btn_frame.pack(anchor="w", pady=(10, 0))
         
-        view_btn = ctk.CTkButton(
-            btn_frame,
-            text="👁️ Xem Chi Tiết",
-            command=lambda v=visit: self.view_visit(v),
-            width=120,
-            fg_color="#2196F3"
-        )
-        view_btn.pack(side="left", padx=(0, 5))
+        card.view_btn = ctk.CTkButton(btn_frame, text="👁️ Xem Chi Tiết", width=120, fg_color="#2196F3")
+        card.view_btn.pack(side="left", padx=(0, 5))
         
-        edit_btn = ctk.CTkButton(
-            btn_frame,
-            text="✏️ Sửa",
-            command=lambda v=visit: self.edit_visit(v),
-            width=80,
-            fg_color="#FF9800"
+        card.edit_btn = ctk.CTkButton(btn_frame, text="✏️ Sửa", width=80, fg_color="#FF9800")
+        card.edit_btn.pack(side="left", padx=5)
+        
+        return card
+    
+    def bind_visit_card(self, card, visit):
+        """Show a visit in a (possibly recycled) card"""
+        card.header_label.configure(
+            text=f"👤 {visit.patient.full_name} | 📅 {Formatters.format_date(visit.visit_date)}"
+        )
+        card.diag_label.configure(
+            text=f"🔍 Chẩn đoán: {visit.diagnosis[:100]}..." if visit.diagnosis else ""
         )
-        edit_btn.pack(side="left", padx=5)
+        card.view_btn.configure(command=lambda v=visit: self.view_visit(v))
+        card.edit_btn.configure(command=lambda v=visit: self.edit_visit(v))
     
     def show_add_dialog(self):
         """Show add visit dialog"""
@@ -148,9 +136,10 @@ class VisitPanel(ctk.CTkFrame):
                     "Bạn có muốn thêm kết quả xét nghiệm và đơn thuốc cho lần khám này không?"
                 ):
                     # Open details dialog to add test results and prescriptions
+                    # (load the patient relation only now that it is needed)
                     details_dialog = VisitDetailsDialog(
                         self, 
-                        visit=new_visit, 
+                        visit=self.visit_service.get_visit_by_id(new_visit.id), 
                         visit_service=self.visit_service
                     )
                     details_dialog.wait_window()
@@ -163,7 +152,7 @@ class VisitPanel(ctk.CTkFrame):
         """View visit details with test results and prescriptions"""
         dialog = VisitDetailsDialog(self, visit=visit, visit_service=self.visit_service)
         dialog.wait_window()
-        self.load_visits()  # Refresh in case changes were made
+        self.load_visits(keep_position=True)  # Refresh in case changes were made
     
     def edit_visit(self, visit):
         """Edit visit"""
@@ -174,7 +163,7 @@ class VisitPanel(ctk.CTkFrame):
             try:
                 self.visit_service.update_visit(visit.id, **dialog.result)
                 messagebox.showinfo("Thành Công", "Đã cập nhật thông tin")
-                self.load_visits()
+                self.load_visits(keep_position=True)
             except Exception as e:
                 messagebox.showerror("Lỗi", f"Không thể cập nhật: {str(e)}")
 
@@ -190,7 +179,6 @@ class VisitDialog(ctk.CTkToplevel):
         
         self.visit = visit
         self.result = None
-        self.patient_service = PatientService()
         
         self.create_form()
         
@@ -210,18 +198,11 @@ class VisitDialog(ctk.CTkToplevel):
             row=row, column=0, sticky="w", pady=10
         )
         
-        # Get all patients for dropdown
-        patients = self.patient_service.get_all_patients(limit=500)
-        patient_names = [f"{p.patient_code} - {p.full_name}" for p in patients]
-        
-        self.patient_combo = ctk.CTkComboBox(form, values=patient_names, width=400)
-        self.patient_combo.grid(row=row, column=1, sticky="ew", pady=10)
+        self.patient_picker = PatientPicker(form, width=400)
+        self.patient_picker.grid(row=row, column=1, sticky="ew", pady=10)
         
         if self.visit:
-            patient_text = f"{self.visit.patient.patient_code} - {self.visit.patient.full_name}"
-            self.patient_combo.set(patient_text)
-        
-        self.patients_list = patients
+            self.patient_picker.set_patient(self.visit.patient)
         row += 1
         
         # Visit date
@@ -299,23 +280,11 @@ class VisitDialog(ctk.CTkToplevel):
     
     def save(self):
         """Save visit data"""
-        # Get selected patient
-        selected_text = self.patient_combo.get()
-        
-        # Find patient index by matching the text
-        patient_idx = -1
-        for idx, patient in enumerate(self.patients_list):
-            expected_text = f"{patient.patient_code} - {patient.full_name}"
-            if expected_text == selected_text:
-                patient_idx = idx
-                break
-        
-        if patient_idx < 0:
+        patient_id = self.patient_picker.get_patient_id()
+        if patient_id is None:
             messagebox.showerror("Lỗi", "Vui lòng chọn bệnh nhân")
             return
         
-        patient = self.patients_list[patient_idx]
-        
         # Parse date
         visit_date = Formatters.parse_date(self.date_entry.get())
         if not visit_date:
@@ -323,7 +292,7 @@ class VisitDialog(ctk.CTkToplevel):
             return
         
         self.result = {
-            'patient_id': patient.id,
+            'patient_id': patient_id,
             'visit_date': visit_date,
             'symptoms': self.symptoms_text.get("1.0", "end-1c").strip() or None,
             'diagnosis': self.diagnosis_text.get("1.0", "end-1c").strip() or None,
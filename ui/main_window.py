@@ -2,9 +2,9 @@
 Main Window - Application Container
 """
 import customtkinter as ctk
-from datetime import date
-from services import AppointmentService
-from ui.components import PatientPanel, VisitPanel, TestPanel, AppointmentPanel, MedicinePanel, ImportPanel
+from collections import OrderedDict
+from database.db_manager import get_db_manager
+from ui import components
 import config
 
 
@@ -14,7 +14,7 @@ class MainWindow(ctk.CTkFrame):
     def __init__(self, master):
         super().__init__(master, fg_color="transparent")
         
-        self.appointment_service = AppointmentService()
+        self.db_manager = get_db_manager()
         
         # Configure grid layout
         self.grid_columnconfigure(1, weight=1)
@@ -29,12 +29,16 @@ class MainWindow(ctk.CTkFrame):
         self.content_frame.grid_columnconfigure(0, weight=1)
         self.content_frame.grid_rowconfigure(0, weight=1)
         
-        # Initialize panels
+        # Initialize panels; built panels are kept alive between visits (LRU order)
         self.current_panel = None
-        self.panels = {}
-        
-        # Show dashboard by default
-        self.show_dashboard()
+        self.current_panel_name = None
+        self.panels = OrderedDict()
+        self.panel_versions = {}  # table versions when each panel was last hidden
+        self.panel_widgets = {}  # widget count when each panel was last hidden
+        
+        # The app calls show_dashboard() once the database is ready
+        self.show_loading()
+        self.set_navigation_enabled(False)
     
     def create_sidebar(self):
         """Create navigation sidebar"""
@@ -90,158 +94,121 @@ class MainWindow(ctk.CTkFrame):
         )
         self.version_label.grid(row=11, column=0, padx=20, pady=10, sticky="s")
     
-    def clear_content(self):
-        """Clear current content"""
-        if self.current_panel:
-            self.current_panel.destroy()
-            self.current_panel = None
+    def set_navigation_enabled(self, enabled: bool):
+        """Enable or disable the sidebar buttons"""
+        for btn in self.nav_buttons:
+            btn.configure(state="normal" if enabled else "disabled")
     
-    def show_dashboard(self):
-        """Show dashboard with statistics and alerts"""
+    def show_loading(self):
+        """Placeholder shown while startup finishes in the background"""
         self.clear_content()
         
-        dashboard = ctk.CTkFrame(self.content_frame)
-        dashboard.grid(row=0, column=0, sticky="nsew", padx=5, pady=5)
-        dashboard.grid_columnconfigure((0, 1, 2), weight=1)
-        
-        # Title
-        title = ctk.CTkLabel(
-            dashboard,
-            text="📊 Trang Chủ",
-            font=("Arial", 24, "bold")
+        loading = ctk.CTkLabel(
+            self.content_frame,
+            text="⏳ Đang khởi tạo dữ liệu...",
+            font=("Arial", 16),
+            text_color="gray"
         )
-        title.grid(row=0, column=0, columnspan=3, padx=20, pady=20, sticky="w")
+        loading.grid(row=0, column=0, sticky="nsew")
+        self.current_panel = loading
+    
+    def clear_content(self):
+        """Hide the current panel if it is cached, destroy it otherwise"""
+        panel, name = self.current_panel, self.current_panel_name
+        self.current_panel = None
+        self.current_panel_name = None
         
-        # Statistics cards
-        try:
-            from services import PatientService, VisitService
-            patient_service = PatientService()
-            visit_service = VisitService()
-            
-            patient_count = patient_service.get_patient_count()
-            visit_count = visit_service.get_visit_count()
-            overdue_count = self.appointment_service.get_overdue_count()
-            
-            # Patient count card
-            patient_card = self.create_stat_card(
-                dashboard, 
-                "Tổng Bệnh Nhân", 
-                str(patient_count),
-                "#2196F3"
-            )
-            patient_card.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
-            
-            # Visit count card
-            visit_card = self.create_stat_card(
-                dashboard,
-                "Tổng Lượt Khám",
-                str(visit_count),
-                "#4CAF50"
-            )
-            visit_card.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
-            
-            # Overdue appointments card
-            overdue_card = self.create_stat_card(
-                dashboard,
-                "Lịch Hẹn Quá Hạn",
-                str(overdue_count),
-                "#F44336" if overdue_count > 0 else "#9E9E9E"
-            )
-            overdue_card.grid(row=1, column=2, padx=10, pady=10, sticky="ew")
-            
-            # Alerts section
-            if overdue_count > 0:
-                alerts_frame = ctk.CTkFrame(dashboard, fg_color="#FFF3E0", corner_radius=10)
-                alerts_frame.grid(row=2, column=0, columnspan=3, padx=10, pady=20, sticky="ew")
-                
-                alert_label = ctk.CTkLabel(
-                    alerts_frame,
-                    text=f"⚠️ Có {overdue_count} lịch hẹn quá hạn. Vui lòng kiểm tra!",
-                    font=("Arial", 14, "bold"),
-                    text_color="#E65100"
-                )
-                alert_label.pack(padx=20, pady=15)
-                
-                view_btn = ctk.CTkButton(
-                    alerts_frame,
-                    text="Xem Chi Tiết",
-                    command=self.show_appointments,
-                    fg_color="#FF9800",
-                    hover_color="#F57C00"
-                )
-                view_btn.pack(pady=(0, 15))
-            
-        except Exception as e:
-            error_label = ctk.CTkLabel(
-                dashboard,
-                text=f"Lỗi tải dữ liệu: {str(e)}",
-                font=("Arial", 14),
-                text_color="red"
-            )
-            error_label.grid(row=1, column=0, columnspan=3, padx=20, pady=20)
+        if panel is None:
+            return
+        if name not in self.panels:
+            panel.destroy()
+            return
         
-        self.current_panel = dashboard
-    
-    def create_stat_card(self, parent, title, value, color):
-        """Create a statistics card"""
-        card = ctk.CTkFrame(parent, fg_color=color, corner_radius=10)
-        
-        title_label = ctk.CTkLabel(
-            card,
-            text=title,
-            font=("Arial", 14),
-            text_color="white"
+        panel.grid_remove()
+        self.panel_versions[name] = self.db_manager.get_table_versions(
+            getattr(panel, "DATA_TABLES", ())
         )
-        title_label.pack(padx=20, pady=(20, 5), anchor="w")
+        self.panel_widgets[name] = self.count_widgets(panel)
+    
+    def show_dashboard(self):
+        """Show dashboard with statistics and alerts"""
+        self.show_panel("DashboardPanel", on_view_overdue=self.show_appointments)
+        self.current_panel.revalidate()
+    
+    def show_panel(self, panel_name: str, **options):
+        """
+        Show a panel from ui.components, importing its module on first use
+        options are passed to the panel's constructor when it is built.
+        A cached panel is shown again as is, after refresh() if any of its
+        DATA_TABLES changed while it was hidden
+        """
+        self.clear_content()
         
-        value_label = ctk.CTkLabel(
-            card,
-            text=value,
-            font=("Arial", 32, "bold"),
-            text_color="white"
-        )
-        value_label.pack(padx=20, pady=(0, 20), anchor="w")
+        panel = self.panels.get(panel_name)
+        if panel is None:
+            panel_class = getattr(components, panel_name)
+            panel = panel_class(self.content_frame, **options)
+            self.panels[panel_name] = panel
+        else:
+            self.panels.move_to_end(panel_name)
+            tables = getattr(panel, "DATA_TABLES", ())
+            versions = self.db_manager.get_table_versions(tables)
+            last_seen = self.panel_versions.get(panel_name, {})
+            changed = {table for table in tables if versions[table] != last_seen.get(table)}
+            if changed:
+                panel.refresh(changed)
         
-        return card
+        panel.grid(row=0, column=0, sticky="nsew")
+        self.current_panel = panel
+        self.current_panel_name = panel_name
+        self.evict_panels()
+    
+    def evict_panels(self):
+        """Destroy least recently shown panels while over the panel or widget cap"""
+        while len(self.panels) > 1:
+            widgets = sum(self.panel_widgets.get(name, 0) for name in self.panels)
+            if len(self.panels) <= config.PANEL_CACHE_MAX_PANELS \
+                    and widgets <= config.PANEL_CACHE_MAX_WIDGETS:
+                break
+            
+            name = next(iter(self.panels))
+            if name == self.current_panel_name:
+                break
+            self.panels.pop(name).destroy()
+            self.panel_versions.pop(name, None)
+            self.panel_widgets.pop(name, None)
+    
+    @staticmethod
+    def count_widgets(widget) -> int:
+        """Number of Tk widgets under widget, itself included"""
+        count = 0
+        pending = [widget]
+        while pending:
+            current = pending.pop()
+            count += 1
+            pending.extend(current.winfo_children())
+        return count
     
     def show_patients(self):
         """Show patient management panel"""
-        self.clear_content()
-        panel = PatientPanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("PatientPanel")
     
     def show_visits(self):
         """Show visit management panel"""
-        self.clear_content()
-        panel = VisitPanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("VisitPanel")
     
     def show_tests(self):
         """Show test management panel"""
-        self.clear_content()
-        panel = TestPanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("TestPanel")
     
     def show_medicine(self):
         """Show medicine management panel"""
-        self.clear_content()
-        panel = MedicinePanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("MedicinePanel")
     
     def show_appointments(self):
         """Show appointment management panel"""
-        self.clear_content()
-        panel = AppointmentPanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("AppointmentPanel")
     
     def show_import(self):
         """Show data import panel"""
-        self.clear_content()
-        panel = ImportPanel(self.content_frame)
-        panel.grid(row=0, column=0, sticky="nsew")
-        self.current_panel = panel
+        self.show_panel("ImportPanel")
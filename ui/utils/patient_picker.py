@@ -0,0 +1,196 @@
+"""
+Patient Picker
+Typeahead patient selector backed by indexed prefix search
+"""
+import tkinter as tk
+import customtkinter as ctk
+from typing import Callable, List, Optional
+from services import PatientService
+from ui.utils.search import IncrementalSearch, like_key
+import config
+
+
+def patient_prefix_matches(patient, keyword: str) -> bool:
+    """In-memory equivalent of search_patients_by_prefix for one patient"""
+    key = like_key(keyword)
+    return like_key(patient.full_name).startswith(key) or like_key(patient.patient_code).startswith(key)
+
+
+def patient_label(patient) -> str:
+    """Text shown for a patient in the picker"""
+    return f"{patient.patient_code} - {patient.full_name}"
+
+
+class PatientPicker(ctk.CTkFrame):
+    """
+    Entry with a suggestion list instead of a combo box of every patient
+
+    Each keystroke (debounced) fetches at most `limit` patients whose name or
+    code starts with the typed text, using the NOCASE indexes. Up/Down move
+    through the suggestions, Enter or a click picks one, Escape closes the
+    list. get_patient_id() returns the picked id; editing the text clears it.
+    """
+
+    VISIBLE_ROWS = 8
+
+    def __init__(self, master, command: Optional[Callable[[object], None]] = None,
+                 placeholder: str = "Nhập tên hoặc mã bệnh nhân...",
+                 limit: int = config.PATIENT_PICKER_LIMIT, width: int = 300, **kwargs):
+        super().__init__(master, fg_color="transparent", **kwargs)
+
+        self.command = command
+        self.limit = limit
+        self.patient_service = PatientService()
+        self.patient = None
+        self.suggestions: List = []
+
+        self.entry = ctk.CTkEntry(self, placeholder_text=placeholder, width=width)
+        self.entry.pack(fill="x")
+
+        self.popup = None
+        self.listbox = None
+        self.has_focus = False
+
+        self.search = IncrementalSearch(
+            self.entry,
+            fetch=lambda keyword: self.patient_service.search_patients_by_prefix(keyword, self.limit),
+            matches=patient_prefix_matches,
+            on_results=self.show_suggestions,
+            tables=("patients",),
+            result_limit=self.limit,
+            prefix=True
+        )
+
+        self.entry.bind("<KeyRelease>", self._on_edit, add="+")
+        self.entry.bind("<Down>", lambda e: self._move(1))
+        self.entry.bind("<Up>", lambda e: self._move(-1))
+        self.entry.bind("<Return>", lambda e: self._pick_active())
+        self.entry.bind("<Escape>", lambda e: self.hide_suggestions())
+        self.entry.bind("<FocusIn>", self._on_focus_in, add="+")
+        self.entry.bind("<FocusOut>", self._on_focus_out, add="+")
+
+    # ===== Selection =====
+
+    def get_patient(self):
+        """Picked patient, or None"""
+        return self.patient
+
+    def get_patient_id(self) -> Optional[int]:
+        """Id of the picked patient, or None"""
+        return self.patient.id if self.patient is not None else None
+
+    def set_patient(self, patient):
+        """Pick a patient programmatically (e.g. when editing a record)"""
+        self.patient = patient
+        self.entry.delete(0, "end")
+        if patient is not None:
+            self.entry.insert(0, patient_label(patient))
+        self.search.cancel()
+        self.hide_suggestions()
+
+    def _select(self, patient):
+        self.set_patient(patient)
+        self.entry.icursor("end")
+        if self.command:
+            self.command(patient)
+
+    def _on_edit(self, event):
+        """Typing over a picked patient un-picks it"""
+        if self.patient is not None and self.entry.get() != patient_label(self.patient):
+            self.patient = None
+
+    # ===== Suggestion list =====
+
+    def show_suggestions(self, keyword: str, patients: List, complete: bool):
+        """IncrementalSearch callback"""
+        self.suggestions = patients
+        if not keyword or not patients or not self.has_focus:
+            self.hide_suggestions()
+            return
+
+        if self.popup is None:
+            self._create_popup()
+
+        self.listbox.delete(0, "end")
+        for patient in patients:
+            self.listbox.insert("end", patient_label(patient))
+        self.listbox.configure(height=min(len(patients), self.VISIBLE_ROWS))
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+
+        self.popup.geometry(
+            f"{self.entry.winfo_width()}x{self.listbox.winfo_reqheight()}"
+            f"+{self.entry.winfo_rootx()}+{self.entry.winfo_rooty() + self.entry.winfo_height()}"
+        )
+        self.popup.deiconify()
+        self.popup.lift()
+
+    def hide_suggestions(self):
+        if self.popup is not None:
+            self.popup.withdraw()
+
+    def _create_popup(self):
+        self.popup = tk.Toplevel(self)
+        self.popup.withdraw()
+        self.popup.overrideredirect(True)
+        self.popup.attributes("-topmost", True)
+
+        self.listbox = tk.Listbox(
+            self.popup,
+            font=("Arial", 12),
+            activestyle="none",
+            exportselection=False,
+            borderwidth=1,
+            highlightthickness=0,
+            bg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkEntry"]["fg_color"]),
+            fg=self._apply_appearance_mode(ctk.ThemeManager.theme["CTkEntry"]["text_color"]),
+            selectbackground="#2196F3",
+            selectforeground="white"
+        )
+        self.listbox.pack(fill="both", expand=True)
+        self.listbox.bind("<ButtonRelease-1>", self._on_click)
+
+    def _popup_visible(self) -> bool:
+        return self.popup is not None and self.popup.winfo_viewable()
+
+    def _move(self, step: int):
+        if not self._popup_visible():
+            if self.suggestions and self.entry.get().strip():
+                self.show_suggestions(self.entry.get(), self.suggestions, True)
+            return "break"
+
+        current = self.listbox.curselection()
+        index = (current[0] if current else -1) + step
+        index = max(0, min(index, len(self.suggestions) - 1))
+        self.listbox.selection_clear(0, "end")
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.see(index)
+        return "break"
+
+    def _pick_active(self):
+        if not self._popup_visible():
+            return None
+        current = self.listbox.curselection()
+        if current and current[0] < len(self.suggestions):
+            self._select(self.suggestions[current[0]])
+        return "break"
+
+    def _on_click(self, event):
+        index = self.listbox.nearest(event.y)
+        if 0 <= index < len(self.suggestions):
+            self._select(self.suggestions[index])
+            self.entry.focus_set()
+
+    def _on_focus_in(self, event):
+        self.has_focus = True
+
+    def _on_focus_out(self, event):
+        self.has_focus = False
+        self.after(150, self._hide_if_unfocused)
+
+    def _hide_if_unfocused(self):
+        if not self.winfo_exists() or self.has_focus:
+            return
+        if self.listbox is None or self.focus_get() is not self.listbox:
+            self.hide_suggestions()
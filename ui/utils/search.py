@@ -0,0 +1,196 @@
+"""
+Incremental Search
+Debounced search-as-you-type with in-memory refinement of previous results
+"""
+import threading
+from tkinter import messagebox
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional
+from sqlalchemy.exc import OperationalError
+from database.db_manager import get_db_manager, cancellable
+import config
+
+# SQLite's LIKE folds ASCII letters only; 'Đ' and 'đ' do not match each other
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+# One worker for every search box; a newer search interrupts the running one
+_executor = None
+
+
+def like_key(text: Optional[str]) -> str:
+    """Fold text the way SQLite's case-insensitive LIKE compares it"""
+    return (text or "").translate(_ASCII_LOWER)
+
+
+def like_contains(value: Optional[str], keyword: str) -> bool:
+    """In-memory equivalent of `value LIKE '%keyword%'` for keywords without wildcards"""
+    return like_key(keyword) in like_key(value)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search")
+    return _executor
+
+
+class IncrementalSearch:
+    """
+    Search-as-you-type for an entry widget
+
+    Keystrokes restart a debounce timer; when it fires, fetch(keyword) runs
+    on a worker thread and on_results(keyword, rows, complete) is called back
+    on the Tk thread (with no rows when fetch fails; the error is shown in
+    a message box). A newer search cancels a queued one and interrupts a
+    running query. Results are reused without touching the database when
+    - the same keyword was searched recently (small LRU), or
+    - the keyword contains the previous keyword and the previous result was
+      complete (shorter than result_limit): matches(row, keyword) filters it
+      (with prefix=True the keyword must start with the previous keyword)
+    Reused results are dropped once any of `tables` is written.
+    """
+
+    def __init__(self, entry, fetch: Callable[[str], List[Any]],
+                 matches: Callable[[Any, str], bool],
+                 on_results: Callable[[str, List[Any], bool], None],
+                 tables: Iterable[str] = (),
+                 delay_ms: int = config.SEARCH_DEBOUNCE_MS,
+                 cache_size: int = config.SEARCH_CACHE_SIZE,
+                 result_limit: int = config.SEARCH_RESULT_LIMIT,
+                 prefix: bool = False):
+        self.entry = entry
+        self.fetch = fetch
+        self.matches = matches
+        self.on_results = on_results
+        self.tables = tuple(tables)
+        self.delay_ms = delay_ms
+        self.cache_size = cache_size
+        self.result_limit = result_limit
+        self.prefix = prefix
+
+        self.db_manager = get_db_manager()
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (rows, complete, versions)
+        self._last_complete = None  # (key, rows, versions) of the last complete result
+        self._timer = None
+        self._future = None
+        self._cancel_event = None
+        self._generation = 0
+        self._last_text = None
+
+        entry.bind("<KeyRelease>", self._on_key, add="+")
+
+    def search_now(self):
+        """Search immediately (Enter / search button)"""
+        self._cancel_timer()
+        self._last_text = self.entry.get()
+        self._start(self._last_text)
+
+    def cancel(self):
+        """Drop pending and running searches; the entry's current text counts as searched"""
+        self._cancel_timer()
+        self._cancel_running()
+        self._generation += 1
+        self._last_text = self.entry.get()
+
+    def clear_cache(self):
+        """Forget reusable results"""
+        self._cache.clear()
+        self._last_complete = None
+
+    def _on_key(self, event):
+        # Enter searches through search_now; arrows and modifiers change nothing
+        if event.keysym == "Return" or self.entry.get() == self._last_text:
+            return
+        self._cancel_timer()
+        self._timer = self.entry.after(self.delay_ms, self.search_now)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self.entry.after_cancel(self._timer)
+            self._timer = None
+
+    def _start(self, keyword: str):
+        keyword = keyword.strip()
+        key = like_key(keyword)
+        versions = self.db_manager.get_table_versions(self.tables)
+        self._cancel_running()
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[2] == versions:
+            self._cache.move_to_end(key)
+            self._deliver(keyword, cached[0], cached[1])
+            return
+
+        refined = self._refine(keyword, key, versions)
+        if refined is not None:
+            self._remember(key, refined, True, versions)
+            self._deliver(keyword, refined, True)
+            return
+
+        self._generation += 1
+        generation = self._generation
+        cancel_event = threading.Event()
+        self._cancel_event = cancel_event
+
+        def run():
+            with cancellable(cancel_event):
+                return self.fetch(keyword)
+
+        self._future = _get_executor().submit(run)
+        self._poll(self._future, generation, keyword, key, versions)
+
+    def _refine(self, keyword: str, key: str, versions) -> Optional[List[Any]]:
+        """Filter the last complete result when it necessarily contains this one"""
+        if self._last_complete is None or "%" in keyword or "_" in keyword:
+            return None
+        last_key, rows, last_versions = self._last_complete
+        if last_versions != versions:
+            return None
+        if not (key.startswith(last_key) if self.prefix else last_key in key):
+            return None
+        if not key:
+            return list(rows)
+        return [row for row in rows if self.matches(row, keyword)]
+
+    def _cancel_running(self):
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+            self._cancel_event.set()
+        self._future = None
+
+    def _poll(self, future, generation, keyword, key, versions):
+        if not self.entry.winfo_exists() or generation != self._generation:
+            return
+        if not future.done():
+            self.entry.after(30, self._poll, future, generation, keyword, key, versions)
+            return
+        if future.cancelled():
+            return
+
+        error = future.exception()
+        if isinstance(error, OperationalError) and self._cancel_event.is_set():
+            return  # interrupted by a newer search
+        if error is not None:
+            # Clear the stale results rather than fail inside a Tk callback
+            print(f"Search error: {error}")
+            self._deliver(keyword, [], False)
+            messagebox.showerror("Lỗi", f"Không thể tìm kiếm: {error}")
+            return
+
+        rows = future.result()
+        complete = len(rows) < self.result_limit
+        self._remember(key, rows, complete, versions)
+        self._deliver(keyword, rows, complete)
+
+    def _remember(self, key, rows, complete, versions):
+        self._cache[key] = (rows, complete, versions)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        if complete:
+            self._last_complete = (key, rows, versions)
+
+    def _deliver(self, keyword, rows, complete):
+        self._future = None
+        self.on_results(keyword, rows, complete)
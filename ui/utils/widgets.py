@@ -2,6 +2,8 @@
 Reusable UI Widgets
 Custom widgets for consistency across the application
 """
+import sys
+import tkinter
 import customtkinter as ctk
 from datetime import date
 from typing import Callable, Any, List
@@ -96,6 +98,213 @@ class ScrollableFrame(ctk.CTkScrollableFrame):
     def __init__(self, master, **kwargs):
         super().__init__(master, **kwargs)
 
+class PagedDataSource:
+    """
+    Rows for VirtualListView, fetched a page at a time with fetch(offset, limit)
+    The total is unknown until a short page arrives, so the list grows as the
+    user scrolls towards its end
+    """
+    def __init__(self, fetch: Callable[[int, int], List[Any]], page_size: int = 50,
+                 rows: List[Any] = None, exhausted: bool = False):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.rows: List[Any] = list(rows or [])
+        self.exhausted = exhausted
+    
+    @classmethod
+    def from_list(cls, items: List[Any]) -> "PagedDataSource":
+        """Source over rows that are already loaded"""
+        return cls(lambda offset, limit: [], page_size=max(len(items), 1),
+                   rows=items, exhausted=True)
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def __getitem__(self, index):
+        return self.rows[index]
+    
+    def load_more(self) -> int:
+        """Fetch the next page; returns the number of new rows"""
+        if self.exhausted:
+            return 0
+        page = self.fetch(len(self.rows), self.page_size)
+        self.rows.extend(page)
+        if len(page) < self.page_size:
+            self.exhausted = True
+        return len(page)
+
+class VirtualListView(ctk.CTkFrame):
+    """
+    Scrolling list that only creates widgets for the rows in view
+    
+    create_row(parent) builds one empty row widget and bind_row(widget, item)
+    fills it in. Row widgets are recycled while scrolling (row i is always
+    shown by pool slot i % pool size), so a list of thousands of rows holds
+    a screenful of widgets plus buffer_rows above and below. Rows have a
+    fixed height and come from a PagedDataSource that is paged in as the
+    user nears the end.
+    """
+    SCROLL_STEP = 20  # pixels per scroll unit / wheel notch third
+    
+    def __init__(self, master, create_row: Callable[[Any], Any], bind_row: Callable[[Any, Any], None],
+                 row_height: int, row_gap: int = 10, buffer_rows: int = 3,
+                 empty_text: str = "Không có dữ liệu", **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(master, **kwargs)
+        
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.row_height = row_height
+        self.row_gap = row_gap
+        self.buffer_rows = buffer_rows
+        
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.grid(row=0, column=0, sticky="nsew")
+        
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        self.empty_label = ctk.CTkLabel(
+            self.viewport,
+            text=empty_text,
+            font=("Arial", 14),
+            text_color="gray"
+        )
+        
+        self.source = PagedDataSource.from_list([])
+        self.offset = 0
+        self._pool = []
+        self._bound = {}  # pool slot -> (row index, item) it currently shows
+        self._render_pending = False
+        
+        self.viewport.bind("<Configure>", lambda e: self.schedule_render())
+        # Wheel bindings live on the view's own widgets (rows are bound as they
+        # are created), so they go away with the view
+        self._bind_wheel(self.viewport)
+    
+    def set_source(self, source: PagedDataSource, keep_position: bool = False):
+        """Show rows from a new data source"""
+        self.source = source
+        if not keep_position:
+            self.offset = 0
+        self._bound.clear()
+        
+        # Page in enough rows to fill the view at the current position
+        needed = self.offset + max(self._viewport_height(), self.row_height)
+        while len(source) * self.row_height < needed and source.load_more():
+            pass
+        self.schedule_render()
+    
+    def set_items(self, items: List[Any], keep_position: bool = False):
+        """Show an already loaded list"""
+        self.set_source(PagedDataSource.from_list(items), keep_position)
+    
+    def schedule_render(self):
+        """Redraw once the event loop is idle (coalesces bursts of events)"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self._render)
+    
+    def _render(self):
+        self._render_pending = False
+        if not self.winfo_exists():
+            return
+        
+        height = self._viewport_height()
+        total = len(self.source)
+        content_height = total * self.row_height
+        self.offset = max(0, min(self.offset, content_height - height))
+        
+        if total == 0:
+            for row in self._pool:
+                row.place_forget()
+            self._bound.clear()
+            self.empty_label.place(relx=0.5, y=50, anchor="n")
+            self.scrollbar.set(0, 1)
+            return
+        self.empty_label.place_forget()
+        
+        first = self.offset // self.row_height
+        visible = height // self.row_height + 2
+        start = max(0, first - self.buffer_rows)
+        end = min(total, first + visible + self.buffer_rows)
+        
+        # Pool covers the viewport plus buffers; grows only when the view does
+        needed = visible + 2 * self.buffer_rows
+        while len(self._pool) < needed:
+            row = self.create_row(self.viewport)
+            # Fixed row size regardless of content; place() cannot set it on CTk widgets
+            row.configure(height=self.row_height - self.row_gap)
+            row.pack_propagate(False)
+            row.grid_propagate(False)
+            self._bind_wheel(row)
+            self._pool.append(row)
+        
+        shown = set()
+        for index in range(start, end):
+            slot = index % len(self._pool)
+            row = self._pool[slot]
+            item = self.source[index]
+            if self._bound.get(slot) != (index, id(item)):
+                self.bind_row(row, item)
+                self._bound[slot] = (index, id(item))
+            row.place(x=0, y=index * self.row_height - self.offset, relwidth=1)
+            shown.add(slot)
+        
+        for slot, row in enumerate(self._pool):
+            if slot not in shown:
+                row.place_forget()
+                self._bound.pop(slot, None)
+        
+        if content_height > 0:
+            self.scrollbar.set(self.offset / content_height,
+                               min(1.0, (self.offset + height) / content_height))
+        
+        # Page in more rows before the user reaches the end
+        if end + self.buffer_rows >= total and not self.source.exhausted:
+            if self.source.load_more():
+                self.schedule_render()
+    
+    def _viewport_height(self) -> int:
+        """Viewport height in unscaled pixels, the unit of row_height and place()"""
+        return int(self._reverse_widget_scaling(self.viewport.winfo_height()))
+    
+    def scroll_to(self, offset: int):
+        """Scroll to a pixel offset from the top"""
+        self.offset = max(0, int(offset))
+        self.schedule_render()
+    
+    def _on_scrollbar(self, action, value, unit=None):
+        content_height = len(self.source) * self.row_height
+        if action == "moveto":
+            self.scroll_to(float(value) * content_height)
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(value) * self._viewport_height())
+        else:
+            self.scroll_to(self.offset + int(value) * self.SCROLL_STEP)
+    
+    def _bind_wheel(self, widget):
+        """Scroll on wheel events over widget and everything inside it"""
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            # The plain Tk bind: CTk widgets forward bind() to their canvas only
+            tkinter.Misc.bind(widget, sequence, self._on_mouse_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+    
+    def _on_mouse_wheel(self, event):
+        if event.num == 4:
+            notches = -1
+        elif event.num == 5:
+            notches = 1
+        elif sys.platform == "darwin":
+            notches = -event.delta / 3
+        else:
+            notches = -event.delta / 120
+        self.scroll_to(self.offset + notches * 3 * self.SCROLL_STEP)
+
 class Toast(ctk.CTkToplevel):
     """Notification toast"""
     def __init__(self, master, title: str, message: str, type: str = "info"):
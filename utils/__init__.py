@@ -1,6 +1,21 @@
 """Utils package initialization"""
+import importlib
 from .validators import Validators
 from .formatters import Formatters
-from .chart_helper import ChartHelper
 
-__all__ = ['Validators', 'Formatters', 'ChartHelper']
+# Chart helpers pull in matplotlib, so they are imported on first access
+_LAZY = {
+    'ChartHelper': '.chart_helper',
+    'ChartRenderer': '.chart_renderer',
+    'get_chart_renderer': '.chart_renderer',
+}
+
+__all__ = ['Validators', 'Formatters', 'ChartHelper', 'ChartRenderer', 'get_chart_renderer']
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,11 +2,13 @@
 Chart Helper
 Utilities for creating charts with matplotlib
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import date
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.artist import setp
 from matplotlib.figure import Figure
 import matplotlib.dates as mdates
+import config
 
 
 class ChartHelper:
@@ -17,7 +19,8 @@ class ChartHelper:
                             test_name: str,
                             normal_min: float = None,
                             normal_max: float = None,
-                            figsize: tuple = (10, 6)) -> Figure:
+                            figsize: tuple = (10, 6),
+                            max_points: Optional[int] = config.CHART_MAX_POINTS) -> Figure:
         """
         Create a line chart for test result timeline
         
@@ -27,6 +30,8 @@ class ChartHelper:
             normal_min: Normal range minimum (optional)
             normal_max: Normal range maximum (optional)
             figsize: Figure size tuple (width, height)
+            max_points: Downsample above this many points (None disables);
+                out-of-range values are always kept
         
         Returns:
             matplotlib Figure object
@@ -45,13 +50,40 @@ class ChartHelper:
             ax.set_yticks([])
             return fig
         
+        # test_date is a Date column: day ordinals shifted to matplotlib's epoch,
+        # much cheaper than date2num() on a long list of date objects
+        offset = mdates.date2num(dates[0]) - dates[0].toordinal()
+        x = np.fromiter((d.toordinal() for d in dates), dtype=float, count=len(dates)) + offset
+        y = np.asarray(values, dtype=float)
+        
+        out_of_range = np.zeros(len(y), dtype=bool)
+        if normal_min is not None:
+            out_of_range |= y < normal_min
+        if normal_max is not None:
+            out_of_range |= y > normal_max
+        
+        downsampled = bool(max_points) and len(y) > max_points
+        if downsampled:
+            keep = ChartHelper.downsample_indices(x, y, max_points)
+            keep = np.union1d(keep, np.flatnonzero(out_of_range))
+            x_plot, y_plot = x[keep], y[keep]
+        else:
+            x_plot, y_plot = x, y
+        
         # Create figure
         fig = Figure(figsize=figsize)
         ax = fig.add_subplot(111)
         
-        # Plot main line
-        ax.plot(dates, values, marker='o', linestyle='-', linewidth=2, 
-               markersize=8, color='#2196F3', label='Kết quả')
+        # Plot main line (markers only while they stay readable)
+        if downsampled:
+            ax.plot(x_plot, y_plot, linestyle='-', linewidth=1.5,
+                   color='#2196F3', label=f'Kết quả ({len(x_plot)}/{len(x)} điểm)')
+            if out_of_range.any():
+                ax.plot(x[out_of_range], y[out_of_range], linestyle='none', marker='o',
+                       markersize=4, color='#F44336', label='Ngoài giới hạn')
+        else:
+            ax.plot(x_plot, y_plot, marker='o', linestyle='-', linewidth=2, 
+                   markersize=8, color='#2196F3', label='Kết quả')
         
         # Plot normal range if provided
         if normal_min is not None:
@@ -64,8 +96,7 @@ class ChartHelper:
         
         # Fill normal range area
         if normal_min is not None and normal_max is not None:
-            ax.fill_between(dates, normal_min, normal_max, 
-                           color='green', alpha=0.1)
+            ax.axhspan(normal_min, normal_max, color='green', alpha=0.1)
         
         # Formatting
         ax.set_xlabel('Ngày xét nghiệm', fontsize=11)
@@ -75,6 +106,7 @@ class ChartHelper:
         ax.legend(loc='best')
         
         # Format x-axis dates
+        ax.xaxis_date()
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%d/%m/%Y'))
         fig.autofmt_xdate()  # Rotate date labels
         
@@ -83,6 +115,88 @@ class ChartHelper:
         
         return fig
     
+    @staticmethod
+    def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int,
+                           method: str = config.CHART_DOWNSAMPLE_METHOD) -> np.ndarray:
+        """Pick indices of at most ~max_points points ('lttb' or 'minmax')"""
+        if method == 'minmax':
+            return ChartHelper.minmax_indices(y, max(1, max_points // 2))
+        return ChartHelper.lttb_indices(x, y, max_points)
+    
+    @staticmethod
+    def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+        """
+        Largest-Triangle-Three-Buckets downsampling
+        
+        Keeps the first and last point and, from each of threshold - 2 buckets,
+        the point forming the largest triangle with the previously selected
+        point and the average of the next bucket. Bucket averages come from
+        cumulative sums and each bucket's areas are computed as one array op.
+        
+        Returns:
+            Sorted indices of the selected points
+        """
+        n = len(x)
+        if threshold >= n or threshold < 3:
+            return np.arange(n)
+        
+        # threshold - 2 buckets over the points between first and last
+        edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+        counts = np.diff(edges)
+        
+        sum_x = np.concatenate(([0.0], np.cumsum(x)))
+        sum_y = np.concatenate(([0.0], np.cumsum(y)))
+        avg_x = (sum_x[edges[1:]] - sum_x[edges[:-1]]) / counts
+        avg_y = (sum_y[edges[1:]] - sum_y[edges[:-1]]) / counts
+        
+        # The third triangle vertex is the next bucket's average (last point for the final bucket)
+        next_x = np.append(avg_x[1:], x[-1])
+        next_y = np.append(avg_y[1:], y[-1])
+        
+        selected = np.empty(threshold, dtype=np.int64)
+        selected[0] = 0
+        selected[-1] = n - 1
+        
+        a = 0
+        for i in range(threshold - 2):
+            start, end = edges[i], edges[i + 1]
+            bucket_x = x[start:end]
+            bucket_y = y[start:end]
+            area = np.abs(
+                (x[a] - next_x[i]) * (bucket_y - y[a])
+                - (x[a] - bucket_x) * (next_y[i] - y[a])
+            )
+            a = start + int(np.argmax(area))
+            selected[i + 1] = a
+        
+        return selected
+    
+    @staticmethod
+    def minmax_indices(y: np.ndarray, buckets: int) -> np.ndarray:
+        """
+        Min-max downsampling: keep the lowest and highest point of each bucket
+        Fully vectorized by padding the values into a (buckets, size) matrix
+        
+        Returns:
+            Sorted indices of the selected points (first and last included)
+        """
+        n = len(y)
+        if buckets * 2 >= n:
+            return np.arange(n)
+        
+        size = -(-n // buckets)  # ceil division
+        padded_min = np.full(buckets * size, np.inf)
+        padded_max = np.full(buckets * size, -np.inf)
+        padded_min[:n] = y
+        padded_max[:n] = y
+        
+        offsets = np.arange(buckets) * size
+        lows = offsets + padded_min.reshape(buckets, size).argmin(axis=1)
+        highs = offsets + padded_max.reshape(buckets, size).argmax(axis=1)
+        
+        indices = np.concatenate(([0, n - 1], lows, highs))
+        return np.unique(indices[indices < n])
+    
     @staticmethod
     def create_bar_chart(categories: List[str], values: List[float],
                         title: str, xlabel: str = "", ylabel: str = "",
@@ -122,7 +236,7 @@ class ChartHelper:
         
         # Rotate x labels if needed
         if len(categories) > 5:
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
+            setp(ax.xaxis.get_majorticklabels(), rotation=45, ha='right')
         
         fig.tight_layout()
         
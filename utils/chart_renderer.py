@@ -0,0 +1,176 @@
+"""
+Chart Renderer
+Renders charts to bitmaps with Agg on a worker thread and caches the images
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+
+from .chart_helper import ChartHelper
+import config
+
+
+class ChartRenderer:
+    """
+    Off-thread chart rendering with an LRU cache of finished images
+
+    Images are keyed by (patient_id, test_type_id, data version, size), where
+    the data version is a hash of everything drawn. A new result for a
+    patient/test changes the version, so the next request renders again and
+    older versions of that chart are dropped.
+
+    All matplotlib work happens on a single worker thread using the
+    object-oriented Figure API, never pyplot, so Tk is never touched off the
+    main thread. Tk widgets receive a PIL image through deliver().
+    """
+
+    def __init__(self, max_entries: int = config.CHART_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+        self._images: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+        self._pending: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-render")
+
+        self.hits = 0
+        self.misses = 0
+
+    def render_timeline(self, patient_id: int, test_type, timeline: List[Dict[str, Any]],
+                        size: Tuple[int, int], dpi: int = 100) -> Future:
+        """
+        Timeline chart of one patient/test as a PIL image
+        Returns a Future; it is already done when the image was cached
+        """
+        version = self.data_version(timeline, test_type)
+        key = (patient_id, test_type.id, version, tuple(size))
+
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                self.hits += 1
+                future = Future()
+                future.set_result(image)
+                return future
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                return pending
+
+            self.misses += 1
+            self._purge_versions(patient_id, test_type.id, version)
+            future = self._executor.submit(
+                self._render_timeline,
+                timeline, test_type.name, test_type.normal_range_min,
+                test_type.normal_range_max, size, dpi
+            )
+            self._pending[key] = future
+
+        future.add_done_callback(lambda done: self._store(key, done))
+        return future
+
+    def invalidate(self, patient_id: int = None, test_type_id: int = None):
+        """Drop cached images of a patient and/or test type (everything when both are None)"""
+        with self._lock:
+            for key in list(self._images):
+                if patient_id is not None and key[0] != patient_id:
+                    continue
+                if test_type_id is not None and key[1] != test_type_id:
+                    continue
+                del self._images[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate and size metrics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._images),
+                'pending': len(self._pending)
+            }
+
+    @staticmethod
+    def data_version(timeline: List[Dict[str, Any]], test_type) -> str:
+        """Hash of every input that affects the drawn timeline"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((
+            test_type.name, test_type.normal_range_min, test_type.normal_range_max,
+            config.CHART_MAX_POINTS, config.CHART_DOWNSAMPLE_METHOD
+        )).encode())
+        for item in timeline:
+            digest.update(repr((item['date'], item.get('value'))).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _render_timeline(timeline, test_name, normal_min, normal_max,
+                         size: Tuple[int, int], dpi: int) -> Image.Image:
+        """Worker thread: build the figure and rasterize it with Agg"""
+        width, height = size
+        fig = ChartHelper.create_timeline_chart(
+            timeline, test_name, normal_min, normal_max,
+            figsize=(width / dpi, height / dpi)
+        )
+        fig.set_dpi(dpi)
+
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        buffer = canvas.buffer_rgba()
+        return Image.frombuffer(
+            "RGBA", canvas.get_width_height(), buffer, "raw", "RGBA", 0, 1
+        ).copy()
+
+    def _store(self, key, future: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+
+            self._images[key] = future.result()
+            self._images.move_to_end(key)
+            while len(self._images) > self.max_entries:
+                self._images.popitem(last=False)
+
+    def _purge_versions(self, patient_id: int, test_type_id: int, version: str):
+        """Older versions of this chart can never be requested again"""
+        for key in list(self._images):
+            if key[0] == patient_id and key[1] == test_type_id and key[2] != version:
+                del self._images[key]
+
+
+def deliver(widget, future: Future, callback: Callable[[Optional[Image.Image], Optional[BaseException]], None],
+            interval: int = 30):
+    """
+    Call callback(image, error) on the Tk thread once the future finishes
+    Polls with widget.after() because Tk must not be called from the worker
+    """
+    def poll():
+        if not widget.winfo_exists():
+            return
+        if not future.done():
+            widget.after(interval, poll)
+            return
+        error = future.exception()
+        callback(None if error else future.result(), error)
+
+    if future.done():
+        poll()
+    else:
+        widget.after(interval, poll)
+
+
+_renderer = None
+
+
+def get_chart_renderer() -> ChartRenderer:
+    """Get the shared chart renderer"""
+    global _renderer
+    if _renderer is None:
+        _renderer = ChartRenderer()
+    return _renderer